@@ -1,22 +1,66 @@
 import logging
-from datetime import datetime
+from concurrent.futures import Executor
 
 from bigchaindb_driver import BigchainDB
 from bigchaindb_driver.crypto import generate_keypair
 from prov.model import ProvDocument, ProvElement, ProvAgent
 
-from prov2bigchaindb.core import utils, exceptions, local_stores
+from prov2bigchaindb.core import bundles, confirmations, keypairs, signing, utils, exceptions, local_stores
 
 log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
+def new_keypair(keypair_pool: keypairs.KeypairPool = None) -> tuple:
+    """
+    Returns a keypair for a new account
+
+    :param keypair_pool: Pool of pre-generated keypairs (default: generate a keypair)
+    :type keypair_pool: keypairs.KeypairPool or None
+    :return: Tuple with private_key and public_key
+    :rtype: tuple
+    """
+    if keypair_pool is not None:
+        return keypair_pool.get()
+    return generate_keypair()
+
+
+def prefetch_accounts(store: local_stores.BaseStore, account_ids: list,
+                      keypair_pool: keypairs.KeypairPool = None) -> dict:
+    """
+    Reads the accounts of a document with one query and creates all missing accounts in one transaction
+
+    :param store: Local database object
+    :type store: local_stores.BaseStore
+    :param account_ids: Internal ids of the accounts
+    :type account_ids: list
+    :param keypair_pool: Pool of pre-generated keypairs for new accounts (default: generate keypairs)
+    :type keypair_pool: keypairs.KeypairPool or None
+    :return: Tuples with account_id, public_key, private_key and tx_id by account_id
+    :rtype: dict
+    """
+    rows = store.get_accounts(account_ids)
+    new_rows = []
+    for account_id in dict.fromkeys(account_ids):
+        if account_id not in rows:
+            private_key, public_key = new_keypair(keypair_pool)
+            rows[account_id] = (account_id, public_key, private_key, None)
+            new_rows.append(rows[account_id])
+    if new_rows:
+        store.write_accounts(new_rows)
+    log.debug("Prefetched %s accounts, created %s", len(rows), len(new_rows))
+    return rows
+
+
 class BaseAccount(object):
     """
     BigchainDB Base Account
     """
 
-    def __init__(self, account_id: str, store: local_stores.SqliteStore):
+    def __init__(self, account_id: str, store: local_stores.SqliteStore, pipelined: bool = False,
+                 tracker: confirmations.ConfirmationTracker = None, single_tx: bool = False,
+                 bundle: bundles.BundleWriter = None, signer: Executor = None, account: tuple = None,
+                 keypair_pool: keypairs.KeypairPool = None, deduplicate: bool = False, journal_id: str = None):
         """
         Instantiate BaseAccount object
 
@@ -24,24 +68,100 @@ class BaseAccount(object):
         :type account_id: str
         :param store: Local database object
         :type store: local_stores.SqliteStore
+        :param pipelined: Send TRANSFER directly after CREATE and wait only on the TRANSFER
+        :type pipelined: bool
+        :param tracker: Shared tracker to wait on transactions (default: poll each transaction on its own)
+        :type tracker: confirmations.ConfirmationTracker or None
+        :param single_tx: Store each record in a single CREATE owned by the final recipient
+        :type single_tx: bool
+        :param bundle: Write signed transactions into this bundle instead of sending them
+        :type bundle: bundles.BundleWriter or None
+        :param signer: Executor (e.g. ProcessPoolExecutor) signing the transactions (default: sign in calling thread)
+        :type signer: Executor or None
+        :param account: Row of the account from prefetch_accounts (default: query the store)
+        :type account: tuple or None
+        :param keypair_pool: Pool of pre-generated keypairs, used if the account is not in the store
+                             (default: generate a keypair)
+        :type keypair_pool: keypairs.KeypairPool or None
+        :param deduplicate: Return the transaction of an asset stored before instead of storing it again
+        :type deduplicate: bool
+        :param journal_id: Record the transactions in this journal of the store and resume its steps
+                           (default: no journal)
+        :type journal_id: str or None
         """
         assert account_id is not None
         assert store is not None
         self.store = store
         self.account_id = account_id
+        self.pipelined = pipelined
+        self.tracker = tracker
+        self.single_tx = single_tx
+        self.bundle = bundle
+        self.signer = signer
+        self.deduplicate = deduplicate
+        self.journal_id = journal_id
         self.tx_id = ''
-        self.private_key, self.public_key = generate_keypair()
+        if account is not None:
+            self.account_id, self.public_key, self.private_key, tx_id = account
+            self.tx_id = tx_id or ''
+            return
         try:
             self.account_id, self.public_key, self.private_key, self.tx_id = self.store.get_account(self.account_id)
             log.debug("Found account for %s with public_key %s", self.account_id, self.public_key)
         except exceptions.NoAccountFoundException:
+            self.private_key, self.public_key = new_keypair(keypair_pool)
             self.store.write_account(self.account_id, self.public_key, self.private_key)
             log.debug("New account for %s with public_key %s", self.account_id, self.public_key)
 
     def __str__(self):
         return "{} : {}".format(self.account_id, self.public_key)
 
-    def _create_asset(self, bdb_connection: BigchainDB, asset: dict, metadata: dict = None) -> dict:
+    def _prepare_creation(self, bdb_connection: BigchainDB, asset: dict, metadata: dict = None,
+                          recipient_pub_key: str = None) -> dict:
+        """
+        Prepare and sign a new CREATE transaction without sending it
+
+        :param bdb_connection: Connection object for BigchainDB
+        :type bdb_connection: BigchainDB
+        :param asset: Dictonary with asset data
+        :type asset: dict
+        :param metadata: Dictonary with additional metadata
+        :type metadata: dict or None
+        :param recipient_pub_key: Public key of the owner of the output (default: the account itself)
+        :type recipient_pub_key: str or None
+        :return: Fulfilled CREATE transaction
+        :rtype: dict
+        """
+        if self.signer is not None:
+            return self.signer.submit(signing.sign_creation, self.public_key, self.private_key, asset, metadata,
+                                      recipient_pub_key).result()
+        return signing.prepare_creation(bdb_connection.transactions, self.public_key, self.private_key, asset,
+                                        metadata, recipient_pub_key)
+
+    def _prepare_transfer(self, bdb_connection: BigchainDB, recipient_pub_key: str, tx: dict,
+                          metadata: dict = None) -> dict:
+        """
+        Prepare and sign a new TRANSFER transaction without sending it
+
+        :param bdb_connection: Connection object for BigchainDB
+        :type bdb_connection: BigchainDB
+        :param recipient_pub_key: Public key of the recipient
+        :type recipient_pub_key: str
+        :param tx: Transaction which should be transferd
+        :type tx: dict
+        :param metadata: Dictionary with additional metadata
+        :type metadata: dict or None
+        :return: Fulfilled TRANSFER transaction
+        :rtype: dict
+        """
+        if self.signer is not None:
+            return self.signer.submit(signing.sign_transfer, self.private_key, recipient_pub_key, tx,
+                                      metadata).result()
+        return signing.prepare_transfer(bdb_connection.transactions, self.private_key, recipient_pub_key, tx,
+                                        metadata)
+
+    def _create_asset(self, bdb_connection: BigchainDB, asset: dict, metadata: dict = None,
+                      recipient_pub_key: str = None) -> dict:
         """
         Create and transfer new CREATE transaction
 
@@ -51,18 +171,12 @@ class BaseAccount(object):
         :type asset: dict
         :param metadata: Dictonary with additional metadata
         :type metadata: dict or None
+        :param recipient_pub_key: Public key of the owner of the output (default: the account itself)
+        :type recipient_pub_key: str or None
         :return: Result with created CREATE transactions
         :rtype: dict
         """
-        if metadata is None:
-            metadata = {}
-        metadata['timestamp'] = datetime.utcnow().timestamp()
-        prepared_creation_tx = bdb_connection.transactions.prepare(operation='CREATE',
-                                                                   signers=self.public_key,
-                                                                   asset=asset,
-                                                                   metadata=metadata)
-        fulfilled_creation_tx = bdb_connection.transactions.fulfill(prepared_creation_tx,
-                                                                    private_keys=self.private_key)
+        fulfilled_creation_tx = self._prepare_creation(bdb_connection, asset, metadata, recipient_pub_key)
         sent_creation_tx = bdb_connection.transactions.send(fulfilled_creation_tx)
         if fulfilled_creation_tx != sent_creation_tx:
             raise exceptions.CreateRecordException()
@@ -84,36 +198,245 @@ class BaseAccount(object):
         :return: Result with created CREATE transactions
         :rtype: dict
         """
-        if metadata is None:
-            metadata = {}
-        metadata['timestamp'] = datetime.utcnow().timestamp()
-        transfer_asset = {'id': tx['id']}
-        output_index = 0
-        output = tx['outputs'][output_index]
-        transfer_input = {
-            'fulfillment': output['condition']['details'],
-            'fulfills': {
-                'output_index': output_index,
-                'transaction_id': tx['id']
-            },
-            'owners_before': output['public_keys']
-        }
-        prepared_transfer_tx = bdb_connection.transactions.prepare(
-            operation='TRANSFER',
-            asset=transfer_asset,
-            metadata=metadata,
-            inputs=transfer_input,
-            recipients=recipient_pub_key
-        )
-        fulfilled_transfer_tx = bdb_connection.transactions.fulfill(
-            prepared_transfer_tx,
-            private_keys=self.private_key,
-        )
+        fulfilled_transfer_tx = self._prepare_transfer(bdb_connection, recipient_pub_key, tx, metadata)
         sent_transfer_tx = bdb_connection.transactions.send(fulfilled_transfer_tx)
         if fulfilled_transfer_tx != sent_transfer_tx:
             raise exceptions.CreateRecordException()
         return sent_transfer_tx
 
+    def _wait_until_valid(self, tx_id: str, bdb_connection: BigchainDB):
+        """
+        Waits until a transaction is valid, using the shared tracker if available.
+        Both ways give up after their default timeout.
+
+        :param tx_id: Id of transaction to wait on
+        :type tx_id: str
+        :param bdb_connection: Connection object for BigchainDB
+        :type bdb_connection: BigchainDB
+        """
+        if self.tracker is not None:
+            self.tracker.wait(tx_id)
+        else:
+            utils.wait_until_valid(tx_id, bdb_connection)
+
+    def _compile_asset(self, bdb_connection: BigchainDB, asset: dict, metadata: dict,
+                       recipient_pub_key: str) -> list:
+        """
+        Prepares and signs all transactions of a record without sending them.
+        The TRANSFER spends the CREATE by its id, which is known after signing.
+
+        :param bdb_connection: Connection object for BigchainDB
+        :type bdb_connection: BigchainDB
+        :param asset: Dictonary with asset data
+        :type asset: dict
+        :param metadata: Dictionary with additional metadata
+        :type metadata: dict
+        :param recipient_pub_key: Public key of the recipient
+        :type recipient_pub_key: str
+        :return: CREATE and TRANSFER transaction (only CREATE in single transaction mode)
+        :rtype: list
+        """
+        if self.signer is not None:
+            return self.signer.submit(signing.sign_record, self.public_key, self.private_key, asset, metadata,
+                                      recipient_pub_key, self.single_tx).result()
+        if self.single_tx:
+            return [self._prepare_creation(bdb_connection, asset, metadata, recipient_pub_key)]
+        creation_tx = self._prepare_creation(bdb_connection, asset, metadata)
+        transfer_tx = self._prepare_transfer(bdb_connection, recipient_pub_key, creation_tx, dict(metadata))
+        return [creation_tx, transfer_tx]
+
+    def _store_asset(self, bdb_connection: BigchainDB, asset: dict, metadata: dict,
+                     recipient_pub_key: str) -> dict:
+        """
+        Store asset by a CREATE transaction and transfer it to the recipient
+
+        In pipelined mode the TRANSFER is signed right after the CREATE and sent without waiting
+        for the CREATE to become valid. Only the TRANSFER is awaited.
+        In single transaction mode the record is stored by one CREATE owned by the recipient.
+        With a bundle, the transactions are only signed and written into the bundle.
+
+        :param bdb_connection: Connection object for BigchainDB
+        :type bdb_connection: BigchainDB
+        :param asset: Dictonary with asset data
+        :type asset: dict
+        :param metadata: Dictionary with additional metadata
+        :type metadata: dict
+        :param recipient_pub_key: Public key of the recipient
+        :type recipient_pub_key: str
+        :return: Result with created TRANSFER transaction (CREATE in single transaction mode)
+        :rtype: dict
+        """
+        if self.bundle is not None:
+            txs = self._compile_asset(bdb_connection, asset, metadata, recipient_pub_key)
+            self.bundle.write(txs)
+            return txs[-1]
+
+        if self.single_tx:
+            return self._create_asset(bdb_connection, asset, metadata, recipient_pub_key)
+
+        if not self.pipelined:
+            tx = self._create_asset(bdb_connection, asset, metadata)
+            self._wait_until_valid(tx['id'], bdb_connection)
+            return self._transfer_asset(bdb_connection, recipient_pub_key, tx, metadata)
+
+        creation_tx, transfer_tx = self._compile_asset(bdb_connection, asset, metadata, recipient_pub_key)
+        if bdb_connection.transactions.send(creation_tx) != creation_tx:
+            raise exceptions.CreateRecordException()
+        if utils.send_until_accepted(transfer_tx, bdb_connection) != transfer_tx:
+            raise exceptions.CreateRecordException()
+        self._wait_until_valid(transfer_tx['id'], bdb_connection)
+        return transfer_tx
+
+    def _asset_hash(self, asset: dict, recipient_pub_key: str) -> str:
+        """
+        Returns the content hash of an asset if deduplication is enabled. Compiled bundles are not
+        deduplicated, because their transactions are not sent yet.
+
+        :param asset: Dictonary with asset data
+        :type asset: dict
+        :param recipient_pub_key: Public key of the recipient
+        :type recipient_pub_key: str
+        :return: Content hash or None
+        :rtype: str or None
+        """
+        if not self.deduplicate or self.bundle is not None:
+            return None
+        return utils.asset_hash(asset, self.public_key, recipient_pub_key, self.single_tx)
+
+    def _save_asset(self, bdb_connection: BigchainDB, asset: dict, metadata: dict, recipient_pub_key: str) -> str:
+        """
+        Stores an asset like _store_asset. With deduplication an asset which was already stored by this
+        account for the same recipient is not stored again. With a journal the transactions are signed once,
+        recorded and sent as journal steps, see _plan_asset.
+
+        :param bdb_connection: Connection object for BigchainDB
+        :type bdb_connection: BigchainDB
+        :param asset: Dictonary with asset data
+        :type asset: dict
+        :param metadata: Dictionary with additional metadata
+        :type metadata: dict
+        :param recipient_pub_key: Public key of the recipient
+        :type recipient_pub_key: str
+        :return: Transaction id of the TRANSFER (CREATE in single transaction mode)
+        :rtype: str
+        """
+        content_hash = self._asset_hash(asset, recipient_pub_key)
+        if content_hash is not None:
+            tx_id = self.store.get_asset_tx_id(content_hash)
+            if tx_id is not None:
+                log.debug("Asset of %s already stored: %s", self.account_id, tx_id)
+                return tx_id
+        step = self._journal_step(asset, recipient_pub_key)
+        if step is not None:
+            txs, state = self._plan_asset(bdb_connection, step, asset, metadata, recipient_pub_key)
+            tx_id = self._send_planned(bdb_connection, step, txs, state)['id']
+        else:
+            tx_id = self._store_asset(bdb_connection, asset, metadata, recipient_pub_key)['id']
+        if content_hash is not None:
+            # only a valid transaction may be returned for the asset later
+            if not self._is_confirmed(step):
+                self._wait_until_valid(tx_id, bdb_connection)
+            self.store.write_asset_hash(content_hash, tx_id)
+        return tx_id
+
+    def _is_confirmed(self, step: str) -> bool:
+        """
+        Checks if the transaction returned by _store_asset or a journal step is known to be valid already
+
+        :param step: Id of the journal step or None without journal
+        :type step: str or None
+        :return: True if the transaction was awaited
+        :rtype: bool
+        """
+        return step is not None or (self.pipelined and not self.single_tx)
+
+    def _journal_step(self, asset: dict, recipient_pub_key: str) -> str:
+        """
+        Returns the id of the journal step storing an asset if a journal is used. Compiled bundles
+        are not journaled.
+
+        :param asset: Dictonary with asset data
+        :type asset: dict
+        :param recipient_pub_key: Public key of the recipient
+        :type recipient_pub_key: str
+        :return: Step id or None
+        :rtype: str or None
+        """
+        if self.journal_id is None or self.bundle is not None:
+            return None
+        return utils.asset_hash(asset, self.public_key, recipient_pub_key, self.single_tx)
+
+    def _plan_asset(self, bdb_connection: BigchainDB, step: str, asset: dict, metadata: dict,
+                    recipient_pub_key: str) -> (list, str):
+        """
+        Returns the transactions of a journal step. A new step is signed and recorded before anything is sent,
+        a recorded step returns the transactions signed before.
+
+        :param bdb_connection: Connection object for BigchainDB
+        :type bdb_connection: BigchainDB
+        :param step: Id of the step
+        :type step: str
+        :param asset: Dictonary with asset data
+        :type asset: dict
+        :param metadata: Dictionary with additional metadata
+        :type metadata: dict
+        :param recipient_pub_key: Public key of the recipient
+        :type recipient_pub_key: str
+        :return: Fulfilled transactions and state of the step
+        :rtype: (list, str)
+        """
+        entry = self.store.get_journal_step(self.journal_id, step)
+        if entry is not None:
+            log.debug("Resume step %s of %s: %s", step, self.account_id, entry[1])
+            return entry
+        txs = self._compile_asset(bdb_connection, asset, metadata, recipient_pub_key)
+        self.store.write_journal_step(self.journal_id, step, txs)
+        # a concurrent save of the same asset may have recorded its step first
+        return self.store.get_journal_step(self.journal_id, step)
+
+    def _send_planned(self, bdb_connection: BigchainDB, step: str, txs: list, state: str) -> dict:
+        """
+        Sends the transactions of a journal step, which are not known by BigchainDB yet, and waits until
+        the last one is valid. The state of the step is updated on the way.
+
+        :param bdb_connection: Connection object for BigchainDB
+        :type bdb_connection: BigchainDB
+        :param step: Id of the step
+        :type step: str
+        :param txs: Fulfilled CREATE and TRANSFER (only CREATE in single transaction mode)
+        :type txs: list
+        :param state: planned, sent or valid
+        :type state: str
+        :return: Last transaction of the step
+        :rtype: dict
+        """
+        if state == 'valid':
+            return txs[-1]
+        if state == 'planned':
+            self.store.write_journal_state(self.journal_id, step, 'sent')
+        for index, tx in enumerate(txs):
+            if state == 'sent' and utils.is_known_tx(tx['id'], bdb_connection):
+                continue
+            if index > 0 and not self.pipelined:
+                self._wait_until_valid(txs[index - 1]['id'], bdb_connection)
+            if utils.send_until_accepted(tx, bdb_connection) != tx:
+                raise exceptions.CreateRecordException(tx['id'])
+        self._wait_until_valid(txs[-1]['id'], bdb_connection)
+        self.store.write_journal_state(self.journal_id, step, 'valid')
+        return txs[-1]
+
+    def _index_records(self, tx_id: str, records: list):
+        """
+        Writes the records stored in a transaction into the local index of the store
+
+        :param tx_id: Transaction id
+        :type tx_id: str
+        :param records: PROV records of the asset
+        :type records: list
+        """
+        record_ids, relations = utils.index_records(records)
+        self.store.write_index(tx_id, record_ids, relations)
+
     def get_id(self) -> str:
         """
         Get Account id
@@ -138,7 +461,7 @@ class DocumentConceptAccount(BaseAccount):
     BigchainDB Document Concept Account
     """
 
-    def __init__(self, account_id: str, store: local_stores.SqliteStore):
+    def __init__(self, account_id: str, store: local_stores.SqliteStore, **kwargs):
         """
         Instantiate Document Concept Account object
 
@@ -146,8 +469,10 @@ class DocumentConceptAccount(BaseAccount):
         :type account_id: str
         :param store: Local database object
         :type store: local_stores.SqliteStore
+        :param kwargs: Options of BaseAccount (pipelined, tracker, single_tx, bundle, signer, keypair_pool)
+        :type kwargs: dict
         """
-        super().__init__(account_id, store)
+        super().__init__(account_id, store, **kwargs)
 
     def save_asset(self, asset: dict, bdb_connection: BigchainDB) -> str:
         """
@@ -162,11 +487,89 @@ class DocumentConceptAccount(BaseAccount):
         """
         asset = {'data': asset}
         metadata = {'account_id': self.account_id}
-        tx = self._create_asset(bdb_connection, asset, metadata)
-        utils.wait_until_valid(tx['id'], bdb_connection)
-        tx = self._transfer_asset(bdb_connection, self.public_key, tx, metadata)
-        log.info("Created document: %s - %s", self.account_id, tx['id'])
-        return tx['id']
+        tx_id = self._save_asset(bdb_connection, asset, metadata, self.public_key)
+        log.info("Created document: %s - %s", self.account_id, tx_id)
+        return tx_id
+
+
+class ManifestAccount(BaseAccount):
+    """
+    BigchainDB Manifest Account, which stores the transaction ids of a document, so the document can be
+    retrieved by the single id of its root manifest
+    """
+
+    def __init__(self, account_id: str, store: local_stores.SqliteStore, **kwargs):
+        """
+        Instantiate Manifest Account object
+
+        :param account_id: Internal id of Account
+        :type account_id: str
+        :param store: Local database object
+        :type store: local_stores.SqliteStore
+        :param kwargs: Options of BaseAccount (pipelined, tracker, single_tx, bundle, signer, keypair_pool)
+        :type kwargs: dict
+        """
+        super().__init__(account_id, store, **kwargs)
+
+    @staticmethod
+    def _chunk_manifests(key: str, tx_ids: list, chunk_size: int) -> list:
+        """
+        Splits transaction ids into manifests
+
+        :param key: tx_ids for ids of records, manifests for ids of manifests
+        :type key: str
+        :param tx_ids: Transaction ids
+        :type tx_ids: list
+        :param chunk_size: Maximum number of ids in one manifest
+        :type chunk_size: int
+        :return: Manifests
+        :rtype: list
+        """
+        return [{key: tx_ids[i:i + chunk_size]} for i in range(0, len(tx_ids), chunk_size)] or [{key: []}]
+
+    def _save_manifests(self, manifests: list, bdb_connection: BigchainDB) -> list:
+        """
+        Writes manifest assets and waits until they are valid
+
+        :param manifests: Manifests, each with either tx_ids of records or manifests of the next level
+        :type manifests: list
+        :param bdb_connection: Connection object for BigchainDB
+        :type bdb_connection: BigchainDB
+        :return: Transaction ids of the manifests
+        :rtype: list
+        """
+        metadata = {'account_id': self.account_id}
+        tx_ids = [self._save_asset(bdb_connection, {'data': {'manifest': manifest}}, dict(metadata), self.public_key)
+                  for manifest in manifests]
+        if self.bundle is None and self.single_tx:
+            for tx_id in tx_ids:
+                self._wait_until_valid(tx_id, bdb_connection)
+        return tx_ids
+
+    def save_manifest(self, tx_ids: list, bdb_connection: BigchainDB, chunk_size: int = 1000) -> str:
+        """
+        Write the transaction ids of a document into manifest assets.
+        Up to chunk_size ids are listed by the root manifest itself. Longer lists are split into chunk manifests,
+        which are listed by the root manifest, or by further levels for very long lists.
+
+        :param tx_ids: Transaction ids of the document
+        :type tx_ids: list
+        :param bdb_connection: Connection object for BigchainDB
+        :type bdb_connection: BigchainDB
+        :param chunk_size: Maximum number of ids in one manifest
+        :type chunk_size: int
+        :return: Transaction id of the root manifest
+        :rtype: str
+        """
+        assert chunk_size > 1
+        tx_ids = list(tx_ids)
+        manifests = self._chunk_manifests('tx_ids', tx_ids, chunk_size)
+        while len(manifests) > 1:
+            manifests = self._chunk_manifests('manifests', self._save_manifests(manifests, bdb_connection), chunk_size)
+        root = dict(manifests[0], count=len(tx_ids))
+        root_id = self._save_manifests([root], bdb_connection)[0]
+        log.info("Created manifest of %s Tx: %s - %s", len(tx_ids), self.account_id, root_id)
+        return root_id
 
 
 class GraphConceptAccount(BaseAccount):
@@ -175,7 +578,8 @@ class GraphConceptAccount(BaseAccount):
     """
 
     def __init__(self, prov_element: ProvElement, prov_relations: dict, id_mapping: dict, namespaces: list,
-                 store: local_stores.SqliteStore = local_stores.SqliteStore()):
+                 store: local_stores.SqliteStore = local_stores.SqliteStore(), known_accounts: dict = None,
+                 **kwargs):
         """
         Instantiate Graph Concept Account object
 
@@ -187,6 +591,11 @@ class GraphConceptAccount(BaseAccount):
         :type namespaces: list
         :param store: Local database object
         :type store: local_stores.SqliteStore
+        :param known_accounts: Accounts of the document by account_id, shared by all its accounts and updated
+                               when an instance is saved (default: query the store)
+        :type known_accounts: dict
+        :param kwargs: Options of BaseAccount (pipelined, tracker, single_tx, bundle, signer, account, keypair_pool)
+        :type kwargs: dict
         """
         assert prov_element is not None
         assert prov_relations is not None
@@ -196,7 +605,8 @@ class GraphConceptAccount(BaseAccount):
         self.prov_relations_with_id = prov_relations['with_id']
         self.id_mapping = id_mapping
         self.prov_relations_without_id = prov_relations['without_id']
-        super().__init__(str(prov_element.identifier), store)
+        self.known_accounts = known_accounts if known_accounts is not None else {}
+        super().__init__(str(prov_element.identifier), store, **kwargs)
 
     def get_tx_id(self) -> str:
         """
@@ -240,6 +650,20 @@ class GraphConceptAccount(BaseAccount):
         doc.add_record(self.prov_element)
         return doc
 
+    def _get_known_account(self, account_id: str) -> tuple:
+        """
+        Returns an account of the document without a query, other accounts from the store
+
+        :param account_id: Id of account
+        :type account_id: str
+        :return: Tuple with account_id, public_key, private_key and tx_id
+        :rtype: tuple
+        """
+        account = self.known_accounts.get(account_id)
+        if account is None:
+            account = self.store.get_account(account_id)
+        return account
+
     def __create_relation(self, relation) -> (ProvDocument, dict):
         """
         Returns a ProvDocument and mapping for all relations
@@ -251,8 +675,11 @@ class GraphConceptAccount(BaseAccount):
         mapping = {}
         for relation_type, relation_attr in relation.formal_attributes:
             if relation_attr:
+                if str(relation_attr) not in self.known_accounts and str(relation_attr) in self.id_mapping:
+                    mapping[str(relation_attr)] = self.id_mapping[str(relation_attr)]
+                    continue
                 try:
-                    recipient = self.store.get_account(str(relation_attr))
+                    recipient = self._get_known_account(str(relation_attr))
                     mapping[recipient[0]] = recipient[3]
                 except exceptions.NoAccountFoundException:
                     try:
@@ -266,6 +693,88 @@ class GraphConceptAccount(BaseAccount):
         doc.add_record(relation)
         return doc, mapping
 
+    def _instance_asset(self) -> (dict, dict):
+        """
+        Builds the asset describing the account
+
+        :return: Asset and metadata
+        :rtype: (dict, dict)
+        """
+        prov_document = self.__create_instance_document()
+        asset = {'data': {'prov': prov_document.serialize(format='json')}}
+        metadata = {'instance': self.account_id}
+        return asset, metadata
+
+    def _on_instance_saved(self, tx_id: str):
+        """
+        Registers the transaction describing the account
+
+        :param tx_id: Transaction id of instance
+        :type tx_id: str
+        """
+        with self.store.batch():
+            self.store.write_tx_id(self.account_id, tx_id)
+            self._index_records(tx_id, [self.prov_element])
+        self.known_accounts[self.account_id] = (self.account_id, self.public_key, self.private_key, tx_id)
+        self.tx_id = tx_id
+        log.debug("Created instance: %s - %s", self.account_id, tx_id)
+
+    def _relation_assets(self, relation) -> list:
+        """
+        Builds the assets of an outgoing relation
+
+        :param relation: Relation which should be written
+        :type relation: ProvRelation
+        :return: List of tuples(record, asset, metadata, recipient account)
+        :rtype: list
+        """
+        assets = []
+        doc, mapping = self.__create_relation(relation)
+        for record in doc.get_records():
+            recipient = self._get_known_account(str(record.args[1]))
+            asset = {'data': {'prov': doc.serialize(format='json'), 'map': mapping}}
+            metadata = {'relation': '->'.join([self.account_id, recipient[0]])}
+            assets.append((record, asset, metadata, recipient))
+        return assets
+
+    def _on_relation_saved(self, record, recipient: tuple, tx_id: str):
+        """
+        Registers the transaction of a saved relation
+
+        :param record: Saved relation
+        :type record: ProvRelation
+        :param recipient: Account of the recipient
+        :type recipient: tuple
+        :param tx_id: Transaction id of the relation
+        :type tx_id: str
+        """
+        self._index_records(tx_id, [record])
+        if record.identifier:
+            self.id_mapping[str(record.identifier)] = tx_id
+            log.debug("Created relation %s: %s -> %s - %s", record.identifier, self.account_id, recipient[0], tx_id)
+        else:
+            log.debug("Created relation: %s -> %s - %s", self.account_id, recipient[0], tx_id)
+
+    def save_relation(self, relation, bdb_connection: BigchainDB) -> list:
+        """
+        Writes a single outgoing relation of the account to BigchainDB
+
+        :param relation: Relation which should be written
+        :type relation: ProvRelation
+        :param bdb_connection: Connection object for BigchainDB
+        :type bdb_connection: BigchainDB
+        :return: Transactions ids of the relation
+        :rtype: list
+        """
+        if self.tx_id == '':
+            raise exceptions.AccountNotCreatedException("Account must be created before transactions")
+        tx_list = []
+        for record, asset, metadata, recipient in self._relation_assets(relation):
+            tx_id = self._save_asset(bdb_connection, asset, metadata, recipient[1])
+            tx_list.append(tx_id)
+            self._on_relation_saved(record, recipient, tx_id)
+        return tx_list
+
     def save_relations_with_ids(self, bdb_connection: BigchainDB) -> list:
         """
         Writes all assets with relations (having ids) to BigchainDB
@@ -279,19 +788,7 @@ class GraphConceptAccount(BaseAccount):
             raise exceptions.AccountNotCreatedException("Account must be created before transactions")
         tx_list = []
         for relation in self.prov_relations_with_id:
-            doc, mapping = self.__create_relation(relation)
-            for record in doc.get_records():
-                recipient = self.store.get_account(str(record.args[1]))
-                asset = {'data': {'prov': doc.serialize(format='json'), 'map': mapping}}
-                metadata = {'relation': '->'.join([self.account_id, recipient[0]])}
-                tx = self._create_asset(bdb_connection, asset, metadata)
-                utils.wait_until_valid(tx['id'], bdb_connection)
-                metadata = {'relation': '->'.join([self.account_id, recipient[0]])}
-                tx = self._transfer_asset(bdb_connection, recipient[1], tx, metadata)
-                tx_list.append(tx['id'])
-                self.id_mapping[str(record.identifier)] = tx['id']
-                log.debug("Created relation %s: %s -> %s - %s", record.identifier, self.account_id, recipient[0],
-                          tx['id'])
+            tx_list += self.save_relation(relation, bdb_connection)
         return tx_list
 
     def save_relations_without_ids(self, bdb_connection: BigchainDB) -> list:
@@ -307,17 +804,7 @@ class GraphConceptAccount(BaseAccount):
             raise exceptions.AccountNotCreatedException("Account must be created before transactions")
         tx_list = []
         for relation in self.prov_relations_without_id:
-            doc, mapping = self.__create_relation(relation)
-            for records in doc.get_records():
-                recipient = self.store.get_account(str(records.args[1]))
-                asset = {'data': {'prov': doc.serialize(format='json'), 'map': mapping}}
-                metadata = {'relation': '->'.join([self.account_id, recipient[0]])}
-                tx = self._create_asset(bdb_connection, asset, metadata)
-                utils.wait_until_valid(tx['id'], bdb_connection)
-                metadata = {'relation': '->'.join([self.account_id, recipient[0]])}
-                tx = self._transfer_asset(bdb_connection, recipient[1], tx, metadata)
-                tx_list.append(tx['id'])
-                log.debug("Created relation: %s -> %s - %s", self.account_id, recipient[0], tx['id'])
+            tx_list += self.save_relation(relation, bdb_connection)
         return tx_list
 
     def save_instance_asset(self, bdb_connection: BigchainDB) -> str:
@@ -330,15 +817,8 @@ class GraphConceptAccount(BaseAccount):
         :rtype: str
         """
         if self.tx_id == '':
-            prov_document = self.__create_instance_document()
-            asset = {'data': {'prov': prov_document.serialize(format='json')}}
-            metadata = {'instance': self.account_id}
-            tx = self._create_asset(bdb_connection, asset, metadata)
-            utils.wait_until_valid(tx['id'], bdb_connection)
-            tx = self._transfer_asset(bdb_connection, self.public_key, tx, metadata)
-            self.store.write_tx_id(self.account_id, tx['id'])
-            self.tx_id = tx['id']
-            log.debug("Created instance: %s - %s", self.account_id, tx['id'])
+            asset, metadata = self._instance_asset()
+            self._on_instance_saved(self._save_asset(bdb_connection, asset, metadata, self.public_key))
         return self.tx_id
 
 
@@ -348,7 +828,7 @@ class RoleConceptAccount(BaseAccount):
     """
 
     def __init__(self, agent: ProvAgent, relations: list, elements: dict, id_mapping: dict, namespaces: list,
-                 store: local_stores.SqliteStore = local_stores.SqliteStore()):
+                 store: local_stores.SqliteStore = local_stores.SqliteStore(), **kwargs):
         """
         Instantiate Graph Concept Account object
 
@@ -358,6 +838,8 @@ class RoleConceptAccount(BaseAccount):
         :type namespaces: list
         :param store: Local database object
         :type store: local_stores.SqliteStore
+        :param kwargs: Options of BaseAccount (pipelined, tracker, single_tx, bundle, signer, keypair_pool)
+        :type kwargs: dict
         """
         assert agent is not None
         assert elements is not None
@@ -368,7 +850,7 @@ class RoleConceptAccount(BaseAccount):
         self.prov_elements = elements
         self.id_mapping = id_mapping
 
-        super().__init__(str(agent.identifier), store)
+        super().__init__(str(agent.identifier), store, **kwargs)
 
     def get_tx_id(self) -> str:
         """
@@ -399,6 +881,93 @@ class RoleConceptAccount(BaseAccount):
             doc.add_record(relation)
         return doc, mapping
 
+    def _instance_asset(self) -> (dict, dict):
+        """
+        Builds the asset describing the agent
+
+        :return: Asset and metadata
+        :rtype: (dict, dict)
+        """
+        prov_document, mapping = self.__create_document(self.prov_agent, self.prov_agent_relations)
+        asset = {'data': {'prov': prov_document.serialize(format='json'), 'map': mapping}}
+        metadata = {'instance': self.account_id}
+        return asset, metadata
+
+    def _on_instance_saved(self, tx_id: str):
+        """
+        Registers the transaction describing the agent
+
+        :param tx_id: Transaction id of agent
+        :type tx_id: str
+        """
+        with self.store.batch():
+            self.store.write_tx_id(self.account_id, tx_id)
+            self._index_records(tx_id, [self.prov_agent] + list(self.prov_agent_relations))
+        self.id_mapping[self.account_id] = tx_id
+        self.tx_id = tx_id
+        log.debug("Created agent: %s - %s", self.account_id, tx_id)
+
+    def _element_asset(self, element: ProvElement, relations: list) -> (dict, dict):
+        """
+        Builds the asset of an element with its relations
+
+        :param element: Element related to the account
+        :type element: ProvElement
+        :param relations: Outgoing relations of the element
+        :type relations: list
+        :return: Asset and metadata
+        :rtype: (dict, dict)
+        """
+        doc, mapping = self.__create_document(element, relations)
+        asset = {'data': {'prov': doc.serialize(format='json'), 'map': mapping}}
+        metadata = {'instance': self.account_id}
+        return asset, metadata
+
+    def _on_element_saved(self, element: ProvElement, relations: list, tx_id: str):
+        """
+        Registers the transaction of a saved element
+
+        :param element: Saved element
+        :type element: ProvElement
+        :param relations: Saved relations of the element
+        :type relations: list
+        :param tx_id: Transaction id of element
+        :type tx_id: str
+        """
+        element_id = str(element.identifier)
+        with self.store.batch():
+            # a deduplicated or resumed element may be saved again
+            if (self.deduplicate or self.journal_id is not None) and self.store.get_accounts([element_id]):
+                self.store.write_tx_id(element_id, tx_id)
+            else:
+                self.store.write_account(element_id, '', '', tx_id)
+            self._index_records(tx_id, [element] + list(relations))
+        # for id, tx_id in mapping.items():
+        #    if not tx_id:
+        #        self.id_mapping[id] = tx['id']
+        # self.id_mapping[str(element.identifier)] = tx['id']
+        log.debug("Created element %s related to %s - %s", element.identifier, self.account_id, tx_id)
+
+    def save_element(self, element: ProvElement, relations: list, bdb_connection: BigchainDB) -> str:
+        """
+        Writes a single element with its relations to BigchainDB
+
+        :param element: Element related to the account
+        :type element: ProvElement
+        :param relations: Outgoing relations of the element
+        :type relations: list
+        :param bdb_connection: Connection object for BigchainDB
+        :type bdb_connection: BigchainDB
+        :return: Transaction id of element
+        :rtype: str
+        """
+        if self.tx_id == '':
+            raise exceptions.AccountNotCreatedException("Account must be created before transactions")
+        asset, metadata = self._element_asset(element, relations)
+        tx_id = self._save_asset(bdb_connection, asset, metadata, self.public_key)
+        self._on_element_saved(element, relations, tx_id)
+        return tx_id
+
     def save_elements(self, bdb_connection: BigchainDB) -> list:
         """
         Writes all elements with assets to BigchainDB
@@ -413,19 +982,7 @@ class RoleConceptAccount(BaseAccount):
         tx_list = []
         for ordered_element in self.prov_elements.values():
             for element, relations in ordered_element.items():
-                doc, mapping = self.__create_document(element, relations)
-                asset = {'data': {'prov': doc.serialize(format='json'), 'map': mapping}}
-                metadata = {'instance': self.account_id}
-                tx = self._create_asset(bdb_connection, asset, metadata)
-                utils.wait_until_valid(tx['id'], bdb_connection)
-                tx = self._transfer_asset(bdb_connection, self.public_key, tx, metadata)
-                self.store.write_account(str(element.identifier), '', '', tx['id'])
-                tx_list.append(tx['id'])
-                # for id, tx_id in mapping.items():
-                #    if not tx_id:
-                #        self.id_mapping[id] = tx['id']
-                # self.id_mapping[str(element.identifier)] = tx['id']
-                log.debug("Created element %s related to %s - %s", element.identifier, self.account_id, tx['id'])
+                tx_list.append(self.save_element(element, relations, bdb_connection))
         return tx_list
 
     def save_instance_asset(self, bdb_connection: BigchainDB) -> str:
@@ -438,14 +995,6 @@ class RoleConceptAccount(BaseAccount):
         :rtype: str
         """
         if self.tx_id == '':
-            prov_document, mapping = self.__create_document(self.prov_agent, self.prov_agent_relations)
-            asset = {'data': {'prov': prov_document.serialize(format='json'), 'map': mapping}}
-            metadata = {'instance': self.account_id}
-            tx = self._create_asset(bdb_connection, asset, metadata)
-            utils.wait_until_valid(tx['id'], bdb_connection)
-            tx = self._transfer_asset(bdb_connection, self.public_key, tx, metadata)
-            self.store.write_tx_id(self.account_id, tx['id'])
-            self.id_mapping[self.account_id] = tx['id']
-            self.tx_id = tx['id']
-            log.debug("Created agent: %s - %s", self.account_id, tx['id'])
+            asset, metadata = self._instance_asset()
+            self._on_instance_saved(self._save_asset(bdb_connection, asset, metadata, self.public_key))
         return self.tx_id
@@ -0,0 +1,332 @@
+import logging
+
+from prov.model import ProvElement
+
+from prov2bigchaindb.core import accounts, async_utils, exceptions
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class AsyncAccountMixin(object):
+    """
+    Awaitable transaction submission for accounts
+    """
+
+    async def _store_asset(self, connection: async_utils.AsyncBigchainDB, asset: dict, metadata: dict,
+                           recipient_pub_key: str) -> dict:
+        """
+        Store asset by a CREATE transaction and transfer it to the recipient without blocking the event loop
+
+        :param connection: Connection object for BigchainDB
+        :type connection: AsyncBigchainDB
+        :param asset: Dictonary with asset data
+        :type asset: dict
+        :param metadata: Dictionary with additional metadata
+        :type metadata: dict
+        :param recipient_pub_key: Public key of the recipient
+        :type recipient_pub_key: str
+        :return: Result with created TRANSFER transaction (CREATE in single transaction mode)
+        :rtype: dict
+        """
+        if self.bundle is not None:
+            txs = self._compile_asset(connection, asset, metadata, recipient_pub_key)
+            self.bundle.write(txs)
+            return txs[-1]
+
+        if self.single_tx:
+            creation_tx = self._prepare_creation(connection, asset, metadata, recipient_pub_key)
+            if await connection.transactions.send(creation_tx) != creation_tx:
+                raise exceptions.CreateRecordException()
+            return creation_tx
+
+        if self.pipelined:
+            creation_tx, transfer_tx = self._compile_asset(connection, asset, metadata, recipient_pub_key)
+            if await connection.transactions.send(creation_tx) != creation_tx:
+                raise exceptions.CreateRecordException()
+            if await async_utils.send_until_accepted(transfer_tx, connection) != transfer_tx:
+                raise exceptions.CreateRecordException()
+            await async_utils.wait_until_valid(transfer_tx['id'], connection)
+            return transfer_tx
+
+        creation_tx = self._prepare_creation(connection, asset, metadata)
+        if await connection.transactions.send(creation_tx) != creation_tx:
+            raise exceptions.CreateRecordException()
+        await async_utils.wait_until_valid(creation_tx['id'], connection)
+        transfer_tx = self._prepare_transfer(connection, recipient_pub_key, creation_tx, metadata)
+        if await connection.transactions.send(transfer_tx) != transfer_tx:
+            raise exceptions.CreateRecordException()
+        return transfer_tx
+
+    async def _send_planned(self, connection: async_utils.AsyncBigchainDB, step: str, txs: list,
+                            state: str) -> dict:
+        """
+        Sends the transactions of a journal step, which are not known by BigchainDB yet, and waits until
+        the last one is valid without blocking the event loop
+
+        :param connection: Connection object for BigchainDB
+        :type connection: AsyncBigchainDB
+        :param step: Id of the step
+        :type step: str
+        :param txs: Fulfilled CREATE and TRANSFER (only CREATE in single transaction mode)
+        :type txs: list
+        :param state: planned, sent or valid
+        :type state: str
+        :return: Last transaction of the step
+        :rtype: dict
+        """
+        if state == 'valid':
+            return txs[-1]
+        if state == 'planned':
+            self.store.write_journal_state(self.journal_id, step, 'sent')
+        for index, tx in enumerate(txs):
+            if state == 'sent' and await async_utils.is_known_tx(tx['id'], connection):
+                continue
+            if index > 0 and not self.pipelined:
+                await async_utils.wait_until_valid(txs[index - 1]['id'], connection)
+            if await async_utils.send_until_accepted(tx, connection) != tx:
+                raise exceptions.CreateRecordException(tx['id'])
+        await async_utils.wait_until_valid(txs[-1]['id'], connection)
+        self.store.write_journal_state(self.journal_id, step, 'valid')
+        return txs[-1]
+
+    async def _save_asset(self, connection: async_utils.AsyncBigchainDB, asset: dict, metadata: dict,
+                          recipient_pub_key: str) -> str:
+        """
+        Stores an asset like _store_asset, unless deduplication finds the asset stored before.
+        With a journal the recorded transactions of the asset are sent.
+
+        :param connection: Connection object for BigchainDB
+        :type connection: AsyncBigchainDB
+        :param asset: Dictonary with asset data
+        :type asset: dict
+        :param metadata: Dictionary with additional metadata
+        :type metadata: dict
+        :param recipient_pub_key: Public key of the recipient
+        :type recipient_pub_key: str
+        :return: Transaction id of the TRANSFER (CREATE in single transaction mode)
+        :rtype: str
+        """
+        content_hash = self._asset_hash(asset, recipient_pub_key)
+        if content_hash is not None:
+            tx_id = self.store.get_asset_tx_id(content_hash)
+            if tx_id is not None:
+                log.debug("Asset of %s already stored: %s", self.account_id, tx_id)
+                return tx_id
+        step = self._journal_step(asset, recipient_pub_key)
+        if step is not None:
+            txs, state = self._plan_asset(connection, step, asset, metadata, recipient_pub_key)
+            tx_id = (await self._send_planned(connection, step, txs, state))['id']
+        else:
+            tx_id = (await self._store_asset(connection, asset, metadata, recipient_pub_key))['id']
+        if content_hash is not None:
+            # only a valid transaction may be returned for the asset later
+            if not self._is_confirmed(step):
+                await async_utils.wait_until_valid(tx_id, connection)
+            self.store.write_asset_hash(content_hash, tx_id)
+        return tx_id
+
+
+class AsyncDocumentConceptAccount(AsyncAccountMixin, accounts.DocumentConceptAccount):
+    """
+    BigchainDB Document Concept Account for asyncio
+    """
+
+    async def save_asset(self, asset: dict, connection: async_utils.AsyncBigchainDB) -> str:
+        """
+        Write asset to BigchainDB
+
+        :param asset: Dictonary with asset data
+        :type asset: dict
+        :param connection: Connection object for BigchainDB
+        :type connection: AsyncBigchainDB
+        :return: Transaction Id
+        :rtype: str
+        """
+        asset = {'data': asset}
+        metadata = {'account_id': self.account_id}
+        tx_id = await self._save_asset(connection, asset, metadata, self.public_key)
+        log.info("Created document: %s - %s", self.account_id, tx_id)
+        return tx_id
+
+
+class AsyncManifestAccount(AsyncAccountMixin, accounts.ManifestAccount):
+    """
+    BigchainDB Manifest Account for asyncio
+    """
+
+    async def _save_manifests(self, manifests: list, connection: async_utils.AsyncBigchainDB) -> list:
+        """
+        Writes manifest assets and waits until they are valid
+
+        :param manifests: Manifests, each with either tx_ids of records or manifests of the next level
+        :type manifests: list
+        :param connection: Connection object for BigchainDB
+        :type connection: AsyncBigchainDB
+        :return: Transaction ids of the manifests
+        :rtype: list
+        """
+        metadata = {'account_id': self.account_id}
+        tx_ids = []
+        for manifest in manifests:
+            tx_ids.append(await self._save_asset(connection, {'data': {'manifest': manifest}}, dict(metadata),
+                                                 self.public_key))
+        if self.bundle is None and self.single_tx:
+            for tx_id in tx_ids:
+                await async_utils.wait_until_valid(tx_id, connection)
+        return tx_ids
+
+    async def save_manifest(self, tx_ids: list, connection: async_utils.AsyncBigchainDB,
+                            chunk_size: int = 1000) -> str:
+        """
+        Write the transaction ids of a document into manifest assets
+
+        :param tx_ids: Transaction ids of the document
+        :type tx_ids: list
+        :param connection: Connection object for BigchainDB
+        :type connection: AsyncBigchainDB
+        :param chunk_size: Maximum number of ids in one manifest
+        :type chunk_size: int
+        :return: Transaction id of the root manifest
+        :rtype: str
+        """
+        assert chunk_size > 1
+        tx_ids = list(tx_ids)
+        manifests = self._chunk_manifests('tx_ids', tx_ids, chunk_size)
+        while len(manifests) > 1:
+            manifests = self._chunk_manifests('manifests', await self._save_manifests(manifests, connection),
+                                              chunk_size)
+        root = dict(manifests[0], count=len(tx_ids))
+        root_id = (await self._save_manifests([root], connection))[0]
+        log.info("Created manifest of %s Tx: %s - %s", len(tx_ids), self.account_id, root_id)
+        return root_id
+
+
+class AsyncGraphConceptAccount(AsyncAccountMixin, accounts.GraphConceptAccount):
+    """
+    BigchainDB Graph Concept Account for asyncio
+    """
+
+    async def save_relation(self, relation, connection: async_utils.AsyncBigchainDB) -> list:
+        """
+        Writes a single outgoing relation of the account to BigchainDB
+
+        :param relation: Relation which should be written
+        :type relation: ProvRelation
+        :param connection: Connection object for BigchainDB
+        :type connection: AsyncBigchainDB
+        :return: Transactions ids of the relation
+        :rtype: list
+        """
+        if self.tx_id == '':
+            raise exceptions.AccountNotCreatedException("Account must be created before transactions")
+        tx_list = []
+        for record, asset, metadata, recipient in self._relation_assets(relation):
+            tx_id = await self._save_asset(connection, asset, metadata, recipient[1])
+            tx_list.append(tx_id)
+            self._on_relation_saved(record, recipient, tx_id)
+        return tx_list
+
+    async def save_relations_with_ids(self, connection: async_utils.AsyncBigchainDB) -> list:
+        """
+        Writes all assets with relations (having ids) to BigchainDB
+
+        :param connection: Connection object for BigchainDB
+        :type connection: AsyncBigchainDB
+        :return: Transactions ids of all relations
+        :rtype: list
+        """
+        if self.tx_id == '':
+            raise exceptions.AccountNotCreatedException("Account must be created before transactions")
+        tx_list = []
+        for relation in self.prov_relations_with_id:
+            tx_list += await self.save_relation(relation, connection)
+        return tx_list
+
+    async def save_relations_without_ids(self, connection: async_utils.AsyncBigchainDB) -> list:
+        """
+        Write all assets with relations to BigchainDB
+
+        :param connection: Connection object for BigchainDB
+        :type connection: AsyncBigchainDB
+        :return: Transactions ids of all relations
+        :rtype: list
+        """
+        if self.tx_id == '':
+            raise exceptions.AccountNotCreatedException("Account must be created before transactions")
+        tx_list = []
+        for relation in self.prov_relations_without_id:
+            tx_list += await self.save_relation(relation, connection)
+        return tx_list
+
+    async def save_instance_asset(self, connection: async_utils.AsyncBigchainDB) -> str:
+        """
+        Write provenance describing the account to BigchainDB
+
+        :param connection: Connection object for BigchainDB
+        :type connection: AsyncBigchainDB
+        :return: Transactions id of instance
+        :rtype: str
+        """
+        if self.tx_id == '':
+            asset, metadata = self._instance_asset()
+            self._on_instance_saved(await self._save_asset(connection, asset, metadata, self.public_key))
+        return self.tx_id
+
+
+class AsyncRoleConceptAccount(AsyncAccountMixin, accounts.RoleConceptAccount):
+    """
+    BigchainDB Role Concept Account for asyncio
+    """
+
+    async def save_element(self, element: ProvElement, relations: list,
+                           connection: async_utils.AsyncBigchainDB) -> str:
+        """
+        Writes a single element with its relations to BigchainDB
+
+        :param element: Element related to the account
+        :type element: ProvElement
+        :param relations: Outgoing relations of the element
+        :type relations: list
+        :param connection: Connection object for BigchainDB
+        :type connection: AsyncBigchainDB
+        :return: Transaction id of element
+        :rtype: str
+        """
+        if self.tx_id == '':
+            raise exceptions.AccountNotCreatedException("Account must be created before transactions")
+        asset, metadata = self._element_asset(element, relations)
+        tx_id = await self._save_asset(connection, asset, metadata, self.public_key)
+        self._on_element_saved(element, relations, tx_id)
+        return tx_id
+
+    async def save_elements(self, connection: async_utils.AsyncBigchainDB) -> list:
+        """
+        Writes all elements with assets to BigchainDB
+
+        :param connection: Connection object for BigchainDB
+        :type connection: AsyncBigchainDB
+        :return: Transactions ids of all elements
+        :rtype: list
+        """
+        if self.tx_id == '':
+            raise exceptions.AccountNotCreatedException("Account must be created before transactions")
+        tx_list = []
+        for ordered_element in self.prov_elements.values():
+            for element, relations in ordered_element.items():
+                tx_list.append(await self.save_element(element, relations, connection))
+        return tx_list
+
+    async def save_instance_asset(self, connection: async_utils.AsyncBigchainDB) -> str:
+        """
+        Write provenance describing the agent to BigchainDB
+
+        :param connection: Connection object for BigchainDB
+        :type connection: AsyncBigchainDB
+        :return: Transactions id of agent
+        :rtype: str
+        """
+        if self.tx_id == '':
+            asset, metadata = self._instance_asset()
+            self._on_instance_saved(await self._save_asset(connection, asset, metadata, self.public_key))
+        return self.tx_id
@@ -0,0 +1,771 @@
+import asyncio
+import copy
+import logging
+from collections import deque
+from io import BufferedReader
+from itertools import islice
+from typing import AsyncIterator
+
+import prov.model as provmodel
+from bigchaindb_driver import pool as bdpool
+
+from prov2bigchaindb.core import async_accounts, async_utils, bundles, caches, clients, exceptions, keypairs, \
+    local_stores, node_pool, utils
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class DocumentRecordIterator(object):
+    """
+    Async iterator of the records of a document, returned by iter_document of the asyncio clients.
+    The assets are retrieved concurrently, at most 2 * max_workers ahead of the consumer.
+    The blocks of each batch of 2 * max_workers transaction ids are checked at once before their assets are retrieved.
+    """
+
+    def __init__(self, client: 'AsyncClientMixin', document_tx_ids: list or str, max_workers: int):
+        """
+        Instantiate the iterator, nothing is retrieved before the first record is awaited
+
+        :param client: Asyncio client retrieving the assets
+        :type client: AsyncClientMixin
+        :param document_tx_ids: Transaction Ids of Document or transaction id of its root manifest
+        :type document_tx_ids: list or str
+        :param max_workers: Maximum number of assets retrieved concurrently
+        :type max_workers: int
+        """
+        self.client = client
+        self.document_tx_ids = document_tx_ids
+        self.max_workers = max_workers
+        self.semaphore = None
+        self.tx_ids = None
+        self.checked_tx_ids = deque()
+        self.tasks = deque()
+        self.records = deque()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> tuple:
+        try:
+            if self.tx_ids is None:
+                await self._start()
+            while not self.records:
+                if not self.tasks:
+                    raise StopAsyncIteration
+                tmp_doc = await self.tasks.popleft()
+                for tx_id in await self._next_tx_ids(1):
+                    self.tasks.append(asyncio.ensure_future(self._bounded(tx_id)))
+                namespaces = tmp_doc.get_registered_namespaces()
+                self.records.extend((namespaces, record) for record in tmp_doc.get_records())
+            return self.records.popleft()
+        except BaseException:
+            await self.aclose()
+            raise
+
+    async def aclose(self):
+        """
+        Cancels the retrievals ahead of the consumer, e.g. when it stops early
+        """
+        for task in self.tasks:
+            task.cancel()
+        self.tasks.clear()
+        self.records.clear()
+
+    async def _start(self):
+        """
+        Resolves a root manifest and starts the first retrievals
+        """
+        if isinstance(self.document_tx_ids, str):
+            self.document_tx_ids = await self.client._resolve_manifest(self.document_tx_ids, self.max_workers)
+        self.semaphore = asyncio.Semaphore(self.max_workers)
+        self.tx_ids = iter(self.document_tx_ids)
+        self.tasks.extend(asyncio.ensure_future(self._bounded(tx_id))
+                          for tx_id in await self._next_tx_ids(2 * self.max_workers))
+
+    async def _next_tx_ids(self, count: int) -> list:
+        """
+        Returns the next transaction ids, the blocks of the next batch are checked first if needed
+
+        :param count: Maximum number of transaction ids, at most 2 * max_workers
+        :type count: int
+        :return: Transaction ids
+        :rtype: list
+        """
+        if len(self.checked_tx_ids) < count:
+            batch = list(islice(self.tx_ids, 2 * self.max_workers))
+            if batch:
+                await self.client._check_blocks(batch)
+                self.checked_tx_ids.extend(batch)
+        return [self.checked_tx_ids.popleft() for _ in range(min(count, len(self.checked_tx_ids)))]
+
+    async def _bounded(self, tx_id: str) -> provmodel.ProvDocument:
+        """
+        Retrieves the provenance of an asset, at most max_workers at once
+
+        :param tx_id: Transaction id of the asset
+        :type tx_id: str
+        :return: Provenance of the asset
+        :rtype: ProvDocument
+        """
+        async with self.semaphore:
+            return await self.client._get_asset_document(tx_id)
+
+
+class AsyncClientMixin(object):
+    """
+    Replaces the blocking connection pool of a client by a non-blocking AsyncBigchainDB connection.
+    All methods doing I/O are coroutines, so many documents can be saved or retrieved concurrently
+    from a single event loop, e.g. with asyncio.gather.
+    """
+
+    manifest_account_class = async_accounts.AsyncManifestAccount
+
+    def _connect_async(self, num_connections: int, timeout: float = None, keep_alive: bool = True):
+        """
+        Sets up the non-blocking connection. Transactions are awaited by coroutines instead of
+        the threaded confirmation tracker.
+
+        :param num_connections: Maximum number of open HTTP connections
+        :type num_connections: int
+        :param timeout: Timeout of a single HTTP request in seconds (default: 30)
+        :type timeout: float
+        :param keep_alive: Keep HTTP connections open and reuse them
+        :type keep_alive: bool
+        """
+        node_pool.close(self.connections)
+        self.connections = [async_utils.AsyncBigchainDB(*self.nodes, limit=num_connections, timeout=timeout or 30,
+                                                        keep_alive=keep_alive)]
+        self.connection_pool = bdpool.Pool(self.connections)
+        self.tracker = None
+
+    async def close(self):
+        """
+        Closes all HTTP sessions of the client
+        """
+        for connection in self.connections:
+            await connection.close()
+        super().close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def test_transaction(self, tx: dict) -> bool:
+        """
+        Validate a transaction against BigchainDB. A transaction of a valid block in the block cache
+        is valid without any request.
+
+        :param tx: Transaction to test
+        :type tx: dict
+        :return: True or Exception
+        :rtype: bool
+        """
+        if self.block_cache.get_block(tx['id']) is not None:
+            return True
+        reason = None
+        if not await async_utils.is_valid_tx(tx['id'], self._get_bigchain_connection()):
+            reason = "TX is invalid"
+        elif not await async_utils.is_block_to_tx_valid(tx['id'], self._get_bigchain_connection(),
+                                                       self.block_cache):
+            reason = "Block is invalid"
+        if reason is None:
+            return True
+        log.error("Test failed: %s", tx['id'])
+        raise Exception(reason)
+
+    async def _check_blocks(self, tx_ids: list) -> dict:
+        """
+        Checks the blocks of a batch of transactions with as few block queries as possible. Their valid blocks
+        are cached, so test_transaction needs no request for these transactions.
+
+        :param tx_ids: Transaction ids
+        :type tx_ids: list
+        :return: Dictionary of transaction id to True if the block of the transaction is valid
+        :rtype: dict
+        """
+        return await async_utils.are_blocks_to_txs_valid(tx_ids, self._get_bigchain_connection(), self.block_cache)
+
+    async def compile_document(self, document: object, bundle_path: str) -> object:
+        """
+        Signs all transactions of a document without a BigchainDB node and writes them into a bundle file.
+        The local store records the accounts and transaction ids as if the document was saved.
+
+        :param document: Document to compile
+        :type document: object
+        :param bundle_path: Path of the bundle file
+        :type bundle_path: str
+        :return: Transaction ids as returned by save_document
+        :rtype: object
+        """
+        with bundles.BundleWriter(bundle_path) as writer:
+            self.bundle = writer
+            try:
+                return await self.save_document(document)
+            finally:
+                self.bundle = None
+
+    async def replay_bundle(self, bundle_path: str, max_workers: int = None) -> list:
+        """
+        Sends all transactions of a bundle file to BigchainDB and waits until they are valid.
+        All CREATEs are sent concurrently first, then all TRANSFERs.
+
+        :param bundle_path: Path of the bundle file
+        :type bundle_path: str
+        :param max_workers: Maximum number of transactions sent concurrently (default: open HTTP connections)
+        :type max_workers: int
+        :return: Transaction ids of all records in the bundle
+        :rtype: list
+        """
+        txs = bundles.read_bundle(bundle_path)
+        creations, transfers = bundles.split_bundle(txs)
+        connection = self._get_bigchain_connection()
+        semaphore = asyncio.Semaphore(max_workers or connection.limit)
+        log.info("Replay %s transactions", len(txs))
+
+        async def send(tx):
+            async with semaphore:
+                if await async_utils.send_until_accepted(tx, connection) != tx:
+                    raise exceptions.CreateRecordException(tx['id'])
+
+        async def wait(tx):
+            async with semaphore:
+                await async_utils.wait_until_valid(tx['id'], connection)
+
+        await asyncio.gather(*[send(tx) for tx in creations])
+        await asyncio.gather(*[send(tx) for tx in transfers])
+        await asyncio.gather(*[wait(tx) for tx in txs])
+        log.info("Replayed %s transactions", len(txs))
+        return bundles.record_tx_ids(txs)
+
+    async def _get_asset_tx(self, tx_id: str) -> dict:
+        """
+        Retrieves and validates the CREATE transaction holding the asset of a stored record.
+        The id is either of the TRANSFER following the CREATE or of a single CREATE.
+
+        :param tx_id: Transaction id of the record
+        :type tx_id: str
+        :return: CREATE transaction
+        :rtype: dict
+        """
+        connection = self._get_bigchain_connection()
+        tx = await connection.transactions.retrieve(tx_id)
+        await self.test_transaction(tx)
+        if 'id' in tx['asset'].keys():
+            tx = await connection.transactions.retrieve(tx['asset']['id'])
+            await self.test_transaction(tx)
+        return tx
+
+    async def _get_asset(self, tx_id: str) -> (dict, provmodel.ProvDocument):
+        """
+        Retrieves and validates the transactions of an asset and parses its provenance
+
+        :param tx_id: Transaction id of the asset
+        :type tx_id: str
+        :return: CREATE transaction and provenance of the asset
+        :rtype: (dict, ProvDocument)
+        """
+        if self.tx_cache is not None:
+            entry = self.tx_cache.get(tx_id)
+            if entry is not None and entry[1]:
+                return entry[0], entry[2]
+        tx = await self._get_asset_tx(tx_id)
+        document = utils.to_prov_document(tx['asset']['data']['prov'])
+        if self.tx_cache is not None:
+            self.tx_cache.put(tx_id, tx, document=document)
+        return tx, document
+
+    async def _get_asset_document(self, tx_id: str) -> provmodel.ProvDocument:
+        """
+        Retrieves and validates the transactions of an asset and returns its provenance
+
+        :param tx_id: Transaction id of the asset
+        :type tx_id: str
+        :return: Provenance of the asset
+        :rtype: ProvDocument
+        """
+        return (await self._get_asset(tx_id))[1]
+
+    async def _save_manifest(self, document_tx_ids: list, journal_id: str = None) -> str:
+        """
+        Writes the transaction ids of a document into manifest assets and the local index
+
+        :param document_tx_ids: Transaction Ids of Document
+        :type document_tx_ids: list
+        :param journal_id: Journal of the document (default: no journal)
+        :type journal_id: str or None
+        :return: Transaction id of the root manifest
+        :rtype: str
+        """
+        account = self.manifest_account_class('manifest', self.store,
+                                              **dict(self._account_options(journal_id), single_tx=True))
+        root_id = await account.save_manifest(document_tx_ids, self._get_bigchain_connection(),
+                                              self.manifest_chunk_size)
+        self.store.write_document(root_id, document_tx_ids)
+        return root_id
+
+    async def _get_manifest(self, tx_id: str) -> dict:
+        """
+        Retrieves and validates a manifest asset
+
+        :param tx_id: Transaction id of the manifest
+        :type tx_id: str
+        :return: Manifest with either tx_ids of records or manifests of the next level
+        :rtype: dict
+        """
+        data = (await self._get_asset_tx(tx_id))['asset']['data']
+        if 'manifest' not in data:
+            raise exceptions.NoManifestFoundException(tx_id)
+        return data['manifest']
+
+    async def _resolve_manifest(self, root_id: str, max_workers: int = None) -> list:
+        """
+        Returns the transaction ids listed by a root manifest. The manifests of each level are retrieved concurrently.
+
+        :param root_id: Transaction id of the root manifest
+        :type root_id: str
+        :param max_workers: Maximum number of manifests retrieved concurrently (default: max_workers of the client)
+        :type max_workers: int
+        :return: Transaction Ids of Document
+        :rtype: list
+        """
+        semaphore = asyncio.Semaphore(max_workers or self.max_workers)
+
+        async def bounded(tx_id):
+            async with semaphore:
+                return await self._get_manifest(tx_id)
+
+        manifests = [await self._get_manifest(root_id)]
+        while any('manifests' in manifest for manifest in manifests):
+            manifest_ids = [tx_id for manifest in manifests for tx_id in manifest.get('manifests', [])]
+            await self._check_blocks(manifest_ids)
+            manifests = await asyncio.gather(*[bounded(tx_id) for tx_id in manifest_ids])
+        document_tx_ids = [tx_id for manifest in manifests for tx_id in manifest.get('tx_ids', [])]
+        log.info("Resolved manifest %s to %s Tx", root_id, len(document_tx_ids))
+        return document_tx_ids
+
+    def _iter_documents(self, document_tx_ids: list or str, max_workers: int = None) -> AsyncIterator[tuple]:
+        """
+        Retrieves the assets concurrently and yields their records in the order of the transaction ids.
+        At most 2 * max_workers assets are retrieved ahead of the consumer.
+
+        :param document_tx_ids: Transaction Ids of Document or transaction id of its root manifest
+        :type document_tx_ids: list or str
+        :param max_workers: Maximum number of assets retrieved concurrently (default: max_workers of the client)
+        :type max_workers: int
+        :return: Async iterator of (namespaces, record) tuples
+        :rtype: AsyncIterator[tuple]
+        """
+        return DocumentRecordIterator(self, document_tx_ids, max_workers or self.max_workers)
+
+    async def _get_documents(self, document_tx_ids: list or str, max_workers: int = None) -> provmodel.ProvDocument:
+        """
+        Retrieves all assets concurrently and merges them in the order of the transaction ids
+
+        :param document_tx_ids: Transaction Ids of Document or transaction id of its root manifest
+        :type document_tx_ids: list or str
+        :param max_workers: Maximum number of assets retrieved concurrently (default: max_workers of the client)
+        :type max_workers: int
+        :return: Document as ProvDocument object
+        :rtype: ProvDocument
+        """
+        log.info("Retrieve and rebuild document...")
+        doc = provmodel.ProvDocument()
+        async for namespaces, record in self._iter_documents(document_tx_ids, max_workers):
+            for namespace in namespaces:
+                doc.add_namespace(namespace)
+            doc.add_record(record=record)
+        log.info("Success")
+        return doc
+
+
+class AsyncDocumentConceptClient(AsyncClientMixin, clients.DocumentConceptClient):
+    """"""
+
+    account_class = async_accounts.AsyncDocumentConceptAccount
+
+    def __init__(self, account_id: str = None, host: str = '0.0.0.0', port: int = 9984, num_connections: int = 1,
+                 local_store: local_stores.SqliteStore = local_stores.SqliteStore(), pipelined: bool = False,
+                 single_tx: bool = False, nodes: list = None, timeout: float = None, keep_alive: bool = True,
+                 tx_cache: caches.TransactionCache = None, keypair_pool: keypairs.KeypairPool = None,
+                 deduplicate: bool = False, journal: bool = False):
+        """
+        Instantiate asyncio Document Client object
+
+        :param host: BigchaindDB Hostname or IP (default: 0.0.0.0)
+        :type host: str
+        :param port: BigchaindDB Port (default: 9984)
+        :type port: int
+        :param num_connections: Maximum number of open HTTP connections
+        :type num_connections: int
+        :param local_store: Local database object
+        :type local_store: SqliteStore
+        :param pipelined: Send TRANSFER directly after CREATE and wait only on the TRANSFER (default: False)
+        :type pipelined: bool
+        :param single_tx: Store each record in a single CREATE owned by the final recipient instead of
+                          a CREATE followed by a TRANSFER (default: False)
+        :type single_tx: bool
+        :param nodes: URLs of all BigchainDB nodes, requests are sent round robin (default: host and port)
+        :type nodes: list
+        :param timeout: Timeout of a single HTTP request in seconds (default: no timeout, asyncio clients: 30)
+        :type timeout: float
+        :param keep_alive: Keep HTTP connections open and reuse them (default: True)
+        :type keep_alive: bool
+        :param tx_cache: Cache of retrieved transactions and documents (default: no cache)
+        :type tx_cache: TransactionCache
+        :param keypair_pool: Pool of pre-generated keypairs for new accounts (default: generate on demand)
+        :type keypair_pool: KeypairPool
+        :param deduplicate: Return the transactions of assets stored before instead of storing them again,
+                            e.g. when a document is saved again after a failure (default: False)
+        :type deduplicate: bool
+        :param journal: Record the progress of save_document in the local store, so that saving a document
+                        again after a failure sends only what is missing (default: False)
+        :type journal: bool
+        """
+        super().__init__(account_id, host, port, num_connections, local_store, pipelined, single_tx=single_tx,
+                         nodes=nodes, timeout=timeout,
+                         keep_alive=keep_alive, tx_cache=tx_cache, keypair_pool=keypair_pool, deduplicate=deduplicate,
+                         journal=journal)
+        self._connect_async(num_connections, timeout, keep_alive)
+
+    async def save_document(self, document: str or bytes or provmodel.ProvDocument) -> str:
+        """
+        Write a document into BigchainDB
+
+        :param document: Document as JSON/XML/PROVN
+        :type document: str or bytes or ProvDocument
+        :return: Transaction id of document
+        :rtype: str
+        """
+        log.info("Save document...")
+        prov_document = utils.to_prov_document(content=document)
+        asset = {'prov': prov_document.serialize(format='json')}
+        self.account.bundle = self.bundle
+        with self._journaled(prov_document) as journal_id:
+            account = self.account
+            if journal_id is not None:
+                # the account is shared by concurrent saves
+                account = copy.copy(self.account)
+                account.journal_id = journal_id
+            tx_id = await account.save_asset(asset, self._get_bigchain_connection())
+        record_ids, relations = utils.index_records(prov_document.get_records())
+        self.store.write_index(tx_id, record_ids, relations)
+        log.info("Saved document in Tx with id: %s", tx_id)
+        return tx_id
+
+    async def get_document(self, tx_id: str) -> provmodel.ProvDocument:
+        """
+        Retrieve a document by transaction id from BigchainDB
+
+        :param tx_id: Transaction Id of Document
+        :type tx_id: str
+        :return: Document as ProvDocument object
+        :rtype: ProvDocument
+        """
+        log.info("Retrieve and build document")
+        document = await self._get_asset_document(tx_id)
+        log.info("Success")
+        if self.tx_cache is not None:
+            # the cached document is shared with later reads
+            document = copy.deepcopy(document)
+        return document
+
+
+class AsyncGraphConceptClient(AsyncClientMixin, clients.GraphConceptClient):
+    """"""
+
+    account_class = async_accounts.AsyncGraphConceptAccount
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 9984, num_connections: int = 5,
+                 local_store: local_stores.SqliteStore = local_stores.SqliteStore(), pipelined: bool = False,
+                 max_workers: int = None, single_tx: bool = False, nodes: list = None,
+                 timeout: float = None, keep_alive: bool = True, tx_cache: caches.TransactionCache = None,
+                 keypair_pool: keypairs.KeypairPool = None, deduplicate: bool = False, journal: bool = False):
+        """
+        Instantiate asyncio Graph Client object
+
+        :param host: BigchaindDB Hostname or IP (default: 0.0.0.0)
+        :type host: str
+        :param port: BigchaindDB Port (default: 9984)
+        :type port: int
+        :param num_connections: Maximum number of open HTTP connections
+        :type num_connections: int
+        :param local_store: Local database object
+        :type local_store: SqliteStore
+        :param pipelined: Send TRANSFER directly after CREATE and wait only on the TRANSFER (default: False)
+        :type pipelined: bool
+        :param max_workers: Maximum number of transactions in flight per document (default: num_connections)
+        :type max_workers: int
+        :param single_tx: Store each record in a single CREATE owned by the final recipient instead of
+                          a CREATE followed by a TRANSFER (default: False)
+        :type single_tx: bool
+        :param nodes: URLs of all BigchainDB nodes, requests are sent round robin (default: host and port)
+        :type nodes: list
+        :param timeout: Timeout of a single HTTP request in seconds (default: no timeout, asyncio clients: 30)
+        :type timeout: float
+        :param keep_alive: Keep HTTP connections open and reuse them (default: True)
+        :type keep_alive: bool
+        :param tx_cache: Cache of retrieved transactions and documents (default: no cache)
+        :type tx_cache: TransactionCache
+        :param keypair_pool: Pool of pre-generated keypairs for new accounts (default: generate on demand)
+        :type keypair_pool: KeypairPool
+        :param deduplicate: Return the transactions of assets stored before instead of storing them again,
+                            e.g. when a document is saved again after a failure (default: False)
+        :type deduplicate: bool
+        :param journal: Record the progress of save_document in the local store, so that saving a document
+                        again after a failure sends only what is missing (default: False)
+        :type journal: bool
+        """
+        super().__init__(host, port, num_connections, local_store, pipelined, max_workers, single_tx=single_tx,
+                         nodes=nodes, timeout=timeout,
+                         keep_alive=keep_alive, tx_cache=tx_cache, keypair_pool=keypair_pool, deduplicate=deduplicate,
+                         journal=journal)
+        self._connect_async(num_connections, timeout, keep_alive)
+
+    async def save_document(self, document: str or BufferedReader or provmodel.ProvDocument,
+                            manifest: bool = False) -> list or str:
+        """
+        Write a document into BigchainDB
+
+        :param document: Document as JSON/XML/PROVN
+        :type document: str or BufferedReader or ProvDocument
+        :param manifest: Write a manifest listing all transaction ids and return the id of its root (default: False)
+        :type manifest: bool
+        :return: List of transaction ids or transaction id of the root manifest
+        :rtype: list or str
+        """
+        log.info("Save document...")
+        prov_document = utils.to_prov_document(content=document)
+        with self._journaled(prov_document) as journal_id:
+            tasks, keys = self._prepare_document(prov_document, journal_id)
+            document_tx_ids = utils.collect_tx_ids(await tasks.run_async(), keys)
+            log.info("Saved document in %s Tx", len(document_tx_ids))
+            if manifest:
+                return await self._save_manifest(document_tx_ids, journal_id)
+            return document_tx_ids
+
+    async def get_document(self, document_tx_ids: list or str, max_workers: int = None) -> provmodel.ProvDocument:
+        """
+        Retrieve a document by a list transaction ids or a root manifest id from BigchainDB
+
+        :param document_tx_ids: Transaction Ids of Document or transaction id of its root manifest
+        :type document_tx_ids: list or str
+        :param max_workers: Maximum number of assets retrieved concurrently (default: max_workers of the client)
+        :type max_workers: int
+        :return: Document as ProvDocument object
+        :rtype: ProvDocument
+        """
+        return await self._get_documents(document_tx_ids, max_workers)
+
+    def iter_document(self, document_tx_ids: list or str, max_workers: int = None) -> AsyncIterator[tuple]:
+        """
+        Yields the records of a document by a list transaction ids or a root manifest id from BigchainDB as soon as
+        their transaction is retrieved and validated, in the order of the ids (use with async for)
+
+        :param document_tx_ids: Transaction Ids of Document or transaction id of its root manifest
+        :type document_tx_ids: list or str
+        :param max_workers: Maximum number of assets retrieved concurrently (default: max_workers of the client)
+        :type max_workers: int
+        :return: Async iterator of (namespaces, record) tuples
+        :rtype: AsyncIterator[tuple]
+        """
+        return self._iter_documents(document_tx_ids, max_workers)
+
+    async def _instance_neighbours(self, tx: dict, direction: str) -> list:
+        """
+        Returns the transaction ids of the relations of an instance, found by the outputs of its account
+
+        :param tx: CREATE transaction of the instance
+        :type tx: dict
+        :param direction: out for outgoing relations, in for incoming relations, both for all
+        :type direction: str
+        :return: Transaction ids
+        :rtype: list
+        """
+        public_key = tx['inputs'][0]['owners_before'][0]
+        connection = self._get_bigchain_connection()
+        outputs = []
+        instance_txs = [tx]
+        if direction in ('out', 'both'):
+            outputs += await connection.outputs.get(public_key, spent=True)
+        if direction in ('in', 'both'):
+            outputs += await connection.outputs.get(public_key, spent=False)
+            # the instance is transferred to its own account
+            instance_txs += await connection.transactions.get(asset_id=tx['id'], operation='TRANSFER')
+        return self._output_tx_ids(instance_txs, outputs)
+
+    async def _visit_record(self, tx_id: str, level: int, depth: int, direction: str) -> tuple:
+        """
+        Retrieves a record of a subgraph and the transaction ids of its neighbours
+
+        :param tx_id: Transaction id of an instance or relation
+        :type tx_id: str
+        :param level: Number of relations between the start record and the record
+        :type level: int
+        :param depth: Maximum level of the subgraph
+        :type depth: int
+        :param direction: in, out or both
+        :type direction: str
+        :return: CREATE transaction, provenance and list of tuples(transaction id, level) of the neighbours
+        :rtype: (dict, ProvDocument, list)
+        """
+        tx, document = await self._get_asset(tx_id)
+        if level >= depth:
+            return tx, document, []
+        if 'map' in tx['asset']['data']:
+            return tx, document, [(neighbour, level + 1)
+                                  for neighbour in self._relation_neighbours(tx, document, direction)]
+        neighbours = await self._instance_neighbours(tx, direction)
+        return tx, document, [(neighbour, level) for neighbour in neighbours]
+
+    async def get_subgraph(self, start_tx_id: str, depth: int = 1, direction: str = 'both',
+                           max_workers: int = None) -> provmodel.ProvDocument:
+        """
+        Retrieve the records around a record by following the transaction ids in the map of the relation assets
+        breadth-first. The records of each level are retrieved concurrently.
+
+        :param start_tx_id: Transaction id of an instance or relation
+        :type start_tx_id: str
+        :param depth: Maximum number of relations between the start record and a returned record
+        :type depth: int
+        :param direction: out follows relations from subject to object (e.g. to the sources of a derivation),
+                          in from object to subject, both in either direction (default)
+        :type direction: str
+        :param max_workers: Maximum number of assets retrieved concurrently (default: max_workers of the client)
+        :type max_workers: int
+        :return: Subgraph as ProvDocument object
+        :rtype: ProvDocument
+        """
+        assert depth >= 0
+        assert direction in ('in', 'out', 'both')
+        log.info("Retrieve subgraph of %s with depth %s...", start_tx_id, depth)
+        semaphore = asyncio.Semaphore(max_workers or self.max_workers)
+
+        async def bounded(tx_id, level):
+            async with semaphore:
+                return await self._visit_record(tx_id, level, depth, direction)
+
+        doc = provmodel.ProvDocument()
+        visited = set()
+        requested = {start_tx_id}
+        frontier = [(start_tx_id, 0)]
+        while frontier:
+            results = await asyncio.gather(*[bounded(tx_id, level) for tx_id, level in frontier])
+            frontier = []
+            for tx, tmp_doc, neighbours in results:
+                if tx['id'] in visited:
+                    continue
+                visited.add(tx['id'])
+                for namespace in tmp_doc.get_registered_namespaces():
+                    doc.add_namespace(namespace)
+                for record in tmp_doc.get_records():
+                    doc.add_record(record=record)
+                for tx_id, level in neighbours:
+                    if tx_id not in requested:
+                        requested.add(tx_id)
+                        frontier.append((tx_id, level))
+        log.info("Retrieved %s records", len(visited))
+        return doc
+
+
+class AsyncRoleConceptClient(AsyncClientMixin, clients.RoleConceptClient):
+    """"""
+
+    account_class = async_accounts.AsyncRoleConceptAccount
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 9984, num_connections: int = 5,
+                 local_store: local_stores.SqliteStore = local_stores.SqliteStore(), pipelined: bool = False,
+                 max_workers: int = None, single_tx: bool = False, nodes: list = None,
+                 timeout: float = None, keep_alive: bool = True, tx_cache: caches.TransactionCache = None,
+                 keypair_pool: keypairs.KeypairPool = None, deduplicate: bool = False, journal: bool = False):
+        """
+        Instantiate asyncio Role Client object
+
+        :param host: BigchaindDB Hostname or IP (default: 0.0.0.0)
+        :type host: str
+        :param port: BigchaindDB Port (default: 9984)
+        :type port: int
+        :param num_connections: Maximum number of open HTTP connections
+        :type num_connections: int
+        :param local_store: Local database object
+        :type local_store: SqliteStore
+        :param pipelined: Send TRANSFER directly after CREATE and wait only on the TRANSFER (default: False)
+        :type pipelined: bool
+        :param max_workers: Maximum number of transactions in flight per document (default: num_connections)
+        :type max_workers: int
+        :param single_tx: Store each record in a single CREATE owned by the final recipient instead of
+                          a CREATE followed by a TRANSFER (default: False)
+        :type single_tx: bool
+        :param nodes: URLs of all BigchainDB nodes, requests are sent round robin (default: host and port)
+        :type nodes: list
+        :param timeout: Timeout of a single HTTP request in seconds (default: no timeout, asyncio clients: 30)
+        :type timeout: float
+        :param keep_alive: Keep HTTP connections open and reuse them (default: True)
+        :type keep_alive: bool
+        :param tx_cache: Cache of retrieved transactions and documents (default: no cache)
+        :type tx_cache: TransactionCache
+        :param keypair_pool: Pool of pre-generated keypairs for new accounts (default: generate on demand)
+        :type keypair_pool: KeypairPool
+        :param deduplicate: Return the transactions of assets stored before instead of storing them again,
+                            e.g. when a document is saved again after a failure (default: False)
+        :type deduplicate: bool
+        :param journal: Record the progress of save_document in the local store, so that saving a document
+                        again after a failure sends only what is missing (default: False)
+        :type journal: bool
+        """
+        super().__init__(host, port, num_connections, local_store, pipelined, max_workers, single_tx=single_tx,
+                         nodes=nodes, timeout=timeout,
+                         keep_alive=keep_alive, tx_cache=tx_cache, keypair_pool=keypair_pool, deduplicate=deduplicate,
+                         journal=journal)
+        self._connect_async(num_connections, timeout, keep_alive)
+
+    async def save_document(self, document: str or BufferedReader or provmodel.ProvDocument,
+                            manifest: bool = False) -> list or str:
+        """
+        Write a document into BigchainDB
+
+        :param document: Document as JSON/XML/PROVN
+        :type document: str or BufferedReader or ProvDocument
+        :param manifest: Write a manifest listing all transaction ids and return the id of its root (default: False)
+        :type manifest: bool
+        :return: List of transaction ids or transaction id of the root manifest
+        :rtype: list or str
+        """
+        log.info("Save document...")
+        prov_document = utils.to_prov_document(content=document)
+        with self._journaled(prov_document) as journal_id:
+            tasks, keys = self._prepare_document(prov_document, journal_id)
+            document_tx_ids = utils.collect_tx_ids(await tasks.run_async(), keys)
+            log.info("Saved document in %s Tx", len(document_tx_ids))
+            if manifest:
+                return await self._save_manifest(document_tx_ids, journal_id)
+            return document_tx_ids
+
+    async def get_document(self, document_tx_ids: list or str, max_workers: int = None) -> provmodel.ProvDocument:
+        """
+        Returns a document by a list transaction ids or a root manifest id from BigchainDB
+
+        :param document_tx_ids: Transaction Ids of Document or transaction id of its root manifest
+        :type document_tx_ids: list or str
+        :param max_workers: Maximum number of assets retrieved concurrently (default: max_workers of the client)
+        :type max_workers: int
+        :return: Document as ProvDocument object
+        :rtype: ProvDocument
+        """
+        return await self._get_documents(document_tx_ids, max_workers)
+
+    def iter_document(self, document_tx_ids: list or str, max_workers: int = None) -> AsyncIterator[tuple]:
+        """
+        Yields the records of a document by a list transaction ids or a root manifest id from BigchainDB as soon as
+        their transaction is retrieved and validated, in the order of the ids (use with async for)
+
+        :param document_tx_ids: Transaction Ids of Document or transaction id of its root manifest
+        :type document_tx_ids: list or str
+        :param max_workers: Maximum number of assets retrieved concurrently (default: max_workers of the client)
+        :type max_workers: int
+        :return: Async iterator of (namespaces, record) tuples
+        :rtype: AsyncIterator[tuple]
+        """
+        return self._iter_documents(document_tx_ids, max_workers)
@@ -0,0 +1,459 @@
+import asyncio
+import json
+import logging
+
+from bigchaindb_driver import exceptions as bdb_exceptions
+from bigchaindb_driver.driver import TransactionsEndpoint
+
+from prov2bigchaindb.core import block_cache, exceptions
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class AsyncBigchainDB(object):
+    """
+    Non-blocking counterpart of the BigchainDB driver object, backed by aiohttp
+    """
+
+    def __init__(self, *nodes: str, limit: int = 100, timeout: float = 30, keep_alive: bool = True):
+        """
+        Instantiate AsyncBigchainDB object
+
+        :param nodes: URLs of BigchainDB nodes
+        :type nodes: str
+        :param limit: Maximum number of open HTTP connections
+        :type limit: int
+        :param timeout: Timeout of a single request in seconds
+        :type timeout: float
+        :param keep_alive: Reuse HTTP connections, otherwise each request opens a new one
+        :type keep_alive: bool
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for the asyncio clients: pip install prov2bigchaindb[async]")
+        assert len(nodes) > 0
+        self.nodes = nodes
+        self.limit = limit
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.api_prefix = '/api/v1'
+        self.transactions = AsyncTransactionsEndpoint(self)
+        self.blocks = AsyncBlocksEndpoint(self)
+        self.outputs = AsyncOutputsEndpoint(self)
+        self.session = None
+        self.picked = -1
+
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        """
+        Returns the HTTP session, which is created on first use inside the running event loop
+
+        :return: HTTP session
+        :rtype: aiohttp.ClientSession
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, force_close=not self.keep_alive)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self.session
+
+    async def request(self, method: str, path: str, json_data: dict = None, params: dict = None) -> object:
+        """
+        Sends a HTTP request to the next node and maps errors to the exceptions of the BigchainDB driver
+
+        :param method: HTTP method
+        :type method: str
+        :param path: Path of the endpoint
+        :type path: str
+        :param json_data: JSON payload
+        :type json_data: dict or None
+        :param params: Query parameters
+        :type params: dict or None
+        :return: Decoded JSON or text of the response
+        :rtype: object
+        """
+        self.picked = (self.picked + 1) % len(self.nodes)
+        url = self.nodes[self.picked] + path
+        try:
+            async with self._get_session().request(method, url, json=json_data, params=params) as response:
+                text = await response.text()
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise bdb_exceptions.ConnectionError(None, str(e), None)
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if not 200 <= status < 300:
+            exc_cls = bdb_exceptions.HTTP_EXCEPTIONS.get(status, bdb_exceptions.TransportError)
+            raise exc_cls(status, text, data)
+        return data if data is not None else text
+
+    async def close(self):
+        """
+        Closes the HTTP session
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class AsyncTransactionsEndpoint(object):
+    """
+    Transactions endpoint of AsyncBigchainDB. Preparing and fulfilling happens offline.
+    """
+
+    prepare = staticmethod(TransactionsEndpoint.prepare)
+    fulfill = staticmethod(TransactionsEndpoint.fulfill)
+
+    def __init__(self, driver: AsyncBigchainDB):
+        """
+        Instantiate AsyncTransactionsEndpoint object
+
+        :param driver: Parent connection
+        :type driver: AsyncBigchainDB
+        """
+        self.driver = driver
+        self.path = driver.api_prefix + '/transactions/'
+
+    async def send(self, transaction: dict) -> dict:
+        """
+        Submits a fulfilled transaction
+
+        :param transaction: Fulfilled transaction
+        :type transaction: dict
+        :return: Sent transaction
+        :rtype: dict
+        """
+        return await self.driver.request('POST', self.path, json_data=transaction)
+
+    async def retrieve(self, tx_id: str) -> dict:
+        """
+        Retrieves a transaction by id
+
+        :param tx_id: Transaction id
+        :type tx_id: str
+        :return: Transaction
+        :rtype: dict
+        """
+        return await self.driver.request('GET', self.path + tx_id)
+
+    async def status(self, tx_id: str) -> dict:
+        """
+        Retrieves the status of a transaction
+
+        :param tx_id: Transaction id
+        :type tx_id: str
+        :return: Status of transaction
+        :rtype: dict
+        """
+        return await self.driver.request('GET', self.driver.api_prefix + '/statuses', params={'transaction_id': tx_id})
+
+    async def get(self, asset_id: str, operation: str = None) -> list:
+        """
+        Retrieves all transactions of an asset
+
+        :param asset_id: Id of the asset
+        :type asset_id: str
+        :param operation: Optional filter for CREATE or TRANSFER
+        :type operation: str or None
+        :return: List of transactions
+        :rtype: list
+        """
+        params = {'asset_id': asset_id}
+        if operation:
+            params['operation'] = operation
+        return await self.driver.request('GET', self.path, params=params)
+
+
+class AsyncBlocksEndpoint(object):
+    """
+    Blocks endpoint of AsyncBigchainDB
+    """
+
+    def __init__(self, driver: AsyncBigchainDB):
+        """
+        Instantiate AsyncBlocksEndpoint object
+
+        :param driver: Parent connection
+        :type driver: AsyncBigchainDB
+        """
+        self.driver = driver
+        self.path = driver.api_prefix + '/blocks/'
+
+    async def get(self, tx_id: str) -> list:
+        """
+        Retrieves the ids of all blocks including the transaction
+
+        :param tx_id: Transaction id
+        :type tx_id: str
+        :return: List of block ids
+        :rtype: list
+        """
+        return await self.driver.request('GET', self.path, params={'transaction_id': tx_id})
+
+    async def status(self, block_id: str) -> dict:
+        """
+        Retrieves the status of a block
+
+        :param block_id: Block id
+        :type block_id: str
+        :return: Status of block
+        :rtype: dict
+        """
+        return await self.driver.request('GET', self.driver.api_prefix + '/statuses', params={'block_id': block_id})
+
+    async def retrieve(self, block_id: str) -> dict:
+        """
+        Retrieves a block
+
+        :param block_id: Block id
+        :type block_id: str
+        :return: Block with its transactions
+        :rtype: dict
+        """
+        return await self.driver.request('GET', self.path + block_id)
+
+
+class AsyncOutputsEndpoint(object):
+    """
+    Outputs endpoint of AsyncBigchainDB
+    """
+
+    def __init__(self, driver: AsyncBigchainDB):
+        """
+        Instantiate AsyncOutputsEndpoint object
+
+        :param driver: Parent connection
+        :type driver: AsyncBigchainDB
+        """
+        self.driver = driver
+        self.path = driver.api_prefix + '/outputs/'
+
+    async def get(self, public_key: str, spent: bool = None) -> list:
+        """
+        Retrieves the outputs owned by a public key
+
+        :param public_key: Public key of the owner
+        :type public_key: str
+        :param spent: Optional filter for spent or unspent outputs
+        :type spent: bool or None
+        :return: List of outputs with transaction_id and output_index
+        :rtype: list
+        """
+        params = {'public_key': public_key}
+        if spent is not None:
+            params['spent'] = 'true' if spent else 'false'
+        return await self.driver.request('GET', self.path, params=params)
+
+
+async def wait_until_valid(tx_id: str, connection: AsyncBigchainDB, interval: float = 0.5):
+    """
+    Waits without blocking the event loop until a transaction is valid in BigchainDB
+
+    :param tx_id: Id of transaction to wait on
+    :type tx_id: str
+    :param connection: Connection object for BigchainDB
+    :type connection: AsyncBigchainDB
+    :param interval: Seconds between two status requests of a pending transaction
+    :type interval: float
+    """
+    trials = 0
+    trialsmax = 100
+    while trials < trialsmax:
+        try:
+            result = await connection.transactions.status(tx_id)
+            if result.get('status') == 'valid':  # others: backlog, undecided
+                return
+            await asyncio.sleep(interval)
+        except bdb_exceptions.NotFoundError:
+            trials += 1
+            log.debug("Transaction %s not found in BigchainDB after %s tries out of %s trials", tx_id, trials, trialsmax)
+            await asyncio.sleep(1)
+        except bdb_exceptions.TransportError as e:
+            trials += 1
+            log.debug("Transport Error after %s tries out of %s trials", trials, trialsmax)
+            log.debug("%s", e)
+            await asyncio.sleep(interval)
+    log.error("Transaction id %s not found affer %s tries", tx_id, trialsmax)
+    raise exceptions.TransactionIdNotFound(tx_id)
+
+
+async def send_until_accepted(tx: dict, connection: AsyncBigchainDB) -> dict:
+    """
+    Sends a transaction and repeats it while BigchainDB rejects it, because the
+    transactions it spends are not in a valid block yet
+
+    :param tx: Fulfilled transaction to send
+    :type tx: dict
+    :param connection: Connection object for BigchainDB
+    :type connection: AsyncBigchainDB
+    :return: Sent transaction
+    :rtype: dict
+    """
+    trials = 0
+    trialsmax = 100
+    while True:
+        try:
+            return await connection.transactions.send(tx)
+        except bdb_exceptions.BadRequest as e:
+            if not any(reason in str(e.info) for reason in ('TransactionNotInValidBlock', 'InputDoesNotExist')):
+                raise exceptions.CreateRecordException(tx['id'])
+            trials += 1
+            if trials == trialsmax:
+                log.error("Transaction %s was not accepted after %s tries", tx['id'], trialsmax)
+                raise exceptions.CreateRecordException(tx['id'])
+            await asyncio.sleep(min(0.1 * trials, 1))
+
+
+async def is_valid_tx(tx_id: str, connection: AsyncBigchainDB) -> bool:
+    """
+    Checks once if a transaction is valid
+
+    :param tx_id: Id of transaction to check
+    :type tx_id: str
+    :param connection: Connection object for BigchainDB
+    :type connection: AsyncBigchainDB
+    :return: True if valid
+    :rtype: bool
+    """
+    try:
+        status = (await connection.transactions.status(tx_id)).get('status')
+    except bdb_exceptions.NotFoundError:
+        log.error("Transaction id %s was not found", tx_id)
+        raise exceptions.TransactionIdNotFound(tx_id)
+    if status == 'valid':
+        return True
+    log.warning("tx %s is %s", tx_id, status)
+    return False
+
+
+async def is_known_tx(tx_id: str, connection: AsyncBigchainDB) -> bool:
+    """
+    Checks once if BigchainDB received a transaction, in any state
+
+    :param tx_id: Id of transaction to check
+    :type tx_id: str
+    :param connection: Connection object for BigchainDB
+    :type connection: AsyncBigchainDB
+    :return: True if the transaction is known
+    :rtype: bool
+    """
+    try:
+        await connection.transactions.status(tx_id)
+    except bdb_exceptions.NotFoundError:
+        return False
+    return True
+
+
+async def is_block_to_tx_valid(tx_id: str, connection: AsyncBigchainDB,
+                               cache: block_cache.BlockStatusCache = None) -> bool:
+    """
+    Checks if block with transaction is valid. With a cache each valid block is queried once,
+    see utils.is_block_to_tx_valid.
+
+    :param tx_id: Id of transaction which should be included in the block
+    :type tx_id: str
+    :param connection: Connection object for BigchainDB
+    :type connection: AsyncBigchainDB
+    :param cache: Cache of valid blocks (default: no cache)
+    :type cache: BlockStatusCache or None
+    :return: True if transactions is in block and block is valid
+    :rtype: bool
+    """
+    if cache is not None and cache.get_block(tx_id) is not None:
+        return True
+    block_ids = await connection.blocks.get(tx_id)
+    if len(block_ids) != 1:
+        raise exceptions.TransactionIdNotFound(tx_id)
+    block_id = block_ids[0]
+    if cache is None:
+        return await _get_block_status(block_id, connection) == 'valid'
+    status = await _lookup_block_status(block_id, connection, cache)
+    # the transaction may be missing in the block retrieved by a concurrent lookup
+    cache.add_block(block_id, status, [tx_id])
+    return status == 'valid'
+
+
+async def are_blocks_to_txs_valid(tx_ids: list, connection: AsyncBigchainDB,
+                                  cache: block_cache.BlockStatusCache) -> dict:
+    """
+    Checks the blocks of many transactions with as few block queries as possible,
+    see utils.are_blocks_to_txs_valid
+
+    :param tx_ids: Ids of transactions which should be included in valid blocks
+    :type tx_ids: list
+    :param connection: Connection object for BigchainDB
+    :type connection: AsyncBigchainDB
+    :param cache: Cache of valid blocks
+    :type cache: BlockStatusCache
+    :return: Dictionary of transaction id to True if the block of the transaction is valid
+    :rtype: dict
+    """
+    result = {}
+    for tx_id in tx_ids:
+        if tx_id in result:
+            continue
+        try:
+            result[tx_id] = await is_block_to_tx_valid(tx_id, connection, cache)
+        except exceptions.TransactionIdNotFound:
+            result[tx_id] = False
+    return result
+
+
+async def _get_block_status(block_id: str, connection: AsyncBigchainDB) -> str:
+    """
+    Returns the status of a block
+
+    :param block_id: Block id
+    :type block_id: str
+    :param connection: Connection object for BigchainDB
+    :type connection: AsyncBigchainDB
+    :return: valid, invalid or undecided
+    :rtype: str
+    """
+    try:
+        return (await connection.blocks.status(block_id))['status']
+    except bdb_exceptions.TransportError:
+        raise exceptions.BlockIdNotFound(block_id)
+
+
+async def _lookup_block_status(block_id: str, connection: AsyncBigchainDB,
+                               cache: block_cache.BlockStatusCache) -> str:
+    """
+    Returns the status of a block and caches a valid block with all transactions it includes.
+    Concurrent lookups of the same block, from coroutines or threads, wait for the first one.
+
+    :param block_id: Block id
+    :type block_id: str
+    :param connection: Connection object for BigchainDB
+    :type connection: AsyncBigchainDB
+    :param cache: Cache of valid blocks
+    :type cache: BlockStatusCache
+    :return: valid, invalid or undecided
+    :rtype: str
+    """
+    lookup, owner = cache.start_lookup(block_id)
+    if not owner:
+        return await asyncio.wrap_future(lookup)
+    block_tx_ids = []
+    try:
+        status = await _get_block_status(block_id, connection)
+        if status == 'valid':
+            try:
+                block = await connection.blocks.retrieve(block_id)
+                block_tx_ids = [tx['id'] for tx in block['block']['transactions']]
+            except bdb_exceptions.TransportError as e:
+                log.debug("Could not retrieve block %s: %s", block_id, e)
+    except asyncio.CancelledError:
+        # the waiting coroutines are not cancelled with this one
+        cache.finish_lookup(block_id, exception=exceptions.BlockIdNotFound(block_id))
+        raise
+    except BaseException as e:
+        cache.finish_lookup(block_id, exception=e)
+        raise
+    cache.finish_lookup(block_id, status, block_tx_ids)
+    return status
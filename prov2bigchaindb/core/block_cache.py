@@ -0,0 +1,134 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class BlockStatusCache(object):
+    """
+    Remembers valid blocks and the transactions they include. A valid block never changes its status,
+    so a transaction found in it stays valid. Other blocks are not cached: a transaction of a block voted
+    invalid goes back to the backlog and into a new block, undecided blocks are still voted on.
+    Blocks and transactions are bounded and drop the least recently used entries first.
+    Concurrent lookups of the same block share one lookup, see start_lookup.
+    """
+
+    def __init__(self, max_transactions: int = 100000, max_blocks: int = 10000):
+        """
+        Instantiate BlockStatusCache object
+
+        :param max_transactions: Maximum number of cached transaction ids
+        :type max_transactions: int
+        :param max_blocks: Maximum number of cached block ids
+        :type max_blocks: int
+        """
+        assert max_transactions > 0
+        assert max_blocks > 0
+        self.max_transactions = max_transactions
+        self.max_blocks = max_blocks
+        self.lock = threading.Lock()
+        self.tx_blocks = OrderedDict()
+        self.block_status = OrderedDict()
+        self.lookups = {}
+
+    def get_block(self, tx_id: str) -> str:
+        """
+        Returns the id of the valid block including a transaction
+
+        :param tx_id: Transaction id
+        :type tx_id: str
+        :return: Block id or None if unknown
+        :rtype: str or None
+        """
+        with self.lock:
+            block_id = self.tx_blocks.get(tx_id)
+            if block_id is not None:
+                self.tx_blocks.move_to_end(tx_id)
+            return block_id
+
+    def get_status(self, block_id: str) -> str:
+        """
+        Returns the status of a cached block
+
+        :param block_id: Block id
+        :type block_id: str
+        :return: valid or None if unknown
+        :rtype: str or None
+        """
+        with self.lock:
+            status = self.block_status.get(block_id)
+            if status is not None:
+                self.block_status.move_to_end(block_id)
+            return status
+
+    def add_block(self, block_id: str, status: str, tx_ids: list = None):
+        """
+        Remembers a valid block and the transactions it includes. Blocks with another status are ignored.
+
+        :param block_id: Block id
+        :type block_id: str
+        :param status: Status of the block (valid, invalid or undecided)
+        :type status: str
+        :param tx_ids: Ids of the transactions in the block
+        :type tx_ids: list or None
+        """
+        if status != 'valid':
+            return
+        with self.lock:
+            self.block_status[block_id] = status
+            self.block_status.move_to_end(block_id)
+            if len(self.block_status) > self.max_blocks:
+                self.block_status.popitem(last=False)
+            for tx_id in tx_ids or []:
+                self.tx_blocks[tx_id] = block_id
+                self.tx_blocks.move_to_end(tx_id)
+                if len(self.tx_blocks) > self.max_transactions:
+                    self.tx_blocks.popitem(last=False)
+
+    def start_lookup(self, block_id: str) -> (Future, bool):
+        """
+        Returns the lookup of the status of a block, which is shared by all concurrent callers.
+        Only the first caller has to query the block and pass the result to finish_lookup,
+        the others wait for the future (threads with result(), coroutines with asyncio.wrap_future).
+        A cached block returns a finished lookup.
+
+        :param block_id: Block id
+        :type block_id: str
+        :return: Future of the status of the block and True if the caller has to query the block
+        :rtype: (Future, bool)
+        """
+        with self.lock:
+            if block_id in self.block_status:
+                future = Future()
+                future.set_result(self.block_status[block_id])
+                return future, False
+            future = self.lookups.get(block_id)
+            if future is not None:
+                return future, False
+            future = self.lookups[block_id] = Future()
+            return future, True
+
+    def finish_lookup(self, block_id: str, status: str = None, tx_ids: list = None, exception: Exception = None):
+        """
+        Caches the result of a lookup started by start_lookup and passes it to the waiting callers
+
+        :param block_id: Block id
+        :type block_id: str
+        :param status: Status of the block (valid, invalid or undecided)
+        :type status: str
+        :param tx_ids: Ids of the transactions in the block
+        :type tx_ids: list or None
+        :param exception: Exception raised by the query instead of a status
+        :type exception: Exception or None
+        """
+        if exception is None:
+            self.add_block(block_id, status, tx_ids)
+        with self.lock:
+            future = self.lookups.pop(block_id)
+        if exception is None:
+            future.set_result(status)
+        else:
+            future.set_exception(exception)
@@ -0,0 +1,94 @@
+import json
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class BundleWriter(object):
+    """
+    Writes signed transactions as JSON lines into a bundle file.
+    Transactions of one record are written together, so a TRANSFER always follows the CREATE it spends.
+    """
+
+    def __init__(self, path: str):
+        """
+        Instantiate BundleWriter object
+
+        :param path: Path of the bundle file, which is overwritten
+        :type path: str
+        """
+        assert path is not None
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, 'w')
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, txs: list):
+        """
+        Appends transactions to the bundle
+
+        :param txs: Fulfilled transactions in the order they must be sent
+        :type txs: list
+        """
+        lines = ''.join(json.dumps(tx, sort_keys=True) + '\n' for tx in txs)
+        with self.lock:
+            self.file.write(lines)
+            self.count += len(txs)
+
+    def close(self):
+        """
+        Flushes and closes the bundle file
+        """
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+                log.info("Wrote %s transactions to %s", self.count, self.path)
+
+
+def read_bundle(path: str) -> list:
+    """
+    Reads all transactions of a bundle file
+
+    :param path: Path of the bundle file
+    :type path: str
+    :return: Fulfilled transactions in the order of the bundle
+    :rtype: list
+    """
+    with open(path) as bundle:
+        return [json.loads(line) for line in bundle if line.strip()]
+
+
+def split_bundle(txs: list) -> tuple:
+    """
+    Splits transactions of a bundle into CREATEs and TRANSFERs.
+    All CREATEs can be sent at once, the TRANSFERs after their CREATEs.
+
+    :param txs: Transactions of a bundle
+    :type txs: list
+    :return: Tuple of CREATE and TRANSFER transactions, each in bundle order
+    :rtype: tuple
+    """
+    creations = [tx for tx in txs if tx['operation'] == 'CREATE']
+    transfers = [tx for tx in txs if tx['operation'] == 'TRANSFER']
+    return creations, transfers
+
+
+def record_tx_ids(txs: list) -> list:
+    """
+    Returns the ids of all transactions holding a record, i.e. all TRANSFERs and the CREATEs which are not spent
+
+    :param txs: Transactions of a bundle
+    :type txs: list
+    :return: Transaction ids in bundle order
+    :rtype: list
+    """
+    spent = {tx['asset']['id'] for tx in txs if tx['operation'] == 'TRANSFER'}
+    return [tx['id'] for tx in txs if tx['id'] not in spent]
@@ -0,0 +1,140 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+import prov.model as provmodel
+import sqlite3
+
+from prov2bigchaindb.core import utils
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class TransactionCache(object):
+    """
+    Cache of retrieved assets keyed by transaction id. Transaction ids are hashes of their content and
+    valid transactions never change, so entries need no invalidation. Each entry holds the transaction
+    with the asset, the verified flag and the parsed document. The most recently used entries are kept
+    in memory, all entries are kept in an optional sqlite database, which survives restarts.
+    """
+
+    def __init__(self, max_entries: int = 1000, db_name: str = None):
+        """
+        Instantiate TransactionCache object
+
+        :param max_entries: Maximum number of entries in memory
+        :type max_entries: int
+        :param db_name: Name of the sqlite database file of the disk tier (default: memory only)
+        :type db_name: str or None
+        """
+        assert max_entries > 0
+        self.max_entries = max_entries
+        self.db_name = db_name
+        self.lock = threading.RLock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.conn = None
+        if db_name is not None:
+            self.conn = sqlite3.connect(db_name, check_same_thread=False)
+            self.conn.execute(
+                '''CREATE TABLE IF NOT EXISTS transactions (tx_id TEXT PRIMARY KEY, tx TEXT, verified INTEGER)''')
+
+    def get(self, tx_id: str) -> tuple:
+        """
+        Returns a cached entry and moves it to the memory tier
+
+        :param tx_id: Transaction id of the record
+        :type tx_id: str
+        :return: Tuple with transaction, verified flag and document or None if not cached
+        :rtype: tuple or None
+        """
+        with self.lock:
+            entry = self.entries.get(tx_id)
+            if entry is not None:
+                self.entries.move_to_end(tx_id)
+                self.hits += 1
+                return entry
+            row = None
+            if self.conn is not None:
+                row = self.conn.execute('SELECT tx, verified FROM transactions WHERE tx_id=?', (tx_id,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        tx = json.loads(row[0])
+        entry = (tx, bool(row[1]), utils.to_prov_document(tx['asset']['data']['prov']))
+        with self.lock:
+            self._remember(tx_id, entry)
+        return entry
+
+    def get_document(self, tx_id: str) -> provmodel.ProvDocument:
+        """
+        Returns the parsed document of a verified entry. The document is shared, do not modify it.
+
+        :param tx_id: Transaction id of the record
+        :type tx_id: str
+        :return: Document or None if not cached or not verified
+        :rtype: ProvDocument or None
+        """
+        entry = self.get(tx_id)
+        if entry is None or not entry[1]:
+            return None
+        return entry[2]
+
+    def put(self, tx_id: str, tx: dict, verified: bool = True, document: provmodel.ProvDocument = None):
+        """
+        Adds an entry to both tiers
+
+        :param tx_id: Transaction id of the record
+        :type tx_id: str
+        :param tx: Transaction holding the asset
+        :type tx: dict
+        :param verified: True if the transaction and its block are valid
+        :type verified: bool
+        :param document: Parsed document of the asset (default: parse tx)
+        :type document: ProvDocument or None
+        """
+        if document is None:
+            document = utils.to_prov_document(tx['asset']['data']['prov'])
+        with self.lock:
+            self._remember(tx_id, (tx, verified, document))
+            if self.conn is not None:
+                with self.conn:
+                    self.conn.execute('INSERT OR REPLACE INTO transactions VALUES (?,?,?)',
+                                      (tx_id, json.dumps(tx), int(verified)))
+
+    def clear(self):
+        """
+        Removes all entries from both tiers
+        """
+        with self.lock:
+            self.entries.clear()
+            if self.conn is not None:
+                with self.conn:
+                    self.conn.execute('DELETE FROM transactions')
+
+    def close(self):
+        """
+        Closes the database of the disk tier
+        """
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def _remember(self, tx_id: str, entry: tuple):
+        """
+        Adds an entry to the memory tier and evicts the least recently used one. Must be called while holding the lock.
+
+        :param tx_id: Transaction id of the record
+        :type tx_id: str
+        :param entry: Tuple with transaction, verified flag and document
+        :type entry: tuple
+        """
+        self.entries[tx_id] = entry
+        self.entries.move_to_end(tx_id)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
@@ -1,5 +1,11 @@
+import contextlib
+import copy
 import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from io import BufferedReader
+from itertools import islice
+from typing import Iterator
 
 import bigchaindb_driver as bd
 import prov.graph as provgraph
@@ -9,7 +15,8 @@ from networkx import is_directed_acyclic_graph
 from networkx import isolates
 from networkx import topological_sort
 
-from prov2bigchaindb.core import utils, local_stores, accounts
+from prov2bigchaindb.core import utils, local_stores, accounts, scheduler, confirmations, bundles, exceptions, \
+    node_pool, block_cache, caches, keypairs
 
 log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -18,8 +25,15 @@ logging.basicConfig(level=logging.INFO)
 class BaseClient(object):
     """ BigchainDB Base Client """
 
+    manifest_account_class = accounts.ManifestAccount
+    manifest_chunk_size = 1000
+
     def __init__(self, host: str = '0.0.0.0', port: int = 9984,
-                 num_connections: int = 5, local_store: local_stores.SqliteStore = local_stores.SqliteStore()):
+                 num_connections: int = 5, local_store: local_stores.SqliteStore = local_stores.SqliteStore(),
+                 pipelined: bool = False, event_stream_url: str = None, single_tx: bool = False,
+                 signing_processes: int = 0, nodes: list = None,
+                 timeout: float = None, keep_alive: bool = True, tx_cache: caches.TransactionCache = None,
+                 keypair_pool: keypairs.KeypairPool = None, deduplicate: bool = False, journal: bool = False):
         """
         Instantiate Base Client object
 
@@ -27,36 +41,304 @@ class BaseClient(object):
         :type host: str
         :param port: BigchaindDB Port (default: 9984)
         :type port: int
-        :param num_connections: Amount of connections made to BigchainDB node
+        :param num_connections: Amount of connections made to each BigchainDB node
         :type num_connections: int
         :param local_store: Local database object
         :type local_store: SqliteStore
+        :param pipelined: Send TRANSFER directly after CREATE and wait only on the TRANSFER (default: False)
+        :type pipelined: bool
+        :param event_stream_url: WebSocket URL of the valid transactions event stream used to wait on transactions
+                                 (default: poll only)
+        :type event_stream_url: str
+        :param single_tx: Store each record in a single CREATE owned by the final recipient instead of
+                          a CREATE followed by a TRANSFER (default: False)
+        :type single_tx: bool
+        :param signing_processes: Number of processes signing transactions (default: 0, sign in the saving threads)
+        :type signing_processes: int
+        :param nodes: URLs of all BigchainDB nodes, e.g. ['http://node1:9984', 'http://node2:9984']
+                      (default: host and port)
+        :type nodes: list
+        :param timeout: Timeout of a single HTTP request in seconds (default: no timeout, asyncio clients: 30)
+        :type timeout: float
+        :param keep_alive: Keep HTTP connections open and reuse them (default: True)
+        :type keep_alive: bool
+        :param tx_cache: Cache of retrieved transactions and documents (default: no cache)
+        :type tx_cache: TransactionCache
+        :param keypair_pool: Pool of pre-generated keypairs for new accounts (default: generate on demand)
+        :type keypair_pool: KeypairPool
+        :param deduplicate: Return the transactions of assets stored before instead of storing them again,
+                            e.g. when a document is saved again after a failure (default: False)
+        :type deduplicate: bool
+        :param journal: Record the progress of save_document in the local store, so that saving a document
+                        again after a failure sends only what is missing (default: False)
+        :type journal: bool
         """
         assert num_connections > 0
-        self.node = 'http://{}:{}'.format(host, str(port))
-        self.connections = num_connections * [bd.BigchainDB(self.node)]
-        self.connection_pool = bdpool.Pool(self.connections)
+        self.nodes = nodes or ['http://{}:{}'.format(host, str(port))]
+        self.node = self.nodes[0]
+        self.connections = node_pool.connect(self.nodes, num_connections, timeout=timeout, keep_alive=keep_alive)
+        self.connection_pool = bdpool.Pool(self.connections, picker_class=node_pool.LatencyPicker)
         self.store = local_store
+        self.pipelined = pipelined
+        self.single_tx = single_tx
+        self.bundle = None
+        self.block_cache = block_cache.BlockStatusCache()
+        self.tx_cache = tx_cache
+        self.keypair_pool = keypair_pool
+        self.deduplicate = deduplicate
+        self.journal = journal
+        if journal and local_store.db_name == ':memory:':
+            log.warning("The journal of an in-memory store does not survive the process, use a database file")
+        self.signer = ProcessPoolExecutor(max_workers=signing_processes) if signing_processes > 0 else None
+        if event_stream_url is not None:
+            self.tracker = confirmations.EventStreamTracker(self.connection_pool, event_stream_url)
+        else:
+            self.tracker = confirmations.ConfirmationTracker(self.connection_pool)
+
+    def _account_options(self, journal_id: str = None) -> dict:
+        """
+        Submission options passed to every account of the client
+
+        :param journal_id: Journal of the document saved by the accounts (default: no journal)
+        :type journal_id: str or None
+        :return: Keyword arguments for BaseAccount
+        :rtype: dict
+        """
+        return {'pipelined': self.pipelined, 'tracker': self.tracker, 'single_tx': self.single_tx,
+                'bundle': self.bundle, 'signer': self.signer, 'keypair_pool': self.keypair_pool,
+                'deduplicate': self.deduplicate, 'journal_id': journal_id}
+
+    def close(self):
+        """
+        Stops the confirmation tracker and the signing processes and closes the HTTP sessions of the client
+        """
+        if self.tracker is not None:
+            self.tracker.stop()
+        if self.signer is not None:
+            self.signer.shutdown()
+        node_pool.close(self.connections)
+
+    @contextlib.contextmanager
+    def _journaled(self, prov_document: provmodel.ProvDocument):
+        """
+        Yields the id of the journal recording the progress of saving a document, if the journal is enabled.
+        A journal left by a failed save of the same document is resumed, it is removed once the document is saved.
+
+        :param prov_document: Document to save
+        :type prov_document: ProvDocument
+        """
+        if not self.journal or self.bundle is not None:
+            yield None
+            return
+        journal_id = utils.document_hash(prov_document)
+        progress = self.store.get_journal(journal_id)
+        if progress:
+            log.info("Resume document %s: %s of %s steps valid", journal_id,
+                     sum(state == 'valid' for state in progress.values()), len(progress))
+        yield journal_id
+        self.store.delete_journal(journal_id)
 
     def test_transaction(self, tx: dict) -> bool:
         """
-        Validate a transaction against BigchainDB
+        Validate a transaction against BigchainDB. A transaction of a valid block in the block cache
+        is valid without any request.
 
         :param tx: Transaction to test
         :type tx: dict
         :return: True or Exception
         :rtype: bool
         """
+        if self.block_cache.get_block(tx['id']) is not None:
+            return True
         reason = None
         if not utils.is_valid_tx(tx['id'], self.connection_pool.get_connection()):
             reason = "TX is invalid"
-        elif not utils.is_block_to_tx_valid(tx['id'], self.connection_pool.get_connection()):
+        elif not utils.is_block_to_tx_valid(tx['id'], self.connection_pool.get_connection(), self.block_cache):
             reason = "Block is invalid"
         if reason is None:
             return True
         log.error("Test failed: %s", tx['id'])
         raise Exception(reason)
 
+    def _check_blocks(self, tx_ids: list) -> dict:
+        """
+        Checks the blocks of a batch of transactions with as few block queries as possible. Their valid blocks
+        are cached, so test_transaction needs no request for these transactions.
+
+        :param tx_ids: Transaction ids
+        :type tx_ids: list
+        :return: Dictionary of transaction id to True if the block of the transaction is valid
+        :rtype: dict
+        """
+        return utils.are_blocks_to_txs_valid(tx_ids, self._get_bigchain_connection(), self.block_cache)
+
+    def _checked_tx_ids(self, document_tx_ids: list, batch_size: int) -> Iterator[str]:
+        """
+        Yields transaction ids after checking the blocks of each batch of them
+
+        :param document_tx_ids: Transaction ids
+        :type document_tx_ids: list
+        :param batch_size: Number of transaction ids checked at once
+        :type batch_size: int
+        :return: Iterator of transaction ids
+        :rtype: Iterator[str]
+        """
+        tx_ids = iter(document_tx_ids)
+        for batch in iter(lambda: list(islice(tx_ids, batch_size)), []):
+            self._check_blocks(batch)
+            yield from batch
+
+    def _get_asset_tx(self, tx_id: str) -> dict:
+        """
+        Retrieves and validates the CREATE transaction holding the asset of a stored record.
+        The id is either of the TRANSFER following the CREATE or of a single CREATE.
+
+        :param tx_id: Transaction id of the record
+        :type tx_id: str
+        :return: CREATE transaction
+        :rtype: dict
+        """
+        tx = self._get_bigchain_connection().transactions.retrieve(tx_id)
+        self.test_transaction(tx)
+        if 'id' in tx['asset'].keys():
+            tx = self._get_bigchain_connection().transactions.retrieve(tx['asset']['id'])
+            self.test_transaction(tx)
+        return tx
+
+    def _get_asset(self, tx_id: str) -> (dict, provmodel.ProvDocument):
+        """
+        Retrieves and validates the transactions of an asset and parses its provenance
+
+        :param tx_id: Transaction id of the asset
+        :type tx_id: str
+        :return: CREATE transaction and provenance of the asset
+        :rtype: (dict, ProvDocument)
+        """
+        if self.tx_cache is not None:
+            entry = self.tx_cache.get(tx_id)
+            if entry is not None and entry[1]:
+                return entry[0], entry[2]
+        tx = self._get_asset_tx(tx_id)
+        document = utils.to_prov_document(tx['asset']['data']['prov'])
+        if self.tx_cache is not None:
+            self.tx_cache.put(tx_id, tx, document=document)
+        return tx, document
+
+    def _get_asset_document(self, tx_id: str) -> provmodel.ProvDocument:
+        """
+        Retrieves and validates the transactions of an asset and returns its provenance
+
+        :param tx_id: Transaction id of the asset
+        :type tx_id: str
+        :return: Provenance of the asset
+        :rtype: ProvDocument
+        """
+        return self._get_asset(tx_id)[1]
+
+    def _save_manifest(self, document_tx_ids: list, journal_id: str = None) -> str:
+        """
+        Writes the transaction ids of a document into manifest assets and the local index
+
+        :param document_tx_ids: Transaction Ids of Document
+        :type document_tx_ids: list
+        :param journal_id: Journal of the document (default: no journal)
+        :type journal_id: str or None
+        :return: Transaction id of the root manifest
+        :rtype: str
+        """
+        account = self.manifest_account_class('manifest', self.store,
+                                              **dict(self._account_options(journal_id), single_tx=True))
+        root_id = account.save_manifest(document_tx_ids, self._get_bigchain_connection(), self.manifest_chunk_size)
+        self.store.write_document(root_id, document_tx_ids)
+        return root_id
+
+    def _get_manifest(self, tx_id: str) -> dict:
+        """
+        Retrieves and validates a manifest asset
+
+        :param tx_id: Transaction id of the manifest
+        :type tx_id: str
+        :return: Manifest with either tx_ids of records or manifests of the next level
+        :rtype: dict
+        """
+        data = self._get_asset_tx(tx_id)['asset']['data']
+        if 'manifest' not in data:
+            raise exceptions.NoManifestFoundException(tx_id)
+        return data['manifest']
+
+    def _resolve_manifest(self, root_id: str, max_workers: int = None) -> list:
+        """
+        Returns the transaction ids listed by a root manifest. The manifests of each level are retrieved concurrently.
+
+        :param root_id: Transaction id of the root manifest
+        :type root_id: str
+        :param max_workers: Maximum number of manifests retrieved concurrently (default: num_connections)
+        :type max_workers: int
+        :return: Transaction Ids of Document
+        :rtype: list
+        """
+        manifests = [self._get_manifest(root_id)]
+        with ThreadPoolExecutor(max_workers=max_workers or len(self.connections)) as executor:
+            while any('manifests' in manifest for manifest in manifests):
+                manifest_ids = [tx_id for manifest in manifests for tx_id in manifest.get('manifests', [])]
+                self._check_blocks(manifest_ids)
+                manifests = list(executor.map(self._get_manifest, manifest_ids))
+        document_tx_ids = [tx_id for manifest in manifests for tx_id in manifest.get('tx_ids', [])]
+        log.info("Resolved manifest %s to %s Tx", root_id, len(document_tx_ids))
+        return document_tx_ids
+
+    def _iter_documents(self, document_tx_ids: list or str, max_workers: int = None) -> Iterator[tuple]:
+        """
+        Retrieves, validates and parses the assets concurrently and yields their records in the order of the
+        transaction ids. At most 2 * max_workers assets are retrieved ahead of the consumer. The blocks of
+        each batch of 2 * max_workers transaction ids are checked at once before their assets are retrieved.
+
+        :param document_tx_ids: Transaction Ids of Document or transaction id of its root manifest
+        :type document_tx_ids: list or str
+        :param max_workers: Maximum number of assets retrieved concurrently (default: num_connections)
+        :type max_workers: int
+        :return: Iterator of (namespaces, record) tuples
+        :rtype: Iterator[tuple]
+        """
+        max_workers = max_workers or len(self.connections)
+        if isinstance(document_tx_ids, str):
+            document_tx_ids = self._resolve_manifest(document_tx_ids, max_workers)
+        tx_ids = self._checked_tx_ids(document_tx_ids, 2 * max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = deque(executor.submit(self._get_asset_document, tx_id)
+                            for tx_id in islice(tx_ids, 2 * max_workers))
+            try:
+                while futures:
+                    tmp_doc = futures.popleft().result()
+                    for tx_id in islice(tx_ids, 1):
+                        futures.append(executor.submit(self._get_asset_document, tx_id))
+                    namespaces = tmp_doc.get_registered_namespaces()
+                    for record in tmp_doc.get_records():
+                        yield namespaces, record
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def _get_documents(self, document_tx_ids: list or str, max_workers: int = None) -> provmodel.ProvDocument:
+        """
+        Retrieves, validates and parses all assets concurrently and merges them in the order of the transaction ids
+
+        :param document_tx_ids: Transaction Ids of Document or transaction id of its root manifest
+        :type document_tx_ids: list or str
+        :param max_workers: Maximum number of assets retrieved concurrently (default: num_connections)
+        :type max_workers: int
+        :return: Document as ProvDocument object
+        :rtype: ProvDocument
+        """
+        log.info("Retrieve and rebuild document...")
+        doc = provmodel.ProvDocument()
+        for namespaces, record in self._iter_documents(document_tx_ids, max_workers):
+            for namespace in namespaces:
+                doc.add_namespace(namespace)
+            doc.add_record(record=record)
+        log.info("Success")
+        return doc
+
     def _get_bigchain_connection(self) -> bd.BigchainDB:
         """
         Returns BigchainDB connection
@@ -86,12 +368,72 @@ class BaseClient(object):
         """
         raise NotImplementedError("Abstract method")
 
+    def compile_document(self, document: object, bundle_path: str) -> object:
+        """
+        Signs all transactions of a document without a BigchainDB node and writes them into a bundle file.
+        The local store records the accounts and transaction ids as if the document was saved.
+
+        :param document: Document to compile
+        :type document: object
+        :param bundle_path: Path of the bundle file
+        :type bundle_path: str
+        :return: Transaction ids as returned by save_document
+        :rtype: object
+        """
+        with bundles.BundleWriter(bundle_path) as writer:
+            self.bundle = writer
+            try:
+                return self.save_document(document)
+            finally:
+                self.bundle = None
+
+    def replay_bundle(self, bundle_path: str, max_workers: int = None) -> list:
+        """
+        Sends all transactions of a bundle file to BigchainDB and waits until they are valid.
+        All CREATEs are sent concurrently first, then all TRANSFERs.
+
+        :param bundle_path: Path of the bundle file
+        :type bundle_path: str
+        :param max_workers: Maximum number of transactions sent concurrently (default: num_connections)
+        :type max_workers: int
+        :return: Transaction ids of all records in the bundle
+        :rtype: list
+        """
+        txs = bundles.read_bundle(bundle_path)
+        creations, transfers = bundles.split_bundle(txs)
+        max_workers = max_workers or len(self.connections)
+        log.info("Replay %s transactions with %s workers", len(txs), max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(self._send_compiled, creations))
+            list(executor.map(self._send_compiled, transfers))
+        futures = [self.tracker.register(tx['id']) for tx in txs]
+        for future in futures:
+            future.result()
+        log.info("Replayed %s transactions", len(txs))
+        return bundles.record_tx_ids(txs)
+
+    def _send_compiled(self, tx: dict):
+        """
+        Sends a signed transaction of a bundle
+
+        :param tx: Fulfilled transaction
+        :type tx: dict
+        """
+        if utils.send_until_accepted(tx, self._get_bigchain_connection()) != tx:
+            raise exceptions.CreateRecordException(tx['id'])
+
 
 class DocumentConceptClient(BaseClient):
     """"""
 
+    account_class = accounts.DocumentConceptAccount
+
     def __init__(self, account_id: str = None, host: str = '0.0.0.0', port: int = 9984, num_connections: int = 1,
-                 local_store: local_stores.SqliteStore = local_stores.SqliteStore()):
+                 local_store: local_stores.SqliteStore = local_stores.SqliteStore(), pipelined: bool = False,
+                 event_stream_url: str = None, single_tx: bool = False, signing_processes: int = 0,
+                 nodes: list = None, timeout: float = None, keep_alive: bool = True,
+                 tx_cache: caches.TransactionCache = None, keypair_pool: keypairs.KeypairPool = None,
+                 deduplicate: bool = False, journal: bool = False):
         """
         Instantiate Document Client object
 
@@ -101,9 +443,38 @@ class DocumentConceptClient(BaseClient):
         :type port: int
         :param local_store: Local database object
         :type local_store: SqliteStore
+        :param pipelined: Send TRANSFER directly after CREATE and wait only on the TRANSFER (default: False)
+        :type pipelined: bool
+        :param event_stream_url: WebSocket URL of the valid transactions event stream used to wait on transactions
+                                 (default: poll only)
+        :type event_stream_url: str
+        :param single_tx: Store each record in a single CREATE owned by the final recipient instead of
+                          a CREATE followed by a TRANSFER (default: False)
+        :type single_tx: bool
+        :param signing_processes: Number of processes signing transactions (default: 0, sign in the saving threads)
+        :type signing_processes: int
+        :param nodes: URLs of all BigchainDB nodes, e.g. ['http://node1:9984', 'http://node2:9984']
+                      (default: host and port)
+        :type nodes: list
+        :param timeout: Timeout of a single HTTP request in seconds (default: no timeout, asyncio clients: 30)
+        :type timeout: float
+        :param keep_alive: Keep HTTP connections open and reuse them (default: True)
+        :type keep_alive: bool
+        :param tx_cache: Cache of retrieved transactions and documents (default: no cache)
+        :type tx_cache: TransactionCache
+        :param keypair_pool: Pool of pre-generated keypairs for new accounts (default: generate on demand)
+        :type keypair_pool: KeypairPool
+        :param deduplicate: Return the transactions of assets stored before instead of storing them again,
+                            e.g. when a document is saved again after a failure (default: False)
+        :type deduplicate: bool
+        :param journal: Record the progress of save_document in the local store, so that saving a document
+                        again after a failure sends only what is missing (default: False)
+        :type journal: bool
         """
-        super().__init__(host, port, num_connections, local_store)
-        self.account = accounts.DocumentConceptAccount(account_id, self.store)
+        super().__init__(host, port, num_connections, local_store, pipelined, event_stream_url, single_tx,
+                         signing_processes, nodes, timeout, keep_alive, tx_cache, keypair_pool, deduplicate,
+                         journal)
+        self.account = self.account_class(account_id, self.store, **self._account_options())
 
     def save_document(self, document: str or bytes or provmodel.ProvDocument) -> str:
         """
@@ -117,7 +488,16 @@ class DocumentConceptClient(BaseClient):
         log.info("Save document...")
         prov_document = utils.to_prov_document(content=document)
         asset = {'prov': prov_document.serialize(format='json')}
-        tx_id = self.account.save_asset(asset, self._get_bigchain_connection())
+        self.account.bundle = self.bundle
+        with self._journaled(prov_document) as journal_id:
+            account = self.account
+            if journal_id is not None:
+                # the account is shared by concurrent saves
+                account = copy.copy(self.account)
+                account.journal_id = journal_id
+            tx_id = account.save_asset(asset, self._get_bigchain_connection())
+        record_ids, relations = utils.index_records(prov_document.get_records())
+        self.store.write_index(tx_id, record_ids, relations)
         log.info("Saved document in Tx with id: %s", tx_id)
         return tx_id
 
@@ -131,20 +511,25 @@ class DocumentConceptClient(BaseClient):
         :rtype: ProvDocument
         """
         log.info("Retrieve and build document")
-        tx = self._get_bigchain_connection().transactions.retrieve(tx_id)
-        self.test_transaction(tx)
-        if 'id' in tx['asset'].keys():
-            tx = self._get_bigchain_connection().transactions.get(asset_id=tx['asset']['id'])[0]
-            self.test_transaction(tx)
+        document = self._get_asset_document(tx_id)
         log.info("Success")
-        return utils.to_prov_document(tx['asset']['data']['prov'])
+        if self.tx_cache is not None:
+            # the cached document is shared with later reads
+            document = copy.deepcopy(document)
+        return document
 
 
 class GraphConceptClient(BaseClient):
     """"""
 
+    account_class = accounts.GraphConceptAccount
+
     def __init__(self, host: str = '0.0.0.0', port: int = 9984, num_connections: int = 5,
-                 local_store: local_stores.SqliteStore = local_stores.SqliteStore()):
+                 local_store: local_stores.SqliteStore = local_stores.SqliteStore(), pipelined: bool = False,
+                 max_workers: int = None, event_stream_url: str = None, single_tx: bool = False,
+                 signing_processes: int = 0, nodes: list = None,
+                 timeout: float = None, keep_alive: bool = True, tx_cache: caches.TransactionCache = None,
+                 keypair_pool: keypairs.KeypairPool = None, deduplicate: bool = False, journal: bool = False):
         """
         Instantiate Graph Client object
 
@@ -154,8 +539,42 @@ class GraphConceptClient(BaseClient):
         :type port: int
         :param local_store: Local database object
         :type local_store: SqliteStore
+        :param pipelined: Send TRANSFER directly after CREATE and wait only on the TRANSFER (default: False)
+        :type pipelined: bool
+        :param max_workers: Maximum number of transactions saved concurrently (default: num_connections)
+        :type max_workers: int
+        :param event_stream_url: WebSocket URL of the valid transactions event stream used to wait on transactions
+                                 (default: poll only)
+        :type event_stream_url: str
+        :param single_tx: Store each record in a single CREATE owned by the final recipient instead of
+                          a CREATE followed by a TRANSFER (default: False)
+        :type single_tx: bool
+        :param signing_processes: Number of processes signing transactions (default: 0, sign in the saving threads)
+        :type signing_processes: int
+        :param nodes: URLs of all BigchainDB nodes, e.g. ['http://node1:9984', 'http://node2:9984']
+                      (default: host and port)
+        :type nodes: list
+        :param timeout: Timeout of a single HTTP request in seconds (default: no timeout, asyncio clients: 30)
+        :type timeout: float
+        :param keep_alive: Keep HTTP connections open and reuse them (default: True)
+        :type keep_alive: bool
+        :param tx_cache: Cache of retrieved transactions and documents (default: no cache)
+        :type tx_cache: TransactionCache
+        :param keypair_pool: Pool of pre-generated keypairs for new accounts (default: generate on demand)
+        :type keypair_pool: KeypairPool
+        :param deduplicate: Return the transactions of assets stored before instead of storing them again,
+                            e.g. when a document is saved again after a failure (default: False)
+        :type deduplicate: bool
+        :param journal: Record the progress of save_document in the local store, so that saving a document
+                        again after a failure sends only what is missing (default: False)
+        :type journal: bool
         """
-        super().__init__(host, port, num_connections, local_store=local_store)
+        super().__init__(host, port, num_connections, local_store=local_store, pipelined=pipelined,
+                         event_stream_url=event_stream_url, single_tx=single_tx,
+                         signing_processes=signing_processes, nodes=nodes, timeout=timeout,
+                         keep_alive=keep_alive, tx_cache=tx_cache, keypair_pool=keypair_pool, deduplicate=deduplicate,
+                         journal=journal)
+        self.max_workers = max_workers or num_connections
         self.accounts = []
 
     @staticmethod
@@ -185,74 +604,275 @@ class GraphConceptClient(BaseClient):
             elements.append((node, relations, namespaces))
         return elements
 
-    def save_document(self, document: str or BufferedReader or provmodel.ProvDocument) -> list:
+    def _schedule_document(self, document_accounts: list) -> (scheduler.DependencyScheduler, list, list):
         """
-        Write a document into BigchainDB
+        Plans all instance and relation transactions of a document with their dependencies.
+        A relation depends on the instances and relations (having ids) it refers to.
+
+        :param document_accounts: Accounts of the document
+        :type document_accounts: list
+        :return: Scheduler, keys of instance tasks and keys of relation tasks in serial order
+        :rtype: (DependencyScheduler, list, list)
+        """
+        tasks = scheduler.DependencyScheduler(self.max_workers)
+        instance_keys = []
+        for account in document_accounts:
+            key = ('instance', account.get_id())
+            tasks.add_task(key, account.save_instance_asset, (self._get_bigchain_connection(),))
+            instance_keys.append(key)
+
+        relations = []
+        relation_keys = {}
+        for account in document_accounts:
+            for index, relation in enumerate(account.prov_relations_with_id):
+                key = ('relation_with_id', account.get_id(), index)
+                relations.append((key, account, relation))
+                relation_keys[str(relation.identifier)] = key
+        for account in document_accounts:
+            for index, relation in enumerate(account.prov_relations_without_id):
+                relations.append((('relation_without_id', account.get_id(), index), account, relation))
+
+        account_ids = {account.get_id() for account in document_accounts}
+        for key, account, relation in relations:
+            depends_on = [('instance', account.get_id())]
+            for relation_type, relation_attr in relation.formal_attributes:
+                if relation_attr is None:
+                    continue
+                if str(relation_attr) in account_ids:
+                    depends_on.append(('instance', str(relation_attr)))
+                elif str(relation_attr) in relation_keys:
+                    depends_on.append(relation_keys[str(relation_attr)])
+            tasks.add_task(key, account.save_relation, (relation, self._get_bigchain_connection()), depends_on)
+        return tasks, instance_keys, [key for key, account, relation in relations]
+
+    def _prepare_document(self, document: str or BufferedReader or provmodel.ProvDocument,
+                          journal_id: str = None) -> (scheduler.DependencyScheduler, list):
+        """
+        Creates all accounts of a document and plans their transactions
 
         :param document: Document as JSON/XML/PROVN
         :type document: str or BufferedReader or ProvDocument
-        :return: List of transaction ids
-        :rtype: list
+        :param journal_id: Journal recording the progress of the document (default: no journal)
+        :type journal_id: str or None
+        :return: Scheduler and task keys in order of the resulting transaction ids
+        :rtype: (DependencyScheduler, list)
         """
-        log.info("Save document...")
-        document_tx_ids = []
         prov_document = utils.to_prov_document(content=document)
         elements = GraphConceptClient.calculate_account_data(prov_document)
         id_mapping = {}
-        log.info("Create and Save instances")
+        log.info("Create instances")
         for prov_element, prov_relations, namespaces in elements:
             for rel in prov_relations['with_id']:
                 id_mapping[rel.identifier] = ''
 
+        known_accounts = accounts.prefetch_accounts(self.store, [str(element[0].identifier) for element in elements],
+                                                    self.keypair_pool)
+        document_accounts = []
         for prov_element, prov_relations, namespaces in elements:
-            account = accounts.GraphConceptAccount(prov_element, prov_relations, id_mapping, namespaces, self.store)
-            self.accounts.append(account)
-            tx_id = account.save_instance_asset(self._get_bigchain_connection())
-            document_tx_ids.append(tx_id)
+            account = self.account_class(prov_element, prov_relations, id_mapping, namespaces, self.store,
+                                         known_accounts=known_accounts,
+                                         account=known_accounts[str(prov_element.identifier)],
+                                         **self._account_options(journal_id))
+            document_accounts.append(account)
+        self.accounts += document_accounts
+        tasks, instance_keys, relation_keys = self._schedule_document(document_accounts)
+        return tasks, instance_keys + relation_keys
+
+    def save_document(self, document: str or BufferedReader or provmodel.ProvDocument,
+                      manifest: bool = False) -> list or str:
+        """
+        Write a document into BigchainDB
 
-        log.info("Save relations with ids")
-        for account in filter(lambda acc: acc.has_relations_with_id, self.accounts):
-            document_tx_ids += account.save_relations_with_ids(self._get_bigchain_connection())
+        :param document: Document as JSON/XML/PROVN
+        :type document: str or BufferedReader or ProvDocument
+        :param manifest: Write a manifest listing all transaction ids and return the id of its root (default: False)
+        :type manifest: bool
+        :return: List of transaction ids or transaction id of the root manifest
+        :rtype: list or str
+        """
+        log.info("Save document...")
+        prov_document = utils.to_prov_document(content=document)
+        with self._journaled(prov_document) as journal_id:
+            tasks, keys = self._prepare_document(prov_document, journal_id)
+            log.info("Save instances and relations with %s workers", self.max_workers)
+            document_tx_ids = utils.collect_tx_ids(tasks.run(), keys)
+            log.info("Saved document in %s Tx", len(document_tx_ids))
+            if manifest:
+                return self._save_manifest(document_tx_ids, journal_id)
+            return document_tx_ids
+
+    def get_document(self, document_tx_ids: list or str, max_workers: int = None) -> provmodel.ProvDocument:
+        """
+        Retrieve a document by a list transaction ids or a root manifest id from BigchainDB.
+        The assets are retrieved concurrently, the records are merged in the order of the ids.
 
-        log.info("Save relations without ids")
-        for account in filter(lambda acc: acc.has_relations_without_id, self.accounts):
-            document_tx_ids += account.save_relations_without_ids(self._get_bigchain_connection())
+        :param document_tx_ids: Transaction Ids of Document or transaction id of its root manifest
+        :type document_tx_ids: list or str
+        :param max_workers: Maximum number of assets retrieved concurrently (default: max_workers of the client)
+        :type max_workers: int
+        :return: Document as ProvDocument object
+        :rtype: ProvDocument
+        """
+        return self._get_documents(document_tx_ids, max_workers or self.max_workers)
 
-        log.info("Saved document in %s Tx", len(document_tx_ids))
-        return document_tx_ids
+    def iter_document(self, document_tx_ids: list or str, max_workers: int = None) -> Iterator[tuple]:
+        """
+        Yields the records of a document by a list transaction ids or a root manifest id from BigchainDB as soon as
+        their transaction is retrieved and validated, in the order of the ids.
+        Use streaming.ProvJSONWriter to write them to a file.
+
+        :param document_tx_ids: Transaction Ids of Document or transaction id of its root manifest
+        :type document_tx_ids: list or str
+        :param max_workers: Maximum number of assets retrieved concurrently (default: max_workers of the client)
+        :type max_workers: int
+        :return: Iterator of (namespaces, record) tuples
+        :rtype: Iterator[tuple]
+        """
+        return self._iter_documents(document_tx_ids, max_workers or self.max_workers)
 
-    def get_document(self, document_tx_ids: list) -> provmodel.ProvDocument:
+    @staticmethod
+    def _relation_neighbours(tx: dict, document: provmodel.ProvDocument, direction: str) -> list:
         """
-        Retrieve a document by a list transaction ids from BigchainDB
+        Returns the transaction ids of the records a relation refers to, taken from the map of its asset
 
-        :param document_tx_ids: Transaction Ids of Document
-        :type document_tx_ids: list
-        :return: Document as ProvDocument object
+        :param tx: CREATE transaction of the relation
+        :type tx: dict
+        :param document: Provenance of the relation
+        :type document: ProvDocument
+        :param direction: out for the objects of the relation, in for its subject, both for all
+        :type direction: str
+        :return: Transaction ids
+        :rtype: list
+        """
+        mapping = tx['asset']['data']['map']
+        attributes = [value for _, value in document.get_records()[0].formal_attributes]
+        if direction == 'out':
+            attributes = attributes[1:]
+        elif direction == 'in':
+            attributes = attributes[:1]
+        return [mapping[str(value)] for value in attributes if value is not None and mapping.get(str(value))]
+
+    @staticmethod
+    def _output_tx_ids(instance_txs: list, outputs: list) -> list:
+        """
+        Returns the transaction ids of outputs except the transactions of the instance itself
+
+        :param instance_txs: CREATE of the instance and the TRANSFER to its account
+        :type instance_txs: list
+        :param outputs: Outputs with transaction_id and output_index
+        :type outputs: list
+        :return: Transaction ids
+        :rtype: list
+        """
+        instance_tx_ids = {instance_tx['id'] for instance_tx in instance_txs}
+        return [output['transaction_id'] for output in outputs if output['transaction_id'] not in instance_tx_ids]
+
+    def _instance_neighbours(self, tx: dict, direction: str) -> list:
+        """
+        Returns the transaction ids of the relations of an instance, found by the outputs of its account.
+        Outgoing relations are created by the account and transferred to the object, so their CREATEs are spent
+        outputs of the account. Incoming relations are unspent outputs of the account, like the TRANSFER of the
+        instance itself.
+
+        :param tx: CREATE transaction of the instance
+        :type tx: dict
+        :param direction: out for outgoing relations, in for incoming relations, both for all
+        :type direction: str
+        :return: Transaction ids
+        :rtype: list
+        """
+        public_key = tx['inputs'][0]['owners_before'][0]
+        connection = self._get_bigchain_connection()
+        outputs = []
+        instance_txs = [tx]
+        if direction in ('out', 'both'):
+            outputs += connection.outputs.get(public_key, spent=True)
+        if direction in ('in', 'both'):
+            outputs += connection.outputs.get(public_key, spent=False)
+            # the instance is transferred to its own account
+            instance_txs += connection.transactions.get(asset_id=tx['id'], operation='TRANSFER')
+        return self._output_tx_ids(instance_txs, outputs)
+
+    def _visit_record(self, tx_id: str, level: int, depth: int, direction: str) -> tuple:
+        """
+        Retrieves a record of a subgraph and the transaction ids of its neighbours
+
+        :param tx_id: Transaction id of an instance or relation
+        :type tx_id: str
+        :param level: Number of relations between the start record and the record
+        :type level: int
+        :param depth: Maximum level of the subgraph
+        :type depth: int
+        :param direction: in, out or both
+        :type direction: str
+        :return: CREATE transaction, provenance and list of tuples(transaction id, level) of the neighbours
+        :rtype: (dict, ProvDocument, list)
+        """
+        tx, document = self._get_asset(tx_id)
+        if level >= depth:
+            return tx, document, []
+        if 'map' in tx['asset']['data']:
+            return tx, document, [(neighbour, level + 1)
+                                  for neighbour in self._relation_neighbours(tx, document, direction)]
+        return tx, document, [(neighbour, level) for neighbour in self._instance_neighbours(tx, direction)]
+
+    def get_subgraph(self, start_tx_id: str, depth: int = 1, direction: str = 'both',
+                     max_workers: int = None) -> provmodel.ProvDocument:
+        """
+        Retrieve the records around a record by following the transaction ids in the map of the relation assets
+        breadth-first. The records of each level are retrieved concurrently.
+
+        :param start_tx_id: Transaction id of an instance or relation
+        :type start_tx_id: str
+        :param depth: Maximum number of relations between the start record and a returned record
+        :type depth: int
+        :param direction: out follows relations from subject to object (e.g. to the sources of a derivation),
+                          in from object to subject, both in either direction (default)
+        :type direction: str
+        :param max_workers: Maximum number of assets retrieved concurrently (default: max_workers of the client)
+        :type max_workers: int
+        :return: Subgraph as ProvDocument object
         :rtype: ProvDocument
         """
-        log.info("Retrieve and rebuild document...")
+        assert depth >= 0
+        assert direction in ('in', 'out', 'both')
+        log.info("Retrieve subgraph of %s with depth %s...", start_tx_id, depth)
         doc = provmodel.ProvDocument()
-        for i in document_tx_ids:
-            log.info("tx id: %s",i)
-            tx = self._get_bigchain_connection().transactions.get(asset_id=i)[0]
-            self.test_transaction(tx)
-            if 'id' in tx['asset'].keys():
-                tx = self._get_bigchain_connection().transactions.get(asset_id=tx['asset']['id'])[0]
-                self.test_transaction(tx)
-            tmp_doc = utils.to_prov_document(tx['asset']['data']['prov'])
-            for namespace in tmp_doc.get_registered_namespaces():
-                doc.add_namespace(namespace)
-            for record in tmp_doc.get_records():
-                doc.add_record(record=record)
-        log.info("Success")
+        visited = set()
+        requested = {start_tx_id}
+        frontier = [(start_tx_id, 0)]
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as executor:
+            while frontier:
+                results = list(executor.map(lambda item: self._visit_record(item[0], item[1], depth, direction),
+                                            frontier))
+                frontier = []
+                for tx, tmp_doc, neighbours in results:
+                    if tx['id'] in visited:
+                        continue
+                    visited.add(tx['id'])
+                    for namespace in tmp_doc.get_registered_namespaces():
+                        doc.add_namespace(namespace)
+                    for record in tmp_doc.get_records():
+                        doc.add_record(record=record)
+                    for tx_id, level in neighbours:
+                        if tx_id not in requested:
+                            requested.add(tx_id)
+                            frontier.append((tx_id, level))
+        log.info("Retrieved %s records", len(visited))
         return doc
 
 
 class RoleConceptClient(BaseClient):
     """"""
 
+    account_class = accounts.RoleConceptAccount
+
     def __init__(self, host: str = '0.0.0.0', port: int = 9984, num_connections: int = 5,
-                 local_store: local_stores.SqliteStore = local_stores.SqliteStore()):
+                 local_store: local_stores.SqliteStore = local_stores.SqliteStore(), pipelined: bool = False,
+                 max_workers: int = None, event_stream_url: str = None, single_tx: bool = False,
+                 signing_processes: int = 0, nodes: list = None,
+                 timeout: float = None, keep_alive: bool = True, tx_cache: caches.TransactionCache = None,
+                 keypair_pool: keypairs.KeypairPool = None, deduplicate: bool = False, journal: bool = False):
         """
         Instantiate Role Client object
 
@@ -262,8 +882,42 @@ class RoleConceptClient(BaseClient):
         :type port: int
         :param local_store: Local database object
         :type local_store: SqliteStore
+        :param pipelined: Send TRANSFER directly after CREATE and wait only on the TRANSFER (default: False)
+        :type pipelined: bool
+        :param max_workers: Maximum number of transactions saved concurrently (default: num_connections)
+        :type max_workers: int
+        :param event_stream_url: WebSocket URL of the valid transactions event stream used to wait on transactions
+                                 (default: poll only)
+        :type event_stream_url: str
+        :param single_tx: Store each record in a single CREATE owned by the final recipient instead of
+                          a CREATE followed by a TRANSFER (default: False)
+        :type single_tx: bool
+        :param signing_processes: Number of processes signing transactions (default: 0, sign in the saving threads)
+        :type signing_processes: int
+        :param nodes: URLs of all BigchainDB nodes, e.g. ['http://node1:9984', 'http://node2:9984']
+                      (default: host and port)
+        :type nodes: list
+        :param timeout: Timeout of a single HTTP request in seconds (default: no timeout, asyncio clients: 30)
+        :type timeout: float
+        :param keep_alive: Keep HTTP connections open and reuse them (default: True)
+        :type keep_alive: bool
+        :param tx_cache: Cache of retrieved transactions and documents (default: no cache)
+        :type tx_cache: TransactionCache
+        :param keypair_pool: Pool of pre-generated keypairs for new accounts (default: generate on demand)
+        :type keypair_pool: KeypairPool
+        :param deduplicate: Return the transactions of assets stored before instead of storing them again,
+                            e.g. when a document is saved again after a failure (default: False)
+        :type deduplicate: bool
+        :param journal: Record the progress of save_document in the local store, so that saving a document
+                        again after a failure sends only what is missing (default: False)
+        :type journal: bool
         """
-        super().__init__(host, port, num_connections, local_store=local_store)
+        super().__init__(host, port, num_connections, local_store=local_store, pipelined=pipelined,
+                         event_stream_url=event_stream_url, single_tx=single_tx,
+                         signing_processes=signing_processes, nodes=nodes, timeout=timeout,
+                         keep_alive=keep_alive, tx_cache=tx_cache, keypair_pool=keypair_pool, deduplicate=deduplicate,
+                         journal=journal)
+        self.max_workers = max_workers or num_connections
         self.accounts = []
 
     @staticmethod
@@ -319,59 +973,113 @@ class RoleConceptClient(BaseClient):
             accounts.append((agent, agent_relations, agent_elements, namespaces))
         return accounts
 
-    def save_document(self, document: str or BufferedReader or provmodel.ProvDocument) -> list:
+    def _schedule_document(self, document_accounts: list) -> (scheduler.DependencyScheduler, list, list):
         """
-        Write a document into BigchainDB
+        Plans all agent and element transactions of a document.
+        All agents are independent, an element only depends on the agent it belongs to.
+
+        :param document_accounts: Accounts of the document
+        :type document_accounts: list
+        :return: Scheduler, keys of agent tasks and keys of element tasks in serial order
+        :rtype: (DependencyScheduler, list, list)
+        """
+        tasks = scheduler.DependencyScheduler(self.max_workers)
+        instance_keys = []
+        element_keys = []
+        for account in document_accounts:
+            instance_key = ('instance', account.get_id())
+            tasks.add_task(instance_key, account.save_instance_asset, (self._get_bigchain_connection(),))
+            instance_keys.append(instance_key)
+        for account in document_accounts:
+            instance_key = ('instance', account.get_id())
+            for index, ordered_element in account.prov_elements.items():
+                for element, relations in ordered_element.items():
+                    key = ('element', account.get_id(), index)
+                    tasks.add_task(key, account.save_element, (element, relations, self._get_bigchain_connection()),
+                                   [instance_key])
+                    element_keys.append(key)
+        return tasks, instance_keys, element_keys
+
+    def _prepare_document(self, document: str or BufferedReader or provmodel.ProvDocument,
+                          journal_id: str = None) -> (scheduler.DependencyScheduler, list):
+        """
+        Creates all accounts of a document and plans their transactions
 
         :param document: Document as JSON/XML/PROVN
         :type document: str or BufferedReader or ProvDocument
-        :return: List of transaction ids
-        :rtype: list
+        :param journal_id: Journal recording the progress of the document (default: no journal)
+        :type journal_id: str or None
+        :return: Scheduler and task keys in order of the resulting transaction ids
+        :rtype: (DependencyScheduler, list)
         """
-        log.info("Save document...")
-        document_tx_ids = []
         prov_document = utils.to_prov_document(content=document)
         account_data = RoleConceptClient.calculate_account_data(prov_document)
 
         id_mapping = {}
-        log.info("Create and Save instances")
+        log.info("Create instances")
+        known_accounts = accounts.prefetch_accounts(self.store, [str(data[0].identifier) for data in account_data],
+                                                    self.keypair_pool)
+        document_accounts = []
         for agent, relations, elements, namespaces in account_data:
-            account = accounts.RoleConceptAccount(agent, relations, elements, id_mapping, namespaces, self.store)
-            self.accounts.append(account)
-            tx_id = account.save_instance_asset(self._get_bigchain_connection())
-            document_tx_ids.append(tx_id)
-
-        log.info("Save elements")
-        for account in self.accounts:
-            document_tx_ids += account.save_elements(self._get_bigchain_connection())
-
-        log.info("Saved document in %s Tx", len(document_tx_ids))
-        return document_tx_ids
+            account = self.account_class(agent, relations, elements, id_mapping, namespaces, self.store,
+                                         account=known_accounts[str(agent.identifier)],
+                                         **self._account_options(journal_id))
+            document_accounts.append(account)
+        self.accounts += document_accounts
+        tasks, instance_keys, element_keys = self._schedule_document(document_accounts)
+        return tasks, instance_keys + element_keys
+
+    def save_document(self, document: str or BufferedReader or provmodel.ProvDocument,
+                      manifest: bool = False) -> list or str:
+        """
+        Write a document into BigchainDB
 
-    def get_document(self, document_tx_ids: list) -> provmodel.ProvDocument:
+        :param document: Document as JSON/XML/PROVN
+        :type document: str or BufferedReader or ProvDocument
+        :param manifest: Write a manifest listing all transaction ids and return the id of its root (default: False)
+        :type manifest: bool
+        :return: List of transaction ids or transaction id of the root manifest
+        :rtype: list or str
         """
-        Returns a document by a list transaction ids from BigchainDB
+        log.info("Save document...")
+        prov_document = utils.to_prov_document(content=document)
+        with self._journaled(prov_document) as journal_id:
+            tasks, keys = self._prepare_document(prov_document, journal_id)
+            log.info("Save agents and elements with %s workers", self.max_workers)
+            document_tx_ids = utils.collect_tx_ids(tasks.run(), keys)
+            log.info("Saved document in %s Tx", len(document_tx_ids))
+            if manifest:
+                return self._save_manifest(document_tx_ids, journal_id)
+            return document_tx_ids
+
+    def get_document(self, document_tx_ids: list or str, max_workers: int = None) -> provmodel.ProvDocument:
+        """
+        Returns a document by a list transaction ids or a root manifest id from BigchainDB.
+        The assets are retrieved concurrently, the records are merged in the order of the ids.
 
-        :param document_tx_ids: Transaction Ids of Document
-        :type document_tx_ids: list
+        :param document_tx_ids: Transaction Ids of Document or transaction id of its root manifest
+        :type document_tx_ids: list or str
+        :param max_workers: Maximum number of assets retrieved concurrently (default: max_workers of the client)
+        :type max_workers: int
         :return: Document as ProvDocument object
         :rtype: ProvDocument
         """
-        log.info("Retrieve and rebuild document...")
-        doc = provmodel.ProvDocument()
-        for i in document_tx_ids:
-            tx = self._get_bigchain_connection().transactions.get(asset_id=i)[0]
-            self.test_transaction(tx)
-            if 'id' in tx['asset'].keys():
-                tx = self._get_bigchain_connection().transactions.get(asset_id=tx['asset']['id'])[0]
-                self.test_transaction(tx)
-            tmp_doc = utils.to_prov_document(tx['asset']['data']['prov'])
-            for namespace in tmp_doc.get_registered_namespaces():
-                doc.add_namespace(namespace)
-            for record in tmp_doc.get_records():
-                doc.add_record(record=record)
-        log.info("Success")
-        return doc
+        return self._get_documents(document_tx_ids, max_workers or self.max_workers)
+
+    def iter_document(self, document_tx_ids: list or str, max_workers: int = None) -> Iterator[tuple]:
+        """
+        Yields the records of a document by a list transaction ids or a root manifest id from BigchainDB as soon as
+        their transaction is retrieved and validated, in the order of the ids.
+        Use streaming.ProvJSONWriter to write them to a file.
+
+        :param document_tx_ids: Transaction Ids of Document or transaction id of its root manifest
+        :type document_tx_ids: list or str
+        :param max_workers: Maximum number of assets retrieved concurrently (default: max_workers of the client)
+        :type max_workers: int
+        :return: Iterator of (namespaces, record) tuples
+        :rtype: Iterator[tuple]
+        """
+        return self._iter_documents(document_tx_ids, max_workers or self.max_workers)
 
 
 
@@ -0,0 +1,384 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from bigchaindb_driver import BigchainDB
+from bigchaindb_driver import exceptions as bdb_exceptions
+from bigchaindb_driver import pool as bdpool
+
+from prov2bigchaindb.core import exceptions
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class _PendingTransaction(object):
+    """
+    Polling state of a single registered transaction
+    """
+
+    def __init__(self, future: Future, delay: float):
+        self.future = future
+        self.delay = delay
+        self.next_poll = time.monotonic() + delay
+        self.trials = 0
+
+
+class ConfirmationTracker(object):
+    """
+    Waits on many transactions at once. Transactions are registered by id and polled from one
+    background thread. Every transaction backs off exponentially while it is pending, so the
+    number of status requests stays low, even with many transactions in flight.
+    """
+
+    def __init__(self, bdb_connection: BigchainDB, initial_delay: float = 0.1, max_delay: float = 2.0,
+                 max_trials: int = 100, wait_timeout: float = 300.0):
+        """
+        Instantiate ConfirmationTracker object
+
+        :param bdb_connection: Connection object or pool of connections for BigchainDB
+        :type bdb_connection: BigchainDB or Pool
+        :param initial_delay: Seconds until a new transaction is polled the first time
+        :type initial_delay: float
+        :param max_delay: Maximum seconds between two polls of the same transaction
+        :type max_delay: float
+        :param max_trials: Number of failed polls (not found or transport error) until a transaction is given up
+        :type max_trials: int
+        :param wait_timeout: Maximum seconds wait() blocks if no timeout is given
+        :type wait_timeout: float
+        """
+        assert bdb_connection is not None
+        assert 0 < initial_delay <= max_delay
+        self.connection = bdb_connection
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.max_trials = max_trials
+        self.wait_timeout = wait_timeout
+        self.pending = {}
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopped = False
+
+    def register(self, tx_id: str) -> Future:
+        """
+        Registers a transaction and returns a future, which is resolved with the transaction id
+        as soon as the transaction is valid
+
+        :param tx_id: Id of transaction to wait on
+        :type tx_id: str
+        :return: Future of the transaction
+        :rtype: Future
+        """
+        with self.condition:
+            if self.stopped:
+                raise Exception("ConfirmationTracker is stopped")
+            if tx_id in self.pending:
+                return self.pending[tx_id].future
+            future = Future()
+            self.pending[tx_id] = _PendingTransaction(future, self._delays()[0])
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='ConfirmationTracker', daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        return future
+
+    def wait(self, tx_id: str, timeout: float = None):
+        """
+        Waits until a transaction is valid in BigchainDB
+
+        :param tx_id: Id of transaction to wait on
+        :type tx_id: str
+        :param timeout: Maximum seconds to wait (default: wait_timeout)
+        :type timeout: float or None
+        """
+        try:
+            self.register(tx_id).result(timeout if timeout is not None else self.wait_timeout)
+        except FutureTimeoutError:
+            log.error("Transaction %s is not valid after %s seconds", tx_id, timeout or self.wait_timeout)
+            raise exceptions.TransactionIdNotFound(tx_id)
+
+    def stop(self):
+        """
+        Stops the background thread. All pending futures are cancelled.
+        """
+        with self.condition:
+            self.stopped = True
+            for entry in self.pending.values():
+                entry.future.cancel()
+            self.pending.clear()
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+
+    def _get_connection(self) -> BigchainDB:
+        """
+        Returns the connection for the next poll
+
+        :return: BigchainDB connection object
+        :rtype: BigchainDB
+        """
+        if isinstance(self.connection, bdpool.Pool):
+            return self.connection.get_connection()
+        return self.connection
+
+    def _delays(self) -> tuple:
+        """
+        Returns the delay before the first poll and the maximum delay between two polls
+
+        :return: Initial and maximum delay in seconds
+        :rtype: tuple
+        """
+        return self.initial_delay, self.max_delay
+
+    def _resolve(self, tx_id: str):
+        """
+        Completes the future of a valid transaction. Must be called while holding the condition.
+
+        :param tx_id: Id of the valid transaction
+        :type tx_id: str
+        """
+        entry = self.pending.pop(tx_id, None)
+        if entry is not None:
+            entry.future.set_result(tx_id)
+
+    def _due(self) -> list:
+        """
+        Blocks until at least one transaction has to be polled
+
+        :return: Ids of due transactions or None if the tracker is stopped
+        :rtype: list or None
+        """
+        with self.condition:
+            while not self.stopped:
+                if not self.pending:
+                    self.condition.wait()
+                    continue
+                now = time.monotonic()
+                next_poll = min(entry.next_poll for entry in self.pending.values())
+                if next_poll > now:
+                    self.condition.wait(next_poll - now)
+                    continue
+                return [tx_id for tx_id, entry in self.pending.items() if entry.next_poll <= now]
+            return None
+
+    def _run(self):
+        """
+        Main loop of the background thread. If the loop fails, all pending futures fail with it.
+        """
+        try:
+            while True:
+                due = self._due()
+                if due is None:
+                    return
+                log.debug("Poll %s of %s pending transactions", len(due), len(self.pending))
+                for tx_id in due:
+                    self._poll(tx_id)
+        except Exception as e:
+            log.exception("ConfirmationTracker failed")
+            with self.condition:
+                for entry in self.pending.values():
+                    entry.future.set_exception(e)
+                self.pending.clear()
+
+    def _poll(self, tx_id: str):
+        """
+        Requests the status of a transaction once and updates its state
+
+        :param tx_id: Id of transaction to poll
+        :type tx_id: str
+        """
+        status, failed = None, False
+        try:
+            status = self._get_connection().transactions.status(tx_id).get('status')
+        except bdb_exceptions.NotFoundError:
+            failed = True
+        except Exception as e:
+            # the driver does not wrap every error of requests, e.g. timeouts
+            log.debug("Error on status of %s: %s", tx_id, e)
+            failed = True
+        with self.condition:
+            entry = self.pending.get(tx_id)
+            if entry is None:
+                return
+            if status == 'valid':
+                self._resolve(tx_id)
+                return
+            if status == 'invalid':
+                del self.pending[tx_id]
+                log.error("Transaction %s is invalid", tx_id)
+                entry.future.set_exception(exceptions.CreateRecordException(tx_id))
+                return
+            if failed:
+                entry.trials += 1
+                if entry.trials == self.max_trials:
+                    del self.pending[tx_id]
+                    log.error("Transaction id %s not found affer %s tries", tx_id, self.max_trials)
+                    entry.future.set_exception(exceptions.TransactionIdNotFound(tx_id))
+                    return
+            entry.delay = min(entry.delay * 2, self._delays()[1])
+            entry.next_poll = time.monotonic() + entry.delay
+
+
+class EventStreamTracker(ConfirmationTracker):
+    """
+    Resolves waits from the valid transactions event stream of a BigchainDB node
+    (e.g. ws://localhost:9985/api/v1/streams/valid_transactions). While the stream is connected,
+    pending transactions are only polled rarely as a safety net. If the stream drops, the tracker
+    falls back to regular polling until it is reconnected.
+    """
+
+    def __init__(self, bdb_connection: BigchainDB, stream_url: str, initial_delay: float = 0.1,
+                 max_delay: float = 2.0, max_trials: int = 100, stream_poll_delay: float = 10.0,
+                 recent_size: int = 10000, wait_timeout: float = 300.0):
+        """
+        Instantiate EventStreamTracker object
+
+        :param bdb_connection: Connection object or pool of connections for BigchainDB
+        :type bdb_connection: BigchainDB or Pool
+        :param stream_url: WebSocket URL of the valid transactions event stream
+        :type stream_url: str
+        :param initial_delay: Seconds until a new transaction is polled the first time
+        :type initial_delay: float
+        :param max_delay: Maximum seconds between two polls of the same transaction
+        :type max_delay: float
+        :param max_trials: Number of failed polls (not found or transport error) until a transaction is given up
+        :type max_trials: int
+        :param stream_poll_delay: Seconds between two polls of the same transaction while the stream is connected
+        :type stream_poll_delay: float
+        :param recent_size: Number of remembered valid transactions for waiters registering late
+        :type recent_size: int
+        :param wait_timeout: Maximum seconds wait() blocks if no timeout is given
+        :type wait_timeout: float
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for the event stream: pip install prov2bigchaindb[async]")
+        super().__init__(bdb_connection, initial_delay, max_delay, max_trials, wait_timeout)
+        self.stream_url = stream_url
+        self.stream_poll_delay = max(stream_poll_delay, max_delay)
+        self.recent_size = recent_size
+        self.recent = OrderedDict()
+        self.connected = False
+        self.receive_timeout = 0.5
+        self.stream_thread = None
+
+    def register(self, tx_id: str) -> Future:
+        """
+        Registers a transaction and returns a future, which is resolved with the transaction id
+        as soon as the transaction is valid
+
+        :param tx_id: Id of transaction to wait on
+        :type tx_id: str
+        :return: Future of the transaction
+        :rtype: Future
+        """
+        with self.condition:
+            if self.stream_thread is None and not self.stopped:
+                self.stream_thread = threading.Thread(target=self._run_stream, name='EventStreamTracker',
+                                                      daemon=True)
+                self.stream_thread.start()
+            if tx_id in self.recent:
+                future = Future()
+                future.set_result(tx_id)
+                return future
+            return super().register(tx_id)
+
+    def stop(self):
+        """
+        Stops the background threads. All pending futures are cancelled.
+        """
+        super().stop()
+        if self.stream_thread is not None:
+            self.stream_thread.join()
+
+    def _delays(self) -> tuple:
+        """
+        Returns the delay before the first poll and the maximum delay between two polls
+
+        :return: Initial and maximum delay in seconds
+        :rtype: tuple
+        """
+        if self.connected:
+            return self.stream_poll_delay, self.stream_poll_delay
+        return self.initial_delay, self.max_delay
+
+    def _set_connected(self, connected: bool):
+        """
+        Switches between event stream and polling. Without stream all pending transactions are polled again.
+
+        :param connected: True if the event stream is connected
+        :type connected: bool
+        """
+        with self.condition:
+            if self.connected == connected:
+                return
+            self.connected = connected
+            log.info("Event stream %s %s", self.stream_url, "connected" if connected else "disconnected")
+            if not connected:
+                now = time.monotonic()
+                for entry in self.pending.values():
+                    entry.delay = self.initial_delay
+                    entry.next_poll = now
+                self.condition.notify()
+
+    def _on_event(self, event: dict):
+        """
+        Handles a single event of the stream
+
+        :param event: Event with transaction_id, asset_id and block_id
+        :type event: dict
+        """
+        tx_id = event.get('transaction_id')
+        if tx_id is None:
+            return
+        with self.condition:
+            self._resolve(tx_id)
+            self.recent[tx_id] = True
+            if len(self.recent) > self.recent_size:
+                self.recent.popitem(last=False)
+
+    def _run_stream(self):
+        """
+        Main loop of the event stream thread
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._consume_stream())
+        finally:
+            loop.close()
+
+    async def _consume_stream(self):
+        """
+        Reads events from the stream and reconnects with exponential backoff until the tracker is stopped
+        """
+        delay = self.initial_delay
+        async with aiohttp.ClientSession() as session:
+            while not self.stopped:
+                try:
+                    async with session.ws_connect(self.stream_url) as ws:
+                        self._set_connected(True)
+                        delay = self.initial_delay
+                        while not self.stopped:
+                            try:
+                                message = await ws.receive(timeout=self.receive_timeout)
+                            except asyncio.TimeoutError:
+                                continue
+                            if message.type == aiohttp.WSMsgType.TEXT:
+                                self._on_event(json.loads(message.data))
+                            elif message.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING,
+                                                  aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError, ValueError) as e:
+                    log.debug("Event stream %s failed: %s", self.stream_url, e)
+                self._set_connected(False)
+                if not self.stopped:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.max_delay)
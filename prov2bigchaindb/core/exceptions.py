@@ -28,3 +28,7 @@ class TransactionIdNotFound(Prov2BigchainDBException):
 
 class BlockIdNotFound(Prov2BigchainDBException):
     pass
+
+
+class NoManifestFoundException(Prov2BigchainDBException):
+    pass
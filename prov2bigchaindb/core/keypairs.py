@@ -0,0 +1,260 @@
+import copy
+import functools
+import hashlib
+import hmac
+import logging
+import threading
+from collections import deque
+
+from bigchaindb_driver.crypto import CryptoKeypair, generate_keypair
+from cryptoconditions import crypto
+
+from prov2bigchaindb.core import exceptions, local_stores
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class KeypairPool(object):
+    """
+    Keeps a buffer of fresh keypairs for new accounts. A background thread refills the buffer
+    whenever keypairs are taken; if it runs empty, keypairs are generated in the calling thread.
+    """
+
+    def __init__(self, size: int = 100):
+        """
+        Instantiate KeypairPool object and start the background thread
+
+        :param size: Number of keypairs kept ready
+        :type size: int
+        """
+        assert size > 0
+        self.size = size
+        self.keypairs = deque()
+        self.condition = threading.Condition()
+        self.running = True
+        self.generated = 0
+        self.misses = 0
+        self.thread = threading.Thread(target=self._fill, name='KeypairPool', daemon=True)
+        self.thread.start()
+
+    def get(self) -> tuple:
+        """
+        Returns an unused keypair
+
+        :return: Tuple with private_key and public_key, as returned by generate_keypair
+        :rtype: tuple
+        """
+        with self.condition:
+            keypair = self.keypairs.popleft() if self.keypairs else None
+            self.condition.notify()
+            if keypair is None:
+                self.misses += 1
+        if keypair is None:
+            keypair = generate_keypair()
+        return keypair
+
+    def close(self):
+        """
+        Stops the background thread and drops all unused keypairs
+        """
+        with self.condition:
+            self.running = False
+            self.keypairs.clear()
+            self.condition.notify()
+        self.thread.join()
+
+    def _fill(self):
+        """
+        Generates keypairs until the buffer is full and waits until keypairs are taken
+        """
+        while True:
+            with self.condition:
+                while self.running and len(self.keypairs) >= self.size:
+                    self.condition.wait()
+                if not self.running:
+                    return
+            keypair = generate_keypair()
+            with self.condition:
+                if not self.running:
+                    return
+                self.keypairs.append(keypair)
+                self.generated += 1
+
+
+class KeyDerivation(object):
+    """
+    Derives the keypair of an account from a secret master seed and the id of the account.
+    Every derivation with the same seed and path returns the same keys, on every machine. A path
+    ("tenant/project") derives an independent key for each of its names in turn, so a child derivation
+    can be handed out without the master seed.
+    """
+
+    def __init__(self, master_seed: bytes, path: str = '', cache_size: int = 10000):
+        """
+        Instantiate KeyDerivation object
+
+        :param master_seed: Secret seed of at least 16 random bytes, e.g. os.urandom(32)
+        :type master_seed: bytes
+        :param path: Names separated by / (default: derive from the master key)
+        :type path: str
+        :param cache_size: Number of derived keypairs kept in memory
+        :type cache_size: int
+        """
+        assert len(master_seed) >= 16
+        self.key = hmac.new(b'prov2bigchaindb master seed', master_seed, hashlib.sha512).digest()
+        self.path = ''
+        self.cache_size = cache_size
+        for name in filter(None, path.split('/')):
+            self._descend(name)
+        self.derive = functools.lru_cache(maxsize=cache_size)(self._derive)
+
+    def child(self, name: str) -> 'KeyDerivation':
+        """
+        Returns the derivation of a name below the path of this derivation
+
+        :param name: Name of the child
+        :type name: str
+        :return: Child derivation
+        :rtype: KeyDerivation
+        """
+        child = copy.copy(self)
+        child._descend(name)
+        child.derive = functools.lru_cache(maxsize=self.cache_size)(child._derive)
+        return child
+
+    def _descend(self, name: str):
+        """
+        Replaces the key by the key of a name below the current path
+
+        :param name: Name of the child
+        :type name: str
+        """
+        self.key = hmac.new(self.key, name.encode('utf-8'), hashlib.sha512).digest()
+        self.path = '/'.join(filter(None, [self.path, name]))
+
+    def _derive(self, account_id: str) -> CryptoKeypair:
+        """
+        Derives the ed25519 keypair of an account
+
+        :param account_id: Internal id of the account
+        :type account_id: str
+        :return: Tuple with private_key and public_key encoded in base58
+        :rtype: CryptoKeypair
+        """
+        seed = hmac.new(self.key, account_id.encode('utf-8'), hashlib.sha512).digest()[:32]
+        private_key = crypto.Base58Encoder.encode(seed)
+        public_key = crypto.Ed25519SigningKey(private_key).get_verifying_key().encode(encoding='base58')
+        return CryptoKeypair(private_key.decode(), public_key.decode())
+
+
+class DerivedKeyStore(local_stores.StoreWrapper):
+    """
+    Store of accounts with derived keys. The wrapped store persists only the account ids and tx_ids,
+    the keys are derived on every read, so every account id is known. Rows which already contain keys
+    (written without derivation) keep their keys.
+    """
+
+    def __init__(self, store: local_stores.BaseStore, derivation: KeyDerivation):
+        """
+        Instantiate DerivedKeyStore object
+
+        :param store: Wrapped store
+        :type store: BaseStore
+        :param derivation: Derivation of the keys
+        :type derivation: KeyDerivation
+        """
+        super().__init__(store)
+        self.derivation = derivation
+
+    def _with_keys(self, account_id: str, row: tuple = None) -> tuple:
+        """
+        Completes a stored row with the derived keys
+
+        :param account_id: Id of account
+        :type account_id: str
+        :param row: Stored row (default: account without tx_id)
+        :type row: tuple or None
+        :return: Tuple with account_id, public_key, private_key and tx_id
+        :rtype: tuple
+        """
+        if row is not None and row[2]:
+            return row
+        private_key, public_key = self.derivation.derive(account_id)
+        return account_id, public_key, private_key, row[3] if row is not None else None
+
+    def write_account(self, account_id: str, public_key: str, private_key: str, tx_id: str = None):
+        """
+        Writes a new account entry without its keys, the given keys are ignored
+
+        :param tx_id: Transactions id
+        :type tx_id: str
+        :param account_id: Id of account
+        :type account_id: str
+        :param public_key: Public key of account
+        :type public_key: str
+        :param private_key: Private key of account
+        :type private_key: str
+        """
+        self.store.write_account(account_id, '', '', tx_id)
+
+    def get_account(self, account_id: str) -> tuple:
+        """
+        Returns tuple of account with the derived keys, also for accounts which are not stored
+
+        :param account_id: Id of account
+        :type account_id: str
+        :return: Tuple with account_id, public_key, private_key and tx_id
+        :rtype: tuple
+        """
+        try:
+            row = self.store.get_account(account_id)
+        except exceptions.NoAccountFoundException:
+            row = None
+        return self._with_keys(account_id, row)
+
+    def write_tx_id(self, account_id: str, tx_id: str):
+        """
+        Writes tx_id for given account_id and stores the account first if needed
+
+        :param account_id: Id of account
+        :type account_id: str
+        :param tx_id: Transaction id, which represents the account in BigchainDB
+        :type tx_id: str
+        """
+        self.write_tx_ids([(account_id, tx_id)])
+
+    def write_accounts(self, rows: list):
+        """
+        Writes many new account entries without their keys
+
+        :param rows: Tuples with account_id, public_key, private_key and tx_id
+        :type rows: list
+        """
+        self.store.write_accounts([(row[0], '', '', row[3]) for row in rows])
+
+    def get_accounts(self, account_ids: list) -> dict:
+        """
+        Returns the accounts of many account_ids with the derived keys
+
+        :param account_ids: Ids of accounts
+        :type account_ids: list
+        :return: Tuples with account_id, public_key, private_key and tx_id by account_id
+        :rtype: dict
+        """
+        rows = self.store.get_accounts(account_ids)
+        return {account_id: self._with_keys(account_id, rows.get(account_id)) for account_id in account_ids}
+
+    def write_tx_ids(self, pairs: list):
+        """
+        Writes the tx_ids of many accounts and stores the missing accounts
+
+        :param pairs: Tuples with account_id and tx_id
+        :type pairs: list
+        """
+        with self.store.batch():
+            stored = self.store.get_accounts([account_id for account_id, _ in pairs])
+            new_rows = [(account_id, '', '', tx_id) for account_id, tx_id in pairs if account_id not in stored]
+            if new_rows:
+                self.store.write_accounts(new_rows)
+            self.store.write_tx_ids([pair for pair in pairs if pair[0] in stored])
@@ -1,4 +1,8 @@
+import contextlib
+import json
 import logging
+import threading
+from collections import OrderedDict
 
 import sqlite3
 from prov2bigchaindb.core import exceptions
@@ -22,6 +26,18 @@ class BaseStore(object):
         """
         raise NotImplementedError("Abstract method")
 
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Commits all writes inside the with block at once (default: each write is committed on its own)
+        """
+        yield
+
+    def close(self):
+        """
+        Closes the database
+        """
+
     def write_account(self, account_id: str, public_key: str, private_key: str, tx_id: str = None):
         """
         Writes a new account entry in to the table accounts
@@ -59,28 +75,379 @@ class BaseStore(object):
         """
         raise NotImplementedError("Abstract method")
 
+    def write_accounts(self, rows: list):
+        """
+        Writes many new account entries into the table accounts at once
+
+        :param rows: Tuples with account_id, public_key, private_key and tx_id
+        :type rows: list
+        """
+        raise NotImplementedError("Abstract method")
+
+    def get_accounts(self, account_ids: list) -> dict:
+        """
+        Returns the accounts of many account_ids at once
+
+        :param account_ids: Ids of accounts
+        :type account_ids: list
+        :return: Tuples with account_id, public_key, private_key and tx_id by account_id, unknown ids are missing
+        :rtype: dict
+        """
+        raise NotImplementedError("Abstract method")
+
+    def write_tx_ids(self, pairs: list):
+        """
+        Writes the tx_ids of many accounts at once
+
+        :param pairs: Tuples with account_id and tx_id
+        :type pairs: list
+        """
+        raise NotImplementedError("Abstract method")
+
+    def write_index(self, tx_id: str, record_ids: list, relations: list):
+        """
+        Writes the records and relations stored in a transaction into the local index
+
+        :param tx_id: Transaction id
+        :type tx_id: str
+        :param record_ids: Identifiers of the records
+        :type record_ids: list
+        :param relations: Tuples(relation type, subject, object) of the relations
+        :type relations: list
+        """
+        raise NotImplementedError("Abstract method")
+
+    def write_document(self, document_id: str, tx_ids: list):
+        """
+        Writes the transaction ids of a document into the local index
+
+        :param document_id: Id of the document, e.g. the transaction id of its root manifest
+        :type document_id: str
+        :param tx_ids: Transaction ids of the document
+        :type tx_ids: list
+        """
+        raise NotImplementedError("Abstract method")
+
+    def get_document_tx_ids(self, document_id: str) -> list:
+        """
+        Returns the transaction ids of a document
+
+        :param document_id: Id of the document
+        :type document_id: str
+        :return: Transaction ids in the order of the document
+        :rtype: list
+        """
+        raise NotImplementedError("Abstract method")
+
+    def write_asset_hash(self, content_hash: str, tx_id: str):
+        """
+        Remembers the transaction storing an asset
+
+        :param content_hash: Hash of the asset and its owners, see utils.asset_hash
+        :type content_hash: str
+        :param tx_id: Transaction id of the record
+        :type tx_id: str
+        """
+        raise NotImplementedError("Abstract method")
+
+    def get_asset_tx_id(self, content_hash: str) -> str:
+        """
+        Returns the transaction storing an asset
+
+        :param content_hash: Hash of the asset and its owners, see utils.asset_hash
+        :type content_hash: str
+        :return: Transaction id of the record or None if the asset was not stored
+        :rtype: str or None
+        """
+        raise NotImplementedError("Abstract method")
+
+    def write_journal_step(self, journal_id: str, step: str, txs: list):
+        """
+        Records the signed transactions of a planned step in the journal of a document.
+        A step which is already recorded keeps its transactions.
+
+        :param journal_id: Id of the journal, see utils.document_hash
+        :type journal_id: str
+        :param step: Id of the step, see utils.asset_hash
+        :type step: str
+        :param txs: Fulfilled transactions of the step
+        :type txs: list
+        """
+        raise NotImplementedError("Abstract method")
+
+    def write_journal_state(self, journal_id: str, step: str, state: str):
+        """
+        Updates the state of a step in the journal of a document
+
+        :param journal_id: Id of the journal
+        :type journal_id: str
+        :param step: Id of the step
+        :type step: str
+        :param state: planned, sent or valid
+        :type state: str
+        """
+        raise NotImplementedError("Abstract method")
+
+    def get_journal_step(self, journal_id: str, step: str) -> tuple:
+        """
+        Returns a step of the journal of a document
+
+        :param journal_id: Id of the journal
+        :type journal_id: str
+        :param step: Id of the step
+        :type step: str
+        :return: Tuple with the fulfilled transactions and the state or None if the step is not recorded
+        :rtype: tuple or None
+        """
+        raise NotImplementedError("Abstract method")
+
+    def get_journal(self, journal_id: str) -> dict:
+        """
+        Returns the progress of a document
+
+        :param journal_id: Id of the journal
+        :type journal_id: str
+        :return: States by step
+        :rtype: dict
+        """
+        raise NotImplementedError("Abstract method")
+
+    def delete_journal(self, journal_id: str):
+        """
+        Removes the journal of a document
+
+        :param journal_id: Id of the journal
+        :type journal_id: str
+        """
+        raise NotImplementedError("Abstract method")
+
+    def find_records(self, record_id: str) -> list:
+        """
+        Returns the ids of all transactions holding a record or a relation of it
+
+        :param record_id: PROV identifier, e.g. ex:entity
+        :type record_id: str
+        :return: Transaction ids
+        :rtype: list
+        """
+        raise NotImplementedError("Abstract method")
+
+    def find_relations(self, subject: str = None, obj: str = None) -> list:
+        """
+        Returns the relations between two records
+
+        :param subject: PROV identifier of the subject (default: any)
+        :type subject: str
+        :param obj: PROV identifier of the object (default: any)
+        :type obj: str
+        :return: Tuples(transaction id, relation type, subject, object)
+        :rtype: list
+        """
+        raise NotImplementedError("Abstract method")
+
+    def ancestors(self, record_id: str, depth: int = None) -> list:
+        """
+        Returns the records a record depends on, following relations from subject to object
+
+        :param record_id: PROV identifier
+        :type record_id: str
+        :param depth: Maximum number of relations (default: unlimited)
+        :type depth: int
+        :return: PROV identifiers, closest first if depth is given
+        :rtype: list
+        """
+        raise NotImplementedError("Abstract method")
+
+    def descendants(self, record_id: str, depth: int = None) -> list:
+        """
+        Returns the records depending on a record, following relations from object to subject
+
+        :param record_id: PROV identifier
+        :type record_id: str
+        :param depth: Maximum number of relations (default: unlimited)
+        :type depth: int
+        :return: PROV identifiers, closest first if depth is given
+        :rtype: list
+        """
+        raise NotImplementedError("Abstract method")
+
+
+INDEX_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS records (record_id TEXT, tx_id TEXT, PRIMARY KEY (record_id, tx_id));
+CREATE TABLE IF NOT EXISTS relations (tx_id TEXT, relation_type TEXT, subject TEXT, object TEXT,
+                                      PRIMARY KEY (tx_id, relation_type, subject, object));
+CREATE INDEX IF NOT EXISTS relations_subject ON relations (subject);
+CREATE INDEX IF NOT EXISTS relations_object ON relations (object);
+CREATE TABLE IF NOT EXISTS documents (document_id TEXT, position INTEGER, tx_id TEXT,
+                                      PRIMARY KEY (document_id, position));
+CREATE TABLE IF NOT EXISTS assets (content_hash TEXT PRIMARY KEY, tx_id TEXT);
+CREATE TABLE IF NOT EXISTS journal (journal_id TEXT, step TEXT, txs TEXT, state TEXT,
+                                    PRIMARY KEY (journal_id, step));
+'''
+
+LINEAGE_QUERY = '''
+WITH RECURSIVE lineage(record_id, depth) AS (
+    SELECT ?, 0
+    UNION
+    SELECT relations.{next_column}, lineage.depth + 1 FROM relations
+    JOIN lineage ON relations.{column} = lineage.record_id WHERE lineage.depth < ?
+)
+SELECT record_id FROM lineage WHERE record_id != ? GROUP BY record_id ORDER BY MIN(depth), record_id
+'''
+
+CLOSURE_QUERY = '''
+WITH RECURSIVE lineage(record_id) AS (
+    SELECT ?
+    UNION
+    SELECT relations.{next_column} FROM relations JOIN lineage ON relations.{column} = lineage.record_id
+)
+SELECT record_id FROM lineage WHERE record_id != ?
+'''
+
 
 class SqliteStore(BaseStore):
-    def __init__(self, db_name: str = ':memory:'):
+    # SQLite limits the number of parameters of a statement (999 in older versions)
+    MAX_VARIABLES = 900
+
+    def __init__(self, db_name: str = ':memory:', synchronous: str = 'NORMAL', cache_size: int = -16000,
+                 mmap_size: int = 0, timeout: float = 30.0, pool_size: int = 8):
         """
         Instantiate LocalStore object for handling the sqlite3 database which stores all accounts (PoC!)
+        An in-memory database has one connection, which is shared by all threads and guarded by a lock.
+        A database file is opened in WAL mode, so readers do not block the writer; each operation borrows
+        a connection from a pool and several threads or processes can share the file.
 
-        :param db_name: Name of local database file
+        :param db_name: Name of local database file (default: in memory)
         :type db_name: str
+        :param synchronous: PRAGMA synchronous of file connections, NORMAL is safe in WAL mode
+        :type synchronous: str
+        :param cache_size: PRAGMA cache_size of file connections, negative values in KiB
+        :type cache_size: int
+        :param mmap_size: PRAGMA mmap_size of file connections in bytes (default: 0, no memory mapping)
+        :type mmap_size: int
+        :param timeout: Seconds to wait for the write lock of another connection
+        :type timeout: float
+        :param pool_size: Maximum number of idle file connections kept open
+        :type pool_size: int
         """
-        self.conn = sqlite3.connect(db_name)
+        self.shared = db_name == ':memory:'
+        self.lock = threading.RLock()
+        self.local = threading.local()
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.pool = []
+        self.pool_lock = threading.Lock()
+        self.pragmas = ['PRAGMA synchronous={}'.format(synchronous), 'PRAGMA cache_size={}'.format(int(cache_size)),
+                        'PRAGMA mmap_size={}'.format(int(mmap_size))]
+        if self.shared:
+            self.conn = sqlite3.connect(db_name, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(db_name, timeout=timeout, check_same_thread=False)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            for pragma in self.pragmas:
+                self.conn.execute(pragma)
         # Create table
         self.conn.execute(
             '''CREATE TABLE IF NOT EXISTS accounts (account_id TEXT, public_key TEXT, private_key TEXT, tx_id TEXT, PRIMARY KEY (account_id, public_key))''')
+        self.conn.executescript(INDEX_SCHEMA)
         super().__init__(db_name)
+        if not self.shared:
+            self.pool.append(self.conn)
+
+    def _acquire(self) -> sqlite3.Connection:
+        """
+        Takes an idle file connection from the pool or opens a new one
+
+        :return: Connection
+        :rtype: sqlite3.Connection
+        """
+        with self.pool_lock:
+            if self.pool:
+                return self.pool.pop()
+        conn = sqlite3.connect(self.db_name, timeout=self.timeout, check_same_thread=False)
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        return conn
+
+    def _release(self, conn: sqlite3.Connection):
+        """
+        Returns a file connection to the pool or closes it if the pool is full
+
+        :param conn: Connection
+        :type conn: sqlite3.Connection
+        """
+        with self.pool_lock:
+            if len(self.pool) < self.pool_size:
+                self.pool.append(conn)
+                return
+        conn.close()
+
+    @contextlib.contextmanager
+    def _read(self):
+        """
+        Provides the connection of the running batch, the shared connection or a pooled connection
+        """
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            yield conn
+        elif self.shared:
+            with self.lock:
+                yield self.conn
+        else:
+            conn = self._acquire()
+            try:
+                yield conn
+            finally:
+                self._release(conn)
+
+    @contextlib.contextmanager
+    def _write(self):
+        """
+        Provides a connection and commits the changes, unless a batch of this thread commits them later
+        """
+        in_batch = getattr(self.local, 'conn', None) is not None
+        with self._read() as conn:
+            if in_batch:
+                yield conn
+            else:
+                with conn:
+                    yield conn
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Commits all writes of the calling thread inside the with block in one transaction,
+        or rolls them back on an exception. Batches may be nested, the outermost one commits.
+        """
+        if getattr(self.local, 'conn', None) is not None:
+            yield
+            return
+        with self._read() as conn:
+            self.local.conn = conn
+            try:
+                with conn:
+                    yield
+            finally:
+                self.local.conn = None
+
+    def close(self):
+        """
+        Closes all idle connections
+        """
+        with self.pool_lock:
+            pool, self.pool = self.pool, []
+        for conn in pool:
+            conn.close()
+        if self.shared:
+            self.conn.close()
 
     def clean_tables(self):
         """
         Delete all entries from all tables (Used for unit tests)
         """
-        with self.conn:
-            tables = list(self.conn.execute('''SELECT name FROM sqlite_master WHERE type IS "table"'''))
-            self.conn.cursor().executescript(';'.join(["DELETE FROM %s" % i for i in tables]))
+        with self._write() as conn:
+            tables = list(conn.execute('''SELECT name FROM sqlite_master WHERE type IS "table"'''))
+            conn.cursor().executescript(';'.join(["DELETE FROM %s" % i for i in tables]))
 
     def write_account(self, account_id: str, public_key: str, private_key: str, tx_id: str = None):
         """
@@ -95,8 +462,8 @@ class SqliteStore(BaseStore):
         :param private_key: Private key of account
         :type private_key: str
         """
-        with self.conn:
-            self.conn.execute('INSERT INTO accounts VALUES (?,?,?,?)', (account_id, public_key, private_key, tx_id))
+        with self._write() as conn:
+            conn.execute('INSERT INTO accounts VALUES (?,?,?,?)', (account_id, public_key, private_key, tx_id))
 
     def get_account(self, account_id: str) -> tuple:
         """
@@ -107,9 +474,10 @@ class SqliteStore(BaseStore):
         :return: Tuple with account_id, public_key, private_key and tx_id
         :rtype: tuple
         """
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM accounts WHERE account_id=?', (account_id,))
-        ret = cursor.fetchone()
+        with self._read() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM accounts WHERE account_id=?', (account_id,))
+            ret = cursor.fetchone()
         if ret is None:
             raise exceptions.NoAccountFoundException("No account with id " + account_id)
         return ret
@@ -123,5 +491,623 @@ class SqliteStore(BaseStore):
         :param tx_id: Transaction id, which represents the account in BigchainDB
         :type tx_id: str
         """
-        with self.conn:
-            self.conn.execute('UPDATE accounts SET tx_id=? WHERE account_id=? ', (tx_id, account_id))
+        with self._write() as conn:
+            conn.execute('UPDATE accounts SET tx_id=? WHERE account_id=? ', (tx_id, account_id))
+
+    def write_accounts(self, rows: list):
+        """
+        Writes many new account entries into the table accounts in one transaction
+
+        :param rows: Tuples with account_id, public_key, private_key and tx_id
+        :type rows: list
+        """
+        with self._write() as conn:
+            conn.executemany('INSERT INTO accounts VALUES (?,?,?,?)', rows)
+
+    def get_accounts(self, account_ids: list) -> dict:
+        """
+        Returns the accounts of many account_ids with one query per MAX_VARIABLES ids
+
+        :param account_ids: Ids of accounts
+        :type account_ids: list
+        :return: Tuples with account_id, public_key, private_key and tx_id by account_id, unknown ids are missing
+        :rtype: dict
+        """
+        account_ids = list(dict.fromkeys(account_ids))
+        accounts = {}
+        with self._read() as conn:
+            for i in range(0, len(account_ids), self.MAX_VARIABLES):
+                chunk = account_ids[i:i + self.MAX_VARIABLES]
+                query = 'SELECT * FROM accounts WHERE account_id IN ({})'.format(','.join('?' * len(chunk)))
+                for row in conn.execute(query, chunk):
+                    accounts.setdefault(row[0], row)
+        return accounts
+
+    def write_tx_ids(self, pairs: list):
+        """
+        Writes the tx_ids of many accounts in one transaction
+
+        :param pairs: Tuples with account_id and tx_id
+        :type pairs: list
+        """
+        with self._write() as conn:
+            conn.executemany('UPDATE accounts SET tx_id=? WHERE account_id=? ',
+                             [(tx_id, account_id) for account_id, tx_id in pairs])
+
+    def write_index(self, tx_id: str, record_ids: list, relations: list):
+        """
+        Writes the records and relations stored in a transaction into the local index
+
+        :param tx_id: Transaction id
+        :type tx_id: str
+        :param record_ids: Identifiers of the records
+        :type record_ids: list
+        :param relations: Tuples(relation type, subject, object) of the relations
+        :type relations: list
+        """
+        with self._write() as conn:
+            conn.executemany('INSERT OR IGNORE INTO records VALUES (?,?)',
+                             [(record_id, tx_id) for record_id in record_ids])
+            conn.executemany('INSERT OR IGNORE INTO relations VALUES (?,?,?,?)',
+                             [(tx_id,) + tuple(relation) for relation in relations])
+
+    def write_document(self, document_id: str, tx_ids: list):
+        """
+        Writes the transaction ids of a document into the local index
+
+        :param document_id: Id of the document, e.g. the transaction id of its root manifest
+        :type document_id: str
+        :param tx_ids: Transaction ids of the document
+        :type tx_ids: list
+        """
+        with self._write() as conn:
+            conn.execute('DELETE FROM documents WHERE document_id=?', (document_id,))
+            conn.executemany('INSERT INTO documents VALUES (?,?,?)',
+                             [(document_id, position, tx_id) for position, tx_id in enumerate(tx_ids)])
+
+    def get_document_tx_ids(self, document_id: str) -> list:
+        """
+        Returns the transaction ids of a document
+
+        :param document_id: Id of the document
+        :type document_id: str
+        :return: Transaction ids in the order of the document
+        :rtype: list
+        """
+        with self._read() as conn:
+            rows = conn.execute('SELECT tx_id FROM documents WHERE document_id=? ORDER BY position',
+                                (document_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def write_asset_hash(self, content_hash: str, tx_id: str):
+        """
+        Remembers the transaction storing an asset
+
+        :param content_hash: Hash of the asset and its owners, see utils.asset_hash
+        :type content_hash: str
+        :param tx_id: Transaction id of the record
+        :type tx_id: str
+        """
+        with self._write() as conn:
+            conn.execute('INSERT OR REPLACE INTO assets VALUES (?,?)', (content_hash, tx_id))
+
+    def get_asset_tx_id(self, content_hash: str) -> str:
+        """
+        Returns the transaction storing an asset
+
+        :param content_hash: Hash of the asset and its owners, see utils.asset_hash
+        :type content_hash: str
+        :return: Transaction id of the record or None if the asset was not stored
+        :rtype: str or None
+        """
+        with self._read() as conn:
+            row = conn.execute('SELECT tx_id FROM assets WHERE content_hash=?', (content_hash,)).fetchone()
+        return row[0] if row is not None else None
+
+    def write_journal_step(self, journal_id: str, step: str, txs: list):
+        """
+        Records the signed transactions of a planned step in the journal of a document.
+        A step which is already recorded keeps its transactions.
+
+        :param journal_id: Id of the journal, see utils.document_hash
+        :type journal_id: str
+        :param step: Id of the step, see utils.asset_hash
+        :type step: str
+        :param txs: Fulfilled transactions of the step
+        :type txs: list
+        """
+        with self._write() as conn:
+            conn.execute('INSERT OR IGNORE INTO journal VALUES (?,?,?,?)',
+                         (journal_id, step, json.dumps(txs), 'planned'))
+
+    def write_journal_state(self, journal_id: str, step: str, state: str):
+        """
+        Updates the state of a step in the journal of a document
+
+        :param journal_id: Id of the journal
+        :type journal_id: str
+        :param step: Id of the step
+        :type step: str
+        :param state: planned, sent or valid
+        :type state: str
+        """
+        with self._write() as conn:
+            conn.execute('UPDATE journal SET state=? WHERE journal_id=? AND step=?', (state, journal_id, step))
+
+    def get_journal_step(self, journal_id: str, step: str) -> tuple:
+        """
+        Returns a step of the journal of a document
+
+        :param journal_id: Id of the journal
+        :type journal_id: str
+        :param step: Id of the step
+        :type step: str
+        :return: Tuple with the fulfilled transactions and the state or None if the step is not recorded
+        :rtype: tuple or None
+        """
+        with self._read() as conn:
+            row = conn.execute('SELECT txs, state FROM journal WHERE journal_id=? AND step=?',
+                               (journal_id, step)).fetchone()
+        return (json.loads(row[0]), row[1]) if row is not None else None
+
+    def get_journal(self, journal_id: str) -> dict:
+        """
+        Returns the progress of a document
+
+        :param journal_id: Id of the journal
+        :type journal_id: str
+        :return: States by step
+        :rtype: dict
+        """
+        with self._read() as conn:
+            rows = conn.execute('SELECT step, state FROM journal WHERE journal_id=?', (journal_id,)).fetchall()
+        return dict(rows)
+
+    def delete_journal(self, journal_id: str):
+        """
+        Removes the journal of a document
+
+        :param journal_id: Id of the journal
+        :type journal_id: str
+        """
+        with self._write() as conn:
+            conn.execute('DELETE FROM journal WHERE journal_id=?', (journal_id,))
+
+    def find_records(self, record_id: str) -> list:
+        """
+        Returns the ids of all transactions holding a record or a relation of it
+
+        :param record_id: PROV identifier, e.g. ex:entity
+        :type record_id: str
+        :return: Transaction ids
+        :rtype: list
+        """
+        with self._read() as conn:
+            rows = conn.execute('SELECT tx_id FROM records WHERE record_id=? '
+                                'UNION SELECT tx_id FROM relations WHERE subject=? OR object=?',
+                                (record_id, record_id, record_id)).fetchall()
+        return [row[0] for row in rows]
+
+    def find_relations(self, subject: str = None, obj: str = None) -> list:
+        """
+        Returns the relations between two records
+
+        :param subject: PROV identifier of the subject (default: any)
+        :type subject: str
+        :param obj: PROV identifier of the object (default: any)
+        :type obj: str
+        :return: Tuples(transaction id, relation type, subject, object)
+        :rtype: list
+        """
+        with self._read() as conn:
+            return conn.execute('SELECT * FROM relations WHERE (?1 IS NULL OR subject=?1) '
+                                'AND (?2 IS NULL OR object=?2)', (subject, obj)).fetchall()
+
+    def _lineage(self, record_id: str, depth: int, column: str, next_column: str) -> list:
+        """
+        Returns the records reachable by relations in one direction
+
+        :param record_id: PROV identifier
+        :type record_id: str
+        :param depth: Maximum number of relations or None
+        :type depth: int
+        :param column: Column of the reached record
+        :type column: str
+        :param next_column: Column of the next record
+        :type next_column: str
+        :return: PROV identifiers
+        :rtype: list
+        """
+        with self._read() as conn:
+            if depth is None:
+                # without depth only the identifiers are compared, so cycles end the recursion
+                query = CLOSURE_QUERY.format(column=column, next_column=next_column)
+                rows = conn.execute(query, (record_id, record_id))
+            else:
+                query = LINEAGE_QUERY.format(column=column, next_column=next_column)
+                rows = conn.execute(query, (record_id, depth, record_id))
+            return [row[0] for row in rows.fetchall()]
+
+    def ancestors(self, record_id: str, depth: int = None) -> list:
+        """
+        Returns the records a record depends on, following relations from subject to object
+
+        :param record_id: PROV identifier
+        :type record_id: str
+        :param depth: Maximum number of relations (default: unlimited)
+        :type depth: int
+        :return: PROV identifiers, closest first if depth is given
+        :rtype: list
+        """
+        return self._lineage(record_id, depth, 'subject', 'object')
+
+    def descendants(self, record_id: str, depth: int = None) -> list:
+        """
+        Returns the records depending on a record, following relations from object to subject
+
+        :param record_id: PROV identifier
+        :type record_id: str
+        :param depth: Maximum number of relations (default: unlimited)
+        :type depth: int
+        :return: PROV identifiers, closest first if depth is given
+        :rtype: list
+        """
+        return self._lineage(record_id, depth, 'object', 'subject')
+
+
+class StoreWrapper(BaseStore):
+    """
+    Passes all calls to a wrapped store. Subclasses override the methods they change.
+    """
+
+    def __init__(self, store: BaseStore):
+        """
+        Instantiate StoreWrapper object
+
+        :param store: Wrapped store
+        :type store: BaseStore
+        """
+        super().__init__(store.db_name)
+        self.store = store
+
+    def clean_tables(self):
+        """
+        Delete all entries from all tables (Used for unit tests)
+        """
+        self.store.clean_tables()
+
+    def batch(self):
+        """
+        Commits all writes inside the with block at once
+        """
+        return self.store.batch()
+
+    def close(self):
+        """
+        Closes the wrapped store
+        """
+        self.store.close()
+
+    def write_account(self, account_id: str, public_key: str, private_key: str, tx_id: str = None):
+        """
+        Writes a new account entry into the wrapped store
+        """
+        self.store.write_account(account_id, public_key, private_key, tx_id)
+
+    def get_account(self, account_id: str) -> tuple:
+        """
+        Returns tuple of account from the wrapped store
+        """
+        return self.store.get_account(account_id)
+
+    def write_tx_id(self, account_id: str, tx_id: str):
+        """
+        Writes tx_id for given account_id into the wrapped store
+        """
+        self.store.write_tx_id(account_id, tx_id)
+
+    def write_accounts(self, rows: list):
+        """
+        Writes many new account entries into the wrapped store
+        """
+        self.store.write_accounts(rows)
+
+    def get_accounts(self, account_ids: list) -> dict:
+        """
+        Returns the accounts of many account_ids from the wrapped store
+        """
+        return self.store.get_accounts(account_ids)
+
+    def write_tx_ids(self, pairs: list):
+        """
+        Writes the tx_ids of many accounts into the wrapped store
+        """
+        self.store.write_tx_ids(pairs)
+
+    def write_index(self, tx_id: str, record_ids: list, relations: list):
+        """
+        Writes the records and relations of a transaction into the index of the wrapped store
+        """
+        self.store.write_index(tx_id, record_ids, relations)
+
+    def write_document(self, document_id: str, tx_ids: list):
+        """
+        Writes the transaction ids of a document into the wrapped store
+        """
+        self.store.write_document(document_id, tx_ids)
+
+    def get_document_tx_ids(self, document_id: str) -> list:
+        """
+        Returns the transaction ids of a document from the wrapped store
+        """
+        return self.store.get_document_tx_ids(document_id)
+
+    def write_asset_hash(self, content_hash: str, tx_id: str):
+        """
+        Remembers the transaction storing an asset in the wrapped store
+        """
+        self.store.write_asset_hash(content_hash, tx_id)
+
+    def get_asset_tx_id(self, content_hash: str) -> str:
+        """
+        Returns the transaction storing an asset from the wrapped store
+        """
+        return self.store.get_asset_tx_id(content_hash)
+
+    def write_journal_step(self, journal_id: str, step: str, txs: list):
+        """
+        Records the signed transactions of a planned step in the wrapped store
+        """
+        self.store.write_journal_step(journal_id, step, txs)
+
+    def write_journal_state(self, journal_id: str, step: str, state: str):
+        """
+        Updates the state of a step in the wrapped store
+        """
+        self.store.write_journal_state(journal_id, step, state)
+
+    def get_journal_step(self, journal_id: str, step: str) -> tuple:
+        """
+        Returns a step of the journal of a document from the wrapped store
+        """
+        return self.store.get_journal_step(journal_id, step)
+
+    def get_journal(self, journal_id: str) -> dict:
+        """
+        Returns the progress of a document from the wrapped store
+        """
+        return self.store.get_journal(journal_id)
+
+    def delete_journal(self, journal_id: str):
+        """
+        Removes the journal of a document from the wrapped store
+        """
+        self.store.delete_journal(journal_id)
+
+    def find_records(self, record_id: str) -> list:
+        """
+        Returns the transaction ids of a record from the wrapped store
+        """
+        return self.store.find_records(record_id)
+
+    def find_relations(self, subject: str = None, obj: str = None) -> list:
+        """
+        Returns the relations with a subject and/or object from the wrapped store
+        """
+        return self.store.find_relations(subject, obj)
+
+    def ancestors(self, record_id: str, depth: int = None) -> list:
+        """
+        Returns the records a record depends on from the wrapped store
+        """
+        return self.store.ancestors(record_id, depth)
+
+    def descendants(self, record_id: str, depth: int = None) -> list:
+        """
+        Returns the records depending on a record from the wrapped store
+        """
+        return self.store.descendants(record_id, depth)
+
+
+class CachingStore(StoreWrapper):
+    """
+    Read-through cache of account rows in front of any store. The most recently used rows and unknown
+    account ids are kept in memory; writes through this wrapper drop the entries of their accounts.
+    Writes of other processes to the wrapped store are not seen until the entries are evicted or cleared.
+    """
+
+    def __init__(self, store: BaseStore, max_entries: int = 10000):
+        """
+        Instantiate CachingStore object
+
+        :param store: Wrapped store
+        :type store: BaseStore
+        :param max_entries: Maximum number of cached account ids
+        :type max_entries: int
+        """
+        assert max_entries > 0
+        super().__init__(store)
+        self.max_entries = max_entries
+        self.lock = threading.RLock()
+        self.local = threading.local()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # counts invalidations, rows read before an invalidation are not cached
+        self.generation = 0
+
+    def clear(self):
+        """
+        Removes all cached entries
+        """
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+
+    def clean_tables(self):
+        """
+        Delete all entries from all tables (Used for unit tests)
+        """
+        self.store.clean_tables()
+        self.clear()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Commits all writes inside the with block at once. Entries written in the batch are dropped again
+        after the commit or rollback, because other threads may have cached the state before.
+        """
+        if getattr(self.local, 'written', None) is not None:
+            yield
+            return
+        self.local.written = set()
+        try:
+            with self.store.batch():
+                yield
+        finally:
+            written, self.local.written = self.local.written, None
+            self._invalidate(written)
+
+    def write_account(self, account_id: str, public_key: str, private_key: str, tx_id: str = None):
+        """
+        Writes a new account entry in to the table accounts
+
+        :param tx_id: Transactions id
+        :type tx_id: str
+        :param account_id: Id of account
+        :type account_id: str
+        :param public_key: Public key of account
+        :type public_key: str
+        :param private_key: Private key of account
+        :type private_key: str
+        """
+        try:
+            self.store.write_account(account_id, public_key, private_key, tx_id)
+        finally:
+            self._invalidate([account_id])
+
+    def get_account(self, account_id: str) -> tuple:
+        """
+        Returns tuple of account from the cache or the wrapped store
+
+        :param account_id: Id of account
+        :type account_id: str
+        :return: Tuple with account_id, public_key, private_key and tx_id
+        :rtype: tuple
+        """
+        with self.lock:
+            if account_id in self.entries:
+                self.entries.move_to_end(account_id)
+                self.hits += 1
+                row = self.entries[account_id]
+                if row is None:
+                    raise exceptions.NoAccountFoundException("No account with id " + account_id)
+                return row
+            self.misses += 1
+            generation = self.generation
+        try:
+            row = self.store.get_account(account_id)
+        except exceptions.NoAccountFoundException:
+            self._remember({account_id: None}, generation)
+            raise
+        self._remember({account_id: row}, generation)
+        return row
+
+    def write_tx_id(self, account_id: str, tx_id: str):
+        """
+        Writes tx_id for given account_id
+
+        :param account_id: Id of account
+        :type account_id: str
+        :param tx_id: Transaction id, which represents the account in BigchainDB
+        :type tx_id: str
+        """
+        try:
+            self.store.write_tx_id(account_id, tx_id)
+        finally:
+            self._invalidate([account_id])
+
+    def write_accounts(self, rows: list):
+        """
+        Writes many new account entries into the table accounts at once
+
+        :param rows: Tuples with account_id, public_key, private_key and tx_id
+        :type rows: list
+        """
+        try:
+            self.store.write_accounts(rows)
+        finally:
+            self._invalidate([row[0] for row in rows])
+
+    def get_accounts(self, account_ids: list) -> dict:
+        """
+        Returns the accounts of many account_ids, the uncached ones are read from the wrapped store at once
+
+        :param account_ids: Ids of accounts
+        :type account_ids: list
+        :return: Tuples with account_id, public_key, private_key and tx_id by account_id, unknown ids are missing
+        :rtype: dict
+        """
+        accounts = {}
+        missing = []
+        with self.lock:
+            for account_id in dict.fromkeys(account_ids):
+                if account_id in self.entries:
+                    self.entries.move_to_end(account_id)
+                    self.hits += 1
+                    if self.entries[account_id] is not None:
+                        accounts[account_id] = self.entries[account_id]
+                else:
+                    self.misses += 1
+                    missing.append(account_id)
+            generation = self.generation
+        if missing:
+            found = self.store.get_accounts(missing)
+            self._remember({account_id: found.get(account_id) for account_id in missing}, generation)
+            accounts.update(found)
+        return accounts
+
+    def write_tx_ids(self, pairs: list):
+        """
+        Writes the tx_ids of many accounts at once
+
+        :param pairs: Tuples with account_id and tx_id
+        :type pairs: list
+        """
+        try:
+            self.store.write_tx_ids(pairs)
+        finally:
+            self._invalidate([account_id for account_id, _ in pairs])
+
+    def _remember(self, entries: dict, generation: int):
+        """
+        Adds rows or None for unknown accounts and evicts the least recently used ones
+
+        :param entries: Account rows or None by account_id
+        :type entries: dict
+        :param generation: Generation when the rows were read, older rows may be outdated
+        :type generation: int
+        """
+        with self.lock:
+            if generation != self.generation:
+                return
+            for account_id, row in entries.items():
+                self.entries[account_id] = row
+                self.entries.move_to_end(account_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _invalidate(self, account_ids: list):
+        """
+        Drops the entries of written accounts, also after the batch of this thread ends
+
+        :param account_ids: Ids of accounts
+        :type account_ids: list
+        """
+        written = getattr(self.local, 'written', None)
+        if written is not None:
+            written.update(account_ids)
+        with self.lock:
+            self.generation += 1
+            for account_id in account_ids:
+                self.entries.pop(account_id, None)
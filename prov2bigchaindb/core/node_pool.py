@@ -0,0 +1,270 @@
+import functools
+import logging
+import threading
+import time
+
+import requests
+from bigchaindb_driver import BigchainDB
+from bigchaindb_driver import exceptions as bdb_exceptions
+from bigchaindb_driver import pool as bdpool
+from bigchaindb_driver.transport import Transport
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class NodeStats(object):
+    """
+    Observed latency, requests in flight and health of a single BigchainDB node
+    """
+
+    def __init__(self, node: str, max_failures: int = 3, eject_seconds: float = 30.0, alpha: float = 0.2):
+        """
+        Instantiate NodeStats object
+
+        :param node: URL of the node
+        :type node: str
+        :param max_failures: Number of consecutive failed requests until the node is ejected
+        :type max_failures: int
+        :param eject_seconds: Seconds an ejected node is not picked
+        :type eject_seconds: float
+        :param alpha: Weight of the latest request in the moving average of the latency
+        :type alpha: float
+        """
+        self.node = node
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self.alpha = alpha
+        self.lock = threading.Lock()
+        self.latency = None
+        self.in_flight = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def start(self):
+        """
+        Records the start of a request
+        """
+        with self.lock:
+            self.in_flight += 1
+
+    def finish(self, latency: float, failed: bool = False):
+        """
+        Records the end of a request
+
+        :param latency: Duration of the request in seconds
+        :type latency: float
+        :param failed: True if the node did not answer properly
+        :type failed: bool
+        """
+        with self.lock:
+            self.in_flight -= 1
+            if failed:
+                self.failures += 1
+                if self.failures >= self.max_failures:
+                    self.ejected_until = time.monotonic() + self.eject_seconds
+                    self.failures = 0
+                    log.warning("Eject node %s for %s seconds", self.node, self.eject_seconds)
+                return
+            self.failures = 0
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency = self.alpha * latency + (1 - self.alpha) * self.latency
+
+    def is_available(self, now: float = None) -> bool:
+        """
+        Checks if the node is not ejected
+
+        :param now: Current value of time.monotonic()
+        :type now: float or None
+        :return: True if the node may be picked
+        :rtype: bool
+        """
+        return (now or time.monotonic()) >= self.ejected_until
+
+    def score(self) -> float:
+        """
+        Expected waiting time for a new request, lower is better. Nodes without measurements are preferred.
+
+        :return: Average latency weighted by the requests in flight
+        :rtype: float
+        """
+        with self.lock:
+            return (self.latency or 0.0) * (self.in_flight + 1)
+
+
+class TrackedTransport(Transport):
+    """
+    Transport of the BigchainDB driver, which records every request in the stats of its node
+    """
+
+    def __init__(self, *nodes, headers: dict = None, stats: NodeStats = None, session: requests.Session = None,
+                 timeout: float = None):
+        """
+        Instantiate TrackedTransport object
+
+        :param nodes: URLs of the nodes
+        :type nodes: str
+        :param headers: Headers sent with each request
+        :type headers: dict or None
+        :param stats: Stats of the node
+        :type stats: NodeStats
+        :param session: HTTP session shared with other transports of the node (default: one session per transport)
+        :type session: requests.Session or None
+        :param timeout: Timeout of a single request in seconds (default: no timeout)
+        :type timeout: float or None
+        """
+        assert stats is not None
+        super().__init__(*nodes, headers=headers)
+        self.stats = stats
+        self.timeout = timeout
+        if session is not None:
+            for connection in self.pool.connections:
+                connection.session = session
+
+    def forward_request(self, method, path=None, json=None, params=None, headers=None):
+        self.stats.start()
+        start = time.perf_counter()
+        failed = False
+        try:
+            response = self.get_connection().request(method, path=path, json=json, params=params, headers=headers,
+                                                     timeout=self.timeout)
+            return response.data
+        except bdb_exceptions.ConnectionError:
+            failed = True
+            raise
+        except bdb_exceptions.TransportError as e:
+            # the node answered, so only server errors count as failure
+            failed = not isinstance(e.status_code, int) or e.status_code >= 500
+            raise
+        except requests.exceptions.RequestException:
+            failed = True
+            raise
+        finally:
+            self.stats.finish(time.perf_counter() - start, failed)
+
+
+class NodeConnection(BigchainDB):
+    """
+    BigchainDB driver object for a single node, which shares the stats of its node
+    """
+
+    def __init__(self, node: str, stats: NodeStats, headers: dict = None, session: requests.Session = None,
+                 timeout: float = None):
+        """
+        Instantiate NodeConnection object
+
+        :param node: URL of the node
+        :type node: str
+        :param stats: Stats of the node
+        :type stats: NodeStats
+        :param headers: Headers sent with each request
+        :type headers: dict or None
+        :param session: HTTP session of the node
+        :type session: requests.Session or None
+        :param timeout: Timeout of a single request in seconds (default: no timeout)
+        :type timeout: float or None
+        """
+        transport_class = functools.partial(TrackedTransport, stats=stats, session=session, timeout=timeout)
+        super().__init__(node, transport_class=transport_class, headers=headers)
+        self.stats = stats
+        self.session = session
+
+
+class LatencyPicker(bdpool.AbstractPicker):
+    """
+    Picks the connection of an available node with the lowest expected waiting time.
+    Connections with equal scores are picked round robin.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.picked = -1
+
+    def pick(self, connections: list) -> NodeConnection:
+        """
+        Picks a connection
+
+        :param connections: Connections with node stats
+        :type connections: list
+        :return: Picked connection
+        :rtype: NodeConnection
+        """
+        now = time.monotonic()
+        available = [connection for connection in connections if connection.stats.is_available(now)]
+        if not available:
+            # all nodes are ejected, try the one which returns first
+            return min(connections, key=lambda connection: connection.stats.ejected_until)
+        scores = [connection.stats.score() for connection in available]
+        best = min(scores)
+        candidates = [connection for connection, score in zip(available, scores) if score == best]
+        with self.lock:
+            self.picked = (self.picked + 1) % len(candidates)
+            return candidates[self.picked]
+
+
+def create_session(pool_maxsize: int, headers: dict = None, keep_alive: bool = True) -> requests.Session:
+    """
+    Creates an HTTP session, which keeps up to pool_maxsize connections to a node alive
+
+    :param pool_maxsize: Maximum number of open HTTP connections
+    :type pool_maxsize: int
+    :param headers: Headers sent with each request
+    :type headers: dict or None
+    :param keep_alive: Reuse HTTP connections, otherwise each request opens a new one
+    :type keep_alive: bool
+    :return: HTTP session
+    :rtype: requests.Session
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, pool_block=False)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if headers:
+        session.headers.update(headers)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def connect(nodes: list, connections_per_node: int, headers: dict = None, timeout: float = None,
+            keep_alive: bool = True) -> list:
+    """
+    Creates connections to all nodes. The connections of a node share one HTTP session,
+    which keeps up to connections_per_node HTTP connections alive.
+
+    :param nodes: URLs of the nodes
+    :type nodes: list
+    :param connections_per_node: Number of connections per node
+    :type connections_per_node: int
+    :param headers: Headers sent with each request
+    :type headers: dict or None
+    :param timeout: Timeout of a single request in seconds (default: no timeout)
+    :type timeout: float or None
+    :param keep_alive: Reuse HTTP connections, otherwise each request opens a new one
+    :type keep_alive: bool
+    :return: List of NodeConnection objects
+    :rtype: list
+    """
+    assert len(nodes) > 0
+    assert connections_per_node > 0
+    connections = []
+    for node in nodes:
+        stats = NodeStats(node)
+        session = create_session(connections_per_node, headers, keep_alive)
+        connections += [NodeConnection(node, stats, headers, session, timeout) for _ in range(connections_per_node)]
+    return connections
+
+
+def close(connections: list):
+    """
+    Closes the HTTP sessions of connections created by connect
+
+    :param connections: List of NodeConnection objects
+    :type connections: list
+    """
+    sessions = {id(connection.session): connection.session for connection in connections
+                if isinstance(connection, NodeConnection) and connection.session is not None}
+    for session in sessions.values():
+        session.close()
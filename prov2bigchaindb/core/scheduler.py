@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from networkx import DiGraph
+from networkx import is_directed_acyclic_graph
+from networkx import topological_sort
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class DependencyScheduler(object):
+    """
+    Runs tasks of a dependency graph wave by wave on a bounded pool of worker threads
+    """
+
+    def __init__(self, max_workers: int = 1):
+        """
+        Instantiate DependencyScheduler object
+
+        :param max_workers: Maximum number of tasks running concurrently
+        :type max_workers: int
+        """
+        assert max_workers > 0
+        self.max_workers = max_workers
+        self.graph = DiGraph()
+
+    def add_task(self, key: object, func, args: tuple = (), depends_on: list = None):
+        """
+        Adds a task, which is executed after all tasks it depends on are finished
+
+        :param key: Unique key of the task
+        :type key: object
+        :param func: Callable to execute
+        :type func: callable
+        :param args: Positional arguments for func
+        :type args: tuple
+        :param depends_on: Keys of tasks which must be finished before
+        :type depends_on: list or None
+        """
+        self.graph.add_node(key, func=func, args=args)
+        for dependency in depends_on or []:
+            if dependency != key:
+                self.graph.add_edge(dependency, key)
+
+    def waves(self) -> list:
+        """
+        Groups all tasks into waves. Each task only depends on tasks of former waves.
+
+        :return: List of lists with task keys
+        :rtype: list
+        """
+        for key, data in self.graph.nodes(data=True):
+            if 'func' not in data:
+                raise Exception("Task {} is a dependency, but was never added".format(key))
+        if not is_directed_acyclic_graph(self.graph):
+            raise Exception("Dependency graph is not acyclic")
+        levels = {}
+        for key in topological_sort(self.graph):
+            levels[key] = max([levels[dependency] + 1 for dependency in self.graph.predecessors(key)] or [0])
+        waves = [[] for _ in range(max(levels.values()) + 1)] if levels else []
+        for key in self.graph.nodes():
+            waves[levels[key]].append(key)
+        return waves
+
+    def run(self) -> dict:
+        """
+        Executes all tasks
+
+        :return: Results of all tasks by key
+        :rtype: dict
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for number, wave in enumerate(self.waves()):
+                log.debug("Run wave %s with %s tasks", number, len(wave))
+                futures = []
+                for key in wave:
+                    task = self.graph.nodes[key]
+                    futures.append((key, executor.submit(task['func'], *task['args'])))
+                for key, future in futures:
+                    results[key] = future.result()
+        return results
+
+    async def run_async(self) -> dict:
+        """
+        Executes all tasks as coroutines on the running event loop
+
+        :return: Results of all tasks by key
+        :rtype: dict
+        """
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def bounded(func, args):
+            async with semaphore:
+                return await func(*args)
+
+        results = {}
+        for number, wave in enumerate(self.waves()):
+            log.debug("Run wave %s with %s tasks", number, len(wave))
+            tasks = [self.graph.nodes[key] for key in wave]
+            wave_results = await asyncio.gather(*[bounded(task['func'], task['args']) for task in tasks])
+            results.update(zip(wave, wave_results))
+        return results
@@ -0,0 +1,149 @@
+import logging
+from datetime import datetime
+
+from bigchaindb_driver.driver import TransactionsEndpoint
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def prepare_creation(transactions: TransactionsEndpoint, public_key: str, private_key: str, asset: dict,
+                     metadata: dict = None, recipient_pub_key: str = None) -> dict:
+    """
+    Prepare and sign a new CREATE transaction
+
+    :param transactions: Transactions endpoint of the driver, only prepare and fulfill are used
+    :type transactions: TransactionsEndpoint
+    :param public_key: Public key of the signer
+    :type public_key: str
+    :param private_key: Private key of the signer
+    :type private_key: str
+    :param asset: Dictonary with asset data
+    :type asset: dict
+    :param metadata: Dictonary with additional metadata
+    :type metadata: dict or None
+    :param recipient_pub_key: Public key of the owner of the output (default: the signer)
+    :type recipient_pub_key: str or None
+    :return: Fulfilled CREATE transaction
+    :rtype: dict
+    """
+    if metadata is None:
+        metadata = {}
+    metadata['timestamp'] = datetime.utcnow().timestamp()
+    recipients = {} if recipient_pub_key is None else {'recipients': recipient_pub_key}
+    prepared_creation_tx = transactions.prepare(operation='CREATE',
+                                                signers=public_key,
+                                                asset=asset,
+                                                metadata=metadata,
+                                                **recipients)
+    return transactions.fulfill(prepared_creation_tx, private_keys=private_key)
+
+
+def prepare_transfer(transactions: TransactionsEndpoint, private_key: str, recipient_pub_key: str, tx: dict,
+                     metadata: dict = None) -> dict:
+    """
+    Prepare and sign a new TRANSFER transaction, which spends the first output of tx
+
+    :param transactions: Transactions endpoint of the driver, only prepare and fulfill are used
+    :type transactions: TransactionsEndpoint
+    :param private_key: Private key of the owner of tx
+    :type private_key: str
+    :param recipient_pub_key: Public key of the recipient
+    :type recipient_pub_key: str
+    :param tx: Transaction which should be transferd
+    :type tx: dict
+    :param metadata: Dictionary with additional metadata
+    :type metadata: dict or None
+    :return: Fulfilled TRANSFER transaction
+    :rtype: dict
+    """
+    if metadata is None:
+        metadata = {}
+    metadata['timestamp'] = datetime.utcnow().timestamp()
+    transfer_asset = {'id': tx['id']}
+    output_index = 0
+    output = tx['outputs'][output_index]
+    transfer_input = {
+        'fulfillment': output['condition']['details'],
+        'fulfills': {
+            'output_index': output_index,
+            'transaction_id': tx['id']
+        },
+        'owners_before': output['public_keys']
+    }
+    prepared_transfer_tx = transactions.prepare(
+        operation='TRANSFER',
+        asset=transfer_asset,
+        metadata=metadata,
+        inputs=transfer_input,
+        recipients=recipient_pub_key
+    )
+    return transactions.fulfill(
+        prepared_transfer_tx,
+        private_keys=private_key,
+    )
+
+
+def sign_creation(public_key: str, private_key: str, asset: dict, metadata: dict = None,
+                  recipient_pub_key: str = None) -> dict:
+    """
+    Picklable entry point of prepare_creation for worker processes
+
+    :param public_key: Public key of the signer
+    :type public_key: str
+    :param private_key: Private key of the signer
+    :type private_key: str
+    :param asset: Dictonary with asset data
+    :type asset: dict
+    :param metadata: Dictonary with additional metadata
+    :type metadata: dict or None
+    :param recipient_pub_key: Public key of the owner of the output (default: the signer)
+    :type recipient_pub_key: str or None
+    :return: Fulfilled CREATE transaction
+    :rtype: dict
+    """
+    return prepare_creation(TransactionsEndpoint, public_key, private_key, asset, metadata, recipient_pub_key)
+
+
+def sign_transfer(private_key: str, recipient_pub_key: str, tx: dict, metadata: dict = None) -> dict:
+    """
+    Picklable entry point of prepare_transfer for worker processes
+
+    :param private_key: Private key of the owner of tx
+    :type private_key: str
+    :param recipient_pub_key: Public key of the recipient
+    :type recipient_pub_key: str
+    :param tx: Transaction which should be transferd
+    :type tx: dict
+    :param metadata: Dictionary with additional metadata
+    :type metadata: dict or None
+    :return: Fulfilled TRANSFER transaction
+    :rtype: dict
+    """
+    return prepare_transfer(TransactionsEndpoint, private_key, recipient_pub_key, tx, metadata)
+
+
+def sign_record(public_key: str, private_key: str, asset: dict, metadata: dict, recipient_pub_key: str,
+                single_tx: bool = False) -> list:
+    """
+    Picklable entry point, which signs all transactions of a record in one worker call
+
+    :param public_key: Public key of the signer
+    :type public_key: str
+    :param private_key: Private key of the signer
+    :type private_key: str
+    :param asset: Dictonary with asset data
+    :type asset: dict
+    :param metadata: Dictionary with additional metadata
+    :type metadata: dict
+    :param recipient_pub_key: Public key of the recipient
+    :type recipient_pub_key: str
+    :param single_tx: Sign a single CREATE owned by the recipient
+    :type single_tx: bool
+    :return: CREATE and TRANSFER transaction (only CREATE for single_tx)
+    :rtype: list
+    """
+    if single_tx:
+        return [sign_creation(public_key, private_key, asset, metadata, recipient_pub_key)]
+    creation_tx = sign_creation(public_key, private_key, asset, metadata)
+    return [creation_tx, sign_transfer(private_key, recipient_pub_key, creation_tx, dict(metadata))]
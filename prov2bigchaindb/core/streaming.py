@@ -0,0 +1,135 @@
+import json
+import logging
+from tempfile import SpooledTemporaryFile
+
+import prov.model as provmodel
+import prov.serializers.provjson as provjson
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class ProvJSONWriter(object):
+    """
+    Writes PROV-JSON to a file handle record by record, e.g. from the chunks of iter_document.
+    PROV-JSON groups records by type, so each type section is spooled into a temporary file
+    (on disk if it gets large) and the sections are copied into the output on close.
+    Only the prefixes and the identifiers of the records are kept in memory.
+    """
+
+    def __init__(self, stream, spool_size: int = 1024 * 1024):
+        """
+        Instantiate ProvJSONWriter object
+
+        :param stream: Writable text file handle
+        :type stream: TextIO
+        :param spool_size: Bytes of a type section kept in memory before it is moved to disk
+        :type spool_size: int
+        """
+        assert stream is not None
+        self.stream = stream
+        self.spool_size = spool_size
+        self.prefixes = {}
+        self.sections = {}
+        self.identifiers = {}
+        self.repeated = {}
+        self.anonymous = 0
+        self.count = 0
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, namespaces: set, record: provmodel.ProvRecord):
+        """
+        Appends a record to the document
+
+        :param namespaces: Namespaces used by the record
+        :type namespaces: set
+        :param record: PROV record
+        :type record: ProvRecord
+        """
+        assert not self.closed
+        for namespace in namespaces:
+            self.prefixes[namespace.prefix] = namespace.uri
+        doc = provmodel.ProvDocument()
+        doc.add_record(record)
+        container = provjson.encode_json_container(doc)
+        container.pop('prefix', None)
+        for label, records in container.items():
+            for identifier, attributes in records.items():
+                if record.identifier is None:
+                    self.anonymous += 1
+                    identifier = '_:id%d' % self.anonymous
+                self._append(label, identifier, attributes)
+
+    def _append(self, label: str, identifier: str, attributes: dict):
+        """
+        Spools a record into the section of its type
+
+        :param label: PROV-JSON record type, e.g. entity
+        :type label: str
+        :param identifier: Identifier of the record
+        :type identifier: str
+        :param attributes: PROV-JSON attributes of the record
+        :type attributes: dict
+        """
+        if label not in self.sections:
+            self.sections[label] = SpooledTemporaryFile(max_size=self.spool_size, mode='w+')
+            self.identifiers[label] = set()
+            self.repeated[label] = set()
+        if identifier in self.identifiers[label]:
+            # records with the same identifier are written as a list
+            self.repeated[label].add(identifier)
+        self.identifiers[label].add(identifier)
+        self.sections[label].write(json.dumps([identifier, attributes]) + '\n')
+        self.count += 1
+
+    def close(self):
+        """
+        Writes the document into the stream and removes the temporary files. The stream is not closed.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        write = self.stream.write
+        write('{"prefix": %s' % json.dumps(self.prefixes))
+        for label, section in self.sections.items():
+            write(', %s: {' % json.dumps(label))
+            repeated = {identifier: [] for identifier in self.repeated[label]}
+            section.seek(0)
+            first = True
+            for line in section:
+                identifier, attributes = json.loads(line)
+                if identifier in repeated:
+                    repeated[identifier].append(attributes)
+                    continue
+                write('%s%s: %s' % ('' if first else ', ', json.dumps(identifier), json.dumps(attributes)))
+                first = False
+            for identifier, attributes in repeated.items():
+                write('%s%s: %s' % ('' if first else ', ', json.dumps(identifier), json.dumps(attributes)))
+                first = False
+            write('}')
+            section.close()
+        write('}')
+        log.info("Wrote %s records as PROV-JSON", self.count)
+
+
+def write_prov_json(chunks, stream) -> int:
+    """
+    Writes all (namespaces, record) chunks as PROV-JSON into a file handle
+
+    :param chunks: Iterable of (namespaces, record) tuples, e.g. iter_document of a client
+    :type chunks: Iterable
+    :param stream: Writable text file handle
+    :type stream: TextIO
+    :return: Number of written records
+    :rtype: int
+    """
+    with ProvJSONWriter(stream) as writer:
+        for namespaces, record in chunks:
+            writer.write(namespaces, record)
+    return writer.count
@@ -1,15 +1,14 @@
+import hashlib
 import json
 import logging
 
-import random
-import requests
 import time
 from bigchaindb_driver import BigchainDB
 from bigchaindb_driver import exceptions as bdb_exceptions
 from lxml import etree
 from prov import model
 
-from prov2bigchaindb.core import exceptions
+from prov2bigchaindb.core import block_cache, exceptions
 
 log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -47,7 +46,77 @@ def to_prov_document(content: str or bytes or model.ProvDocument) -> model.ProvD
         raise exceptions.ParseException("Invalid PROV-XML of type {}".format(type(content)))
 
 
-def wait_until_valid(tx_id: str, bdb_connection: BigchainDB):
+def collect_tx_ids(results: dict, keys: list) -> list:
+    """
+    Flattens the results of scheduled save tasks into a list of transaction ids
+
+    :param results: Transaction id or list of transaction ids by task key
+    :type results: dict
+    :param keys: Task keys in the order of the resulting list
+    :type keys: list
+    :return: List of transaction ids
+    :rtype: list
+    """
+    tx_ids = []
+    for key in keys:
+        if isinstance(results[key], list):
+            tx_ids += results[key]
+        else:
+            tx_ids.append(results[key])
+    return tx_ids
+
+
+def index_records(records: list) -> (list, list):
+    """
+    Returns the rows of the local index for the records stored in one transaction
+
+    :param records: PROV records
+    :type records: list
+    :return: Identifiers of the records and tuples(relation type, subject, object) of the relations
+    :rtype: (list, list)
+    """
+    record_ids = [str(record.identifier) for record in records if record.identifier is not None]
+    relations = []
+    for record in records:
+        if record.is_relation() and record.args[0] is not None and record.args[1] is not None:
+            relations.append((str(record.get_type()), str(record.args[0]), str(record.args[1])))
+    return record_ids, relations
+
+
+def asset_hash(asset: dict, signer_pub_key: str, recipient_pub_key: str, single_tx: bool) -> str:
+    """
+    Returns the content hash of an asset stored by a signer for a recipient. Metadata (e.g. timestamps)
+    is not part of the hash, so storing the same asset again gives the same hash.
+
+    :param asset: Dictonary with asset data
+    :type asset: dict
+    :param signer_pub_key: Public key of the account creating the asset
+    :type signer_pub_key: str
+    :param recipient_pub_key: Public key of the final owner
+    :type recipient_pub_key: str
+    :param single_tx: True if the asset is stored by a single CREATE
+    :type single_tx: bool
+    :return: Hex encoded SHA-256 hash
+    :rtype: str
+    """
+    content = json.dumps([asset, signer_pub_key, recipient_pub_key, single_tx], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def document_hash(prov_document: model.ProvDocument) -> str:
+    """
+    Returns the content hash of a document, which identifies its journal while it is saved
+
+    :param prov_document: Document
+    :type prov_document: ProvDocument
+    :return: Hex encoded SHA-256 hash
+    :rtype: str
+    """
+    content = json.dumps(json.loads(prov_document.serialize(format='json')), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def wait_until_valid(tx_id: str, bdb_connection: BigchainDB, timeout: float = 300.0):
     """
     Waits until a transaction is valid in BigchainDB
 
@@ -55,15 +124,24 @@ def wait_until_valid(tx_id: str, bdb_connection: BigchainDB):
     :type tx_id: str
     :param bdb_connection: Connection object for BigchainDB
     :type bdb_connection: BigchainDB
+    :param timeout: Maximum seconds to wait
+    :type timeout: float
     """
     #  TODO Raise Exception on invalid
     trials = 0
     trialsmax = 100
+    delay = 0.1
+    deadline = time.monotonic() + timeout
     while trials < trialsmax:
+        if time.monotonic() > deadline:
+            log.error("Transaction %s is not valid after %s seconds", tx_id, timeout)
+            raise exceptions.TransactionIdNotFound(tx_id)
         try:
             result = bdb_connection.transactions.status(tx_id)
             if result.get('status') == 'valid':  # others: backlog, undecided
                 break
+            time.sleep(delay)
+            delay = min(delay * 2, 1)
         except bdb_exceptions.NotFoundError:
             time.sleep(1)
             trials += 1
@@ -77,6 +155,35 @@ def wait_until_valid(tx_id: str, bdb_connection: BigchainDB):
         raise exceptions.TransactionIdNotFound(tx_id)
 
 
+def send_until_accepted(tx: dict, bdb_connection: BigchainDB) -> dict:
+    """
+    Sends a transaction and repeats it while BigchainDB rejects it, because the
+    transactions it spends are not in a valid block yet
+
+    :param tx: Fulfilled transaction to send
+    :type tx: dict
+    :param bdb_connection: Connection object for BigchainDB
+    :type bdb_connection: BigchainDB
+    :return: Sent transaction
+    :rtype: dict
+    """
+    trials = 0
+    trialsmax = 100
+    while True:
+        try:
+            return bdb_connection.transactions.send(tx)
+        except bdb_exceptions.BadRequest as e:
+            if not any(reason in str(e.info) for reason in ('TransactionNotInValidBlock', 'InputDoesNotExist')):
+                raise exceptions.CreateRecordException(tx['id'])
+            trials += 1
+            if trials == trialsmax:
+                log.error("Transaction %s was not accepted after %s tries", tx['id'], trialsmax)
+                raise exceptions.CreateRecordException(tx['id'])
+            log.debug("Inputs of transaction %s not valid yet after %s tries out of %s trials", tx['id'], trials,
+                      trialsmax)
+            time.sleep(min(0.1 * trials, 1))
+
+
 def is_valid_tx(tx_id: str, bdb_connection: BigchainDB) -> bool:
     """
     Checks once if a transaction is valid
@@ -99,29 +206,141 @@ def is_valid_tx(tx_id: str, bdb_connection: BigchainDB) -> bool:
     return False
 
 
-def is_block_to_tx_valid(tx_id: str, bdb_connection: BigchainDB) -> bool:
+def is_known_tx(tx_id: str, bdb_connection: BigchainDB) -> bool:
     """
-    Checks if block with transaction is valid
+    Checks once if BigchainDB received a transaction, in any state
+
+    :param tx_id: Id of transaction to check
+    :type tx_id: str
+    :param bdb_connection: Connection object for BigchainDB
+    :type bdb_connection: BigchainDB
+    :return: True if the transaction is known
+    :rtype: bool
+    """
+    try:
+        bdb_connection.transactions.status(tx_id)
+    except bdb_exceptions.NotFoundError:
+        return False
+    return True
+
+
+def get_block_id(tx_id: str, bdb_connection: BigchainDB) -> str:
+    """
+    Returns the id of the block including a transaction
+
+    :param tx_id: Transaction id
+    :type tx_id: str
+    :param bdb_connection: Connection object for BigchainDB
+    :type bdb_connection: BigchainDB
+    :return: Block id
+    :rtype: str
+    """
+    try:
+        block_ids = bdb_connection.blocks.get(txid=tx_id)
+    except bdb_exceptions.TransportError:
+        raise exceptions.TransactionIdNotFound(tx_id)
+    if len(block_ids) != 1:
+        raise exceptions.TransactionIdNotFound(tx_id)
+    return block_ids[0]
+
+
+def get_block_status(block_id: str, bdb_connection: BigchainDB) -> str:
+    """
+    Returns the status of a block
+
+    :param block_id: Block id
+    :type block_id: str
+    :param bdb_connection: Connection object for BigchainDB
+    :type bdb_connection: BigchainDB
+    :return: valid, invalid or undecided
+    :rtype: str
+    """
+    try:
+        return bdb_connection.transport.forward_request(method='GET', path=bdb_connection.api_prefix + '/statuses',
+                                                        params={'block_id': block_id})['status']
+    except bdb_exceptions.TransportError:
+        raise exceptions.BlockIdNotFound(block_id)
+
+
+def is_block_to_tx_valid(tx_id: str, bdb_connection: BigchainDB, cache: block_cache.BlockStatusCache = None) -> bool:
+    """
+    Checks if block with transaction is valid. With a cache, a valid block is retrieved once to learn all
+    transactions it includes, so other transactions of the block need no query at all.
 
     :param tx_id: Id of transaction which should be included in the
     :type tx_id: str
     :param bdb_connection: Connection object for BigchainDB
     :type bdb_connection: BigchainDB
+    :param cache: Cache of valid blocks (default: no cache)
+    :type cache: block_cache.BlockStatusCache or None
     :return: True if transactions is in block and block is valid
     :rtype: bool
     """
-    node = random.choice(bdb_connection.nodes)
-    res = requests.get(node + bdb_connection.blocks.path + '?transaction_id=' + tx_id)
-    block_id = res.json()
-    if len(block_id) < 1 or len(block_id) > 1:
-        raise exceptions.TransactionIdNotFound(tx_id)
-    res = requests.get(node + bdb_connection.api_prefix + '/statuses?block_id=' + block_id[0])
-    if res.status_code != 200:
-        raise exceptions.BlockIdNotFound(block_id[0])
-    status = res.json()['status']
-    if status == 'valid':
+    if cache is None:
+        return get_block_status(get_block_id(tx_id, bdb_connection), bdb_connection) == 'valid'
+    if cache.get_block(tx_id) is not None:
         return True
-    return False
+    block_id = get_block_id(tx_id, bdb_connection)
+    status = _lookup_block_status(block_id, bdb_connection, cache)
+    # the transaction may be missing in the block retrieved by a concurrent lookup
+    cache.add_block(block_id, status, [tx_id])
+    return status == 'valid'
 
 
+def are_blocks_to_txs_valid(tx_ids: list, bdb_connection: BigchainDB, cache: block_cache.BlockStatusCache) -> dict:
+    """
+    Checks the blocks of many transactions with as few block queries as possible. The transactions are checked
+    one after another, so a valid block retrieved for one transaction answers all other transactions it
+    includes without any query. A transaction which is in no block yet is not valid.
 
+    :param tx_ids: Ids of transactions which should be included in valid blocks
+    :type tx_ids: list
+    :param bdb_connection: Connection object for BigchainDB
+    :type bdb_connection: BigchainDB
+    :param cache: Cache of valid blocks
+    :type cache: block_cache.BlockStatusCache
+    :return: Dictionary of transaction id to True if the block of the transaction is valid
+    :rtype: dict
+    """
+    result = {}
+    for tx_id in tx_ids:
+        if tx_id in result:
+            continue
+        try:
+            result[tx_id] = is_block_to_tx_valid(tx_id, bdb_connection, cache)
+        except exceptions.TransactionIdNotFound:
+            result[tx_id] = False
+    return result
+
+
+def _lookup_block_status(block_id: str, bdb_connection: BigchainDB, cache: block_cache.BlockStatusCache) -> str:
+    """
+    Returns the status of a block and caches a valid block with all transactions it includes.
+    Concurrent lookups of the same block wait for the first one instead of querying the block again.
+
+    :param block_id: Block id
+    :type block_id: str
+    :param bdb_connection: Connection object for BigchainDB
+    :type bdb_connection: BigchainDB
+    :param cache: Cache of valid blocks
+    :type cache: block_cache.BlockStatusCache
+    :return: valid, invalid or undecided
+    :rtype: str
+    """
+    lookup, owner = cache.start_lookup(block_id)
+    if not owner:
+        return lookup.result()
+    block_tx_ids = []
+    try:
+        status = get_block_status(block_id, bdb_connection)
+        if status == 'valid':
+            try:
+                block = bdb_connection.blocks.retrieve(block_id)
+                block_tx_ids = [tx['id'] for tx in block['block']['transactions']]
+            except bdb_exceptions.TransportError as e:
+                log.debug("Could not retrieve block %s: %s", block_id, e)
+    except BaseException as e:
+        cache.finish_lookup(block_id, exception=e)
+        raise
+    cache.finish_lookup(block_id, status, block_tx_ids)
+    return status
@@ -0,0 +1,101 @@
+"""
+Benchmark of the per-request latency of raw requests.get calls against connections with a shared keep-alive session.
+A local stand-in server answers the status requests, so no BigchainDB node is required.
+
+Usage: python -m prov2bigchaindb.tests.benchmarks.sessions --requests 1000
+"""
+import argparse
+import json
+import logging
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import requests
+
+from prov2bigchaindb.core import node_pool, utils
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """
+    Answers every GET request with a valid status and keeps the connection open
+    """
+    protocol_version = 'HTTP/1.1'
+    # headers and body are sent separately, avoid the delayed ACK of the body
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = json.dumps({'status': 'valid'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if self.headers.get('Connection', '').lower() == 'close':
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer(socketserver.ThreadingMixIn, HTTPServer):
+    """
+    Local HTTP server, which accepts many new connections in a row
+    """
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def measure(request, count: int) -> float:
+    """
+    Sends requests one after another
+
+    :param request: Function sending a single request
+    :type request: callable
+    :param count: Number of requests
+    :type count: int
+    :return: Average milliseconds per request
+    :rtype: float
+    """
+    request()
+    start = time.perf_counter()
+    for _ in range(count):
+        request()
+    return (time.perf_counter() - start) * 1000 / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of HTTP sessions with keep-alive")
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+    logging.getLogger('prov2bigchaindb').setLevel(logging.WARNING)
+
+    server = StandInServer(('127.0.0.1', 0), StatusHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    node = 'http://127.0.0.1:{}'.format(server.server_address[1])
+    keep_alive = node_pool.connect([node], 1)
+    no_keep_alive = node_pool.connect([node], 1, keep_alive=False)
+    variants = [
+        ('requests.get', lambda: requests.get(node + '/api/v1/statuses?block_id=1').json()),
+        ('session, no keep-alive', lambda: utils.get_block_status('1', no_keep_alive[0])),
+        ('session, keep-alive', lambda: utils.get_block_status('1', keep_alive[0])),
+    ]
+    try:
+        print("requests: {}".format(args.requests))
+        print("{:>24} {:>10} {:>8}".format('variant', 'ms/request', 'speedup'))
+        baseline = None
+        for name, request in variants:
+            milliseconds = measure(request, args.requests)
+            baseline = baseline or milliseconds
+            print("{:>24} {:>10.3f} {:>8.2f}".format(name, milliseconds, baseline / milliseconds))
+    finally:
+        node_pool.close(keep_alive + no_keep_alive)
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
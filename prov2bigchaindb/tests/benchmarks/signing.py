@@ -0,0 +1,74 @@
+"""
+Benchmark of transaction signing with a growing number of signing processes.
+Documents are compiled into a bundle, so no BigchainDB node is required.
+
+Usage: python -m prov2bigchaindb.tests.benchmarks.signing --document thesis --repeat 5 --processes 0 1 2 4
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from prov2bigchaindb.core import clients, local_stores, utils
+from prov2bigchaindb.tests.core import setup_test_files
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def compile_documents(prov_document, repeat: int, processes: int) -> tuple:
+    """
+    Compiles a document several times with fresh accounts
+
+    :param prov_document: Document to compile
+    :type prov_document: ProvDocument
+    :param repeat: Number of compilations
+    :type repeat: int
+    :param processes: Number of signing processes (0: sign in the saving threads)
+    :type processes: int
+    :return: Seconds and number of signed transactions
+    :rtype: tuple
+    """
+    fd, bundle_path = tempfile.mkstemp(suffix='.jsonl')
+    os.close(fd)
+    client = clients.GraphConceptClient(local_store=local_stores.SqliteStore(), max_workers=max(4, 2 * processes),
+                                        signing_processes=processes)
+    try:
+        # start the worker processes before measuring
+        if client.signer is not None:
+            list(client.signer.map(abs, range(processes)))
+        seconds, count = 0.0, 0
+        for _ in range(repeat):
+            client.store = local_stores.SqliteStore()
+            start = time.perf_counter()
+            client.compile_document(prov_document, bundle_path)
+            seconds += time.perf_counter() - start
+            with open(bundle_path) as bundle:
+                count += sum(1 for _ in bundle)
+        return seconds, count
+    finally:
+        client.close()
+        os.remove(bundle_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of process pool signing")
+    parser.add_argument('--document', default='thesis', choices=['simple', 'simple2', 'quantified', 'thesis'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--processes', type=int, nargs='+', default=[0, 1, 2, 4])
+    args = parser.parse_args()
+    logging.getLogger('prov2bigchaindb').setLevel(logging.WARNING)
+
+    prov_document = utils.to_prov_document(content=setup_test_files()[args.document])
+    print("CPUs: {}, document: {}, repeat: {}".format(os.cpu_count(), args.document, args.repeat))
+    print("{:>9} {:>9} {:>9} {:>8}".format('processes', 'seconds', 'tx/s', 'speedup'))
+    baseline = None
+    for processes in args.processes:
+        seconds, count = compile_documents(prov_document, args.repeat, processes)
+        baseline = baseline or seconds
+        print("{:>9} {:>9.2f} {:>9.1f} {:>8.2f}".format(processes, seconds, count / seconds, baseline / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,7 @@ from unittest import mock
 
 from . import setup_test_files
 import bigchaindb_driver
-from prov2bigchaindb.core import clients, accounts, utils, exceptions, local_stores
+from prov2bigchaindb.core import clients, accounts, signing, utils, exceptions, local_stores, keypairs
 
 log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -59,6 +59,30 @@ class BaseAccountTest(unittest.TestCase):
         self.assertIsInstance(account.get_public_key(), str)
         self.assertEqual(account.get_public_key(), self.public_key)
 
+    @mock.patch('prov2bigchaindb.core.accounts.generate_keypair')
+    def test_lazy_keypair(self, mock_keypair):
+        accounts.BaseAccount(self.account_id, self.store)
+        mock_keypair.assert_not_called()
+        self.store.configure_mock(**{'get_account.side_effect': exceptions.NoAccountFoundException()})
+        pool = mock.Mock(spec=keypairs.KeypairPool, **{'get.return_value': ('pooled_private', 'pooled_public')})
+        account = accounts.BaseAccount(self.account_id, self.store, keypair_pool=pool)
+        mock_keypair.assert_not_called()
+        self.assertEqual(account.get_public_key(), 'pooled_public')
+        self.store.write_account.assert_called_once_with(self.account_id, 'pooled_public', 'pooled_private')
+
+    @mock.patch('prov2bigchaindb.core.accounts.generate_keypair')
+    def test_prefetch_accounts(self, mock_keypair):
+        mock_keypair.return_value = ('new_private', 'new_public')
+        self.store.get_accounts.return_value = {self.account_id: (self.account_id, self.public_key,
+                                                                  self.private_key, '1')}
+        rows = accounts.prefetch_accounts(self.store, [self.account_id, 'new'])
+        self.store.get_accounts.assert_called_once_with([self.account_id, 'new'])
+        self.store.write_accounts.assert_called_once_with([('new', 'new_public', 'new_private', None)])
+        account = accounts.BaseAccount('new', self.store, account=rows['new'])
+        self.assertEqual(account.public_key, 'new_public')
+        self.assertEqual(account.tx_id, '')
+        self.store.get_account.assert_not_called()
+
     @unittest.skip("testing skipping")
     def test__create_asset(self):
         raise NotImplementedError()
@@ -144,6 +168,142 @@ class DocumentConceptAccountTest(unittest.TestCase):
                                                                     private_keys=self.private_key)
         self.bdb_connection.transactions.send.assert_called_with(self.bdb_returned_transaction)
 
+    @mock.patch('prov2bigchaindb.core.utils.send_until_accepted')
+    @mock.patch('prov2bigchaindb.core.utils.wait_until_valid')
+    def test_positive_save_asset_pipelined(self, mock_wait, mock_send):
+        mock_send.return_value = self.bdb_returned_transaction
+        asset = {'data': {'prov': ''}}
+        account = accounts.DocumentConceptAccount(self.account_id, self.store, pipelined=True)
+        tx_id = account.save_asset(asset, self.bdb_connection)
+        self.bdb_connection.transactions.send.assert_called_once_with(self.bdb_returned_transaction)
+        mock_send.assert_called_once_with(self.bdb_returned_transaction, self.bdb_connection)
+        mock_wait.assert_called_once_with('1', self.bdb_connection)
+        self.assertEqual(self.bdb_connection.transactions.fulfill.call_count, 2)
+        self.assertEqual(tx_id, '1')
+
+    @mock.patch('prov2bigchaindb.core.utils.wait_until_valid')
+    def test_positive_save_asset_single_tx(self, mock_wait):
+        asset = {'data': {'prov': ''}}
+        account = accounts.DocumentConceptAccount(self.account_id, self.store, single_tx=True)
+        tx_id = account.save_asset(asset, self.bdb_connection)
+        self.bdb_connection.transactions.prepare.assert_called_once()
+        _, kwargs = self.bdb_connection.transactions.prepare.call_args
+        self.assertEqual(kwargs['operation'], 'CREATE')
+        self.assertEqual(kwargs['recipients'], self.public_key)
+        self.bdb_connection.transactions.send.assert_called_once_with(self.bdb_returned_transaction)
+        mock_wait.assert_not_called()
+        self.assertEqual(tx_id, '1')
+
+    @mock.patch('prov2bigchaindb.core.utils.wait_until_valid')
+    def test_positive_save_asset_deduplicate(self, mock_wait):
+        asset = {'data': {'prov': ''}}
+        self.store.get_asset_tx_id.return_value = None
+        account = accounts.DocumentConceptAccount(self.account_id, self.store, single_tx=True, deduplicate=True)
+        self.assertEqual(account.save_asset(asset, self.bdb_connection), '1')
+        # the hash is written once the transaction is valid
+        mock_wait.assert_called_once_with('1', self.bdb_connection)
+        content_hash = utils.asset_hash({'data': asset}, self.public_key, self.public_key, True)
+        self.store.get_asset_tx_id.assert_called_once_with(content_hash)
+        self.store.write_asset_hash.assert_called_once_with(content_hash, '1')
+        # the same asset is not sent again
+        self.store.get_asset_tx_id.return_value = '1'
+        self.assertEqual(account.save_asset(asset, self.bdb_connection), '1')
+        self.bdb_connection.transactions.send.assert_called_once_with(self.bdb_returned_transaction)
+
+    @mock.patch('prov2bigchaindb.core.utils.send_until_accepted')
+    @mock.patch('prov2bigchaindb.core.utils.wait_until_valid')
+    def test_positive_save_asset_journal(self, mock_wait, mock_send):
+        mock_send.return_value = self.bdb_returned_transaction
+        txs = [self.bdb_returned_transaction, self.bdb_returned_transaction]
+        asset = {'data': {'prov': ''}}
+        step = utils.asset_hash({'data': asset}, self.public_key, self.public_key, False)
+        self.store.get_journal_step.side_effect = [None, (txs, 'planned')]
+        account = accounts.DocumentConceptAccount(self.account_id, self.store, journal_id='doc')
+        self.assertEqual(account.save_asset(asset, self.bdb_connection), '1')
+        self.store.write_journal_step.assert_called_once_with('doc', step, txs)
+        self.assertEqual(mock_send.call_count, 2)
+        self.store.write_journal_state.assert_called_with('doc', step, 'valid')
+        # a resumed step sends only unknown transactions with the recorded signatures
+        self.store.get_journal_step.side_effect = None
+        self.store.get_journal_step.return_value = (txs, 'sent')
+        self.bdb_connection.transactions.fulfill.reset_mock()
+        mock_send.reset_mock()
+        self.assertEqual(account.save_asset(asset, self.bdb_connection), '1')
+        self.bdb_connection.transactions.fulfill.assert_not_called()
+        mock_send.assert_not_called()
+        # a valid step is not sent again
+        self.store.get_journal_step.return_value = (txs, 'valid')
+        mock_wait.reset_mock()
+        self.assertEqual(account.save_asset(asset, self.bdb_connection), '1')
+        mock_wait.assert_not_called()
+
+    def test_positive_save_asset_bundle(self):
+        bundle = mock.Mock()
+        asset = {'data': {'prov': ''}}
+        account = accounts.DocumentConceptAccount(self.account_id, self.store, bundle=bundle)
+        tx_id = account.save_asset(asset, self.bdb_connection)
+        bundle.write.assert_called_once_with([self.bdb_returned_transaction, self.bdb_returned_transaction])
+        self.bdb_connection.transactions.send.assert_not_called()
+        self.assertEqual(tx_id, '1')
+
+    def test_positive_save_asset_signer(self):
+        signer = mock.Mock(**{'submit.return_value.result.return_value': [self.bdb_returned_transaction,
+                                                                          self.bdb_returned_transaction]})
+        asset = {'data': {'prov': ''}}
+        account = accounts.DocumentConceptAccount(self.account_id, self.store, bundle=mock.Mock(), signer=signer)
+        tx_id = account.save_asset(asset, self.bdb_connection)
+        args, _ = signer.submit.call_args
+        self.assertEqual(args[:3], (signing.sign_record, self.public_key, self.private_key))
+        self.bdb_connection.transactions.fulfill.assert_not_called()
+        self.assertEqual(tx_id, '1')
+
+    @mock.patch('prov2bigchaindb.core.utils.wait_until_valid')
+    def test_positive_save_asset_tracker(self, mock_wait):
+        tracker = mock.Mock()
+        asset = {'data': {'prov': ''}}
+        account = accounts.DocumentConceptAccount(self.account_id, self.store, tracker=tracker)
+        tx_id = account.save_asset(asset, self.bdb_connection)
+        tracker.wait.assert_called_once_with('1')
+        mock_wait.assert_not_called()
+        self.assertEqual(tx_id, '1')
+
+
+class ManifestAccountTest(unittest.TestCase):
+    def setUp(self):
+        self.store = mock.Mock(spec=local_stores.SqliteStore,
+                               **{'get_account.return_value': ('manifest', 'public', 'private', None)})
+        self.bdb_connection = mock.Mock(spec=bigchaindb_driver.BigchainDB)
+        self.assets = []
+
+    def tearDown(self):
+        del self.store
+        del self.bdb_connection
+        del self.assets
+
+    def store_asset(self, bdb_connection, asset, metadata, recipient_pub_key):
+        self.assets.append(asset['data']['manifest'])
+        return {'id': 'm{}'.format(len(self.assets) - 1)}
+
+    @mock.patch('prov2bigchaindb.core.utils.wait_until_valid')
+    def test_save_manifest(self, mock_wait):
+        account = accounts.ManifestAccount('manifest', self.store, single_tx=True)
+        with mock.patch.object(account, '_store_asset', side_effect=self.store_asset):
+            root_id = account.save_manifest(['1', '2', '3'], self.bdb_connection)
+        self.assertEqual(root_id, 'm0')
+        self.assertEqual(self.assets, [{'tx_ids': ['1', '2', '3'], 'count': 3}])
+        mock_wait.assert_called_once_with('m0', self.bdb_connection)
+
+    @mock.patch('prov2bigchaindb.core.utils.wait_until_valid')
+    def test_save_manifest_chunked(self, mock_wait):
+        account = accounts.ManifestAccount('manifest', self.store, single_tx=True)
+        with mock.patch.object(account, '_store_asset', side_effect=self.store_asset):
+            root_id = account.save_manifest(['1', '2', '3', '4', '5'], self.bdb_connection, chunk_size=2)
+        self.assertEqual(root_id, 'm5')
+        self.assertEqual(self.assets, [{'tx_ids': ['1', '2']}, {'tx_ids': ['3', '4']}, {'tx_ids': ['5']},
+                                       {'manifests': ['m0', 'm1']}, {'manifests': ['m2']},
+                                       {'manifests': ['m3', 'm4'], 'count': 5}])
+        self.assertEqual(mock_wait.call_count, 6)
+
 
 class GraphConceptAccountTest(unittest.TestCase):
     def setUp(self):
@@ -157,12 +317,12 @@ class GraphConceptAccountTest(unittest.TestCase):
             self.id_mapping[rel.identifier] = ''
         self.public_key = 'public'
         self.private_key = 'private'
-        self.store = mock.Mock(spec=local_stores.SqliteStore,
-                               **{'get_account.return_value': (
-                                   str(self.prov_element.identifier),
-                                   self.public_key,
-                                   self.private_key,
-                                   None)})
+        self.store = mock.MagicMock(spec=local_stores.SqliteStore,
+                                    **{'get_account.return_value': (
+                                        str(self.prov_element.identifier),
+                                        self.public_key,
+                                        self.private_key,
+                                        None)})
 
         self.bdb_returned_transaction = {"operation": "CREATE",
                                          "outputs": [{"amount": 1,
@@ -285,12 +445,12 @@ class RoleConceptAccountTest(unittest.TestCase):
             self.id_mapping[rel.identifier] = ''
         self.public_key = 'public'
         self.private_key = 'private'
-        self.store = mock.Mock(spec=local_stores.SqliteStore,
-                               **{'get_account.return_value': (
-                                   str(self.prov_element.identifier),
-                                   self.public_key,
-                                   self.private_key,
-                                   None)})
+        self.store = mock.MagicMock(spec=local_stores.SqliteStore,
+                                    **{'get_account.return_value': (
+                                        str(self.prov_element.identifier),
+                                        self.public_key,
+                                        self.private_key,
+                                        None)})
 
         self.bdb_returned_transaction = {"operation": "CREATE",
                                          "outputs": [{"amount": 1,
@@ -404,3 +564,36 @@ class RoleConceptAccountTest(unittest.TestCase):
     @unittest.skip("testing skipping")
     def test__create_relations_document(self):
         raise NotImplementedError()
+
+
+class RoleConceptAccountElementTest(unittest.TestCase):
+    def setUp(self):
+        prov_document = utils.to_prov_document(content=setup_test_files()["simple2"])
+        account_data = clients.RoleConceptClient.calculate_account_data(prov_document)
+        self.agent, self.relations, self.elements, self.namespaces = account_data[1]
+        self.element, self.element_relations = list(self.elements[1].items())[0]
+        self.element_id = str(self.element.identifier)
+        self.store = mock.MagicMock(spec=local_stores.SqliteStore)
+        self.account_row = (str(self.agent.identifier), 'public', 'private', 'tx0')
+
+    def tearDown(self):
+        del self.store
+
+    def test_on_element_saved(self):
+        account = accounts.RoleConceptAccount(self.agent, self.relations, self.elements, {}, self.namespaces,
+                                              self.store, account=self.account_row)
+        account._on_element_saved(self.element, self.element_relations, 'tx1')
+        self.store.write_account.assert_called_once_with(self.element_id, '', '', 'tx1')
+        self.store.get_accounts.assert_not_called()
+
+    def test_on_element_saved_deduplicate(self):
+        account = accounts.RoleConceptAccount(self.agent, self.relations, self.elements, {}, self.namespaces,
+                                              self.store, account=self.account_row, deduplicate=True)
+        # an element saved before keeps its row and gets the new tx_id
+        self.store.get_accounts.return_value = {self.element_id: (self.element_id, '', '', 'tx1')}
+        account._on_element_saved(self.element, self.element_relations, 'tx2')
+        self.store.write_tx_id.assert_called_once_with(self.element_id, 'tx2')
+        self.store.write_account.assert_not_called()
+        self.store.get_accounts.return_value = {}
+        account._on_element_saved(self.element, self.element_relations, 'tx3')
+        self.store.write_account.assert_called_once_with(self.element_id, '', '', 'tx3')
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import unittest
+from unittest import mock
+
+from bigchaindb_driver import exceptions as bdb_exceptions
+
+from prov2bigchaindb.core import async_utils, block_cache, exceptions
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def coroutine_mock(*results):
+    """
+    Returns a coroutine function, which returns (or raises) the given results one after another
+    """
+    results_mock = mock.Mock(side_effect=results)
+
+    async def coroutine(*args, **kwargs):
+        return results_mock(*args, **kwargs)
+
+    coroutine.mock = results_mock
+    return coroutine
+
+
+class AsyncUtilityTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.connection = async_utils.AsyncBigchainDB('http://127.0.0.1:9984')
+
+    def tearDown(self):
+        self.loop.close()
+        del self.loop
+        del self.connection
+
+    @mock.patch('prov2bigchaindb.core.async_utils.asyncio.sleep', new=coroutine_mock(*[None] * 200))
+    def test_wait_until_valid(self):
+        self.connection.transactions.status = coroutine_mock({'status': 'backlog'}, {'status': 'valid'})
+        self.loop.run_until_complete(async_utils.wait_until_valid('1', self.connection))
+        self.assertEqual(self.connection.transactions.status.mock.call_count, 2)
+        self.connection.transactions.status = coroutine_mock(*[bdb_exceptions.NotFoundError()] * 100)
+        with self.assertRaises(exceptions.TransactionIdNotFound):
+            self.loop.run_until_complete(async_utils.wait_until_valid('1', self.connection))
+
+    @mock.patch('prov2bigchaindb.core.async_utils.asyncio.sleep', new=coroutine_mock(None))
+    def test_send_until_accepted(self):
+        tx = {'id': '1'}
+        not_valid = bdb_exceptions.BadRequest(400, 'Bad Request',
+                                              {'message': 'Invalid transaction (InputDoesNotExist)'})
+        self.connection.transactions.send = coroutine_mock(not_valid, tx)
+        ret = self.loop.run_until_complete(async_utils.send_until_accepted(tx, self.connection))
+        self.assertEqual(ret, tx)
+        self.connection.transactions.send = coroutine_mock(
+            bdb_exceptions.BadRequest(400, 'Bad Request', {'message': 'Invalid signature'}))
+        with self.assertRaises(exceptions.CreateRecordException):
+            self.loop.run_until_complete(async_utils.send_until_accepted(tx, self.connection))
+
+    def test_is_valid_tx(self):
+        self.connection.transactions.status = coroutine_mock({'status': 'valid'}, {'status': 'undecided'},
+                                                             bdb_exceptions.NotFoundError())
+        self.assertTrue(self.loop.run_until_complete(async_utils.is_valid_tx('1', self.connection)))
+        self.assertFalse(self.loop.run_until_complete(async_utils.is_valid_tx('1', self.connection)))
+        with self.assertRaises(exceptions.TransactionIdNotFound):
+            self.loop.run_until_complete(async_utils.is_valid_tx('1', self.connection))
+
+    def test_is_block_to_tx_valid(self):
+        self.connection.blocks.get = coroutine_mock(['1'], ['1'], [], ['1'])
+        self.connection.blocks.status = coroutine_mock({'status': 'valid'}, {'status': 'invalid'},
+                                                       bdb_exceptions.NotFoundError())
+        self.assertTrue(self.loop.run_until_complete(async_utils.is_block_to_tx_valid('1', self.connection)))
+        self.assertFalse(self.loop.run_until_complete(async_utils.is_block_to_tx_valid('1', self.connection)))
+        with self.assertRaises(exceptions.TransactionIdNotFound):
+            self.loop.run_until_complete(async_utils.is_block_to_tx_valid('1', self.connection))
+        with self.assertRaises(exceptions.BlockIdNotFound):
+            self.loop.run_until_complete(async_utils.is_block_to_tx_valid('1', self.connection))
+
+    def test_is_block_to_tx_valid_cache(self):
+        cache = block_cache.BlockStatusCache()
+        self.connection.blocks.get = coroutine_mock(['b1'])
+        self.connection.blocks.status = coroutine_mock({'status': 'valid'})
+        self.connection.blocks.retrieve = coroutine_mock({'block': {'transactions': [{'id': '1'}, {'id': '2'}]}})
+        self.assertTrue(self.loop.run_until_complete(async_utils.is_block_to_tx_valid('1', self.connection, cache)))
+        # 2 is in the cached valid block
+        self.assertTrue(self.loop.run_until_complete(async_utils.is_block_to_tx_valid('2', self.connection, cache)))
+        self.assertEqual(self.connection.blocks.get.mock.call_count, 1)
+        self.assertEqual(self.connection.blocks.status.mock.call_count, 1)
+
+    def test_are_blocks_to_txs_valid(self):
+        cache = block_cache.BlockStatusCache()
+        self.connection.blocks.get = coroutine_mock(['b1'], [])
+        self.connection.blocks.status = coroutine_mock({'status': 'valid'})
+        self.connection.blocks.retrieve = coroutine_mock({'block': {'transactions': [{'id': '1'}, {'id': '2'}]}})
+        ret = self.loop.run_until_complete(async_utils.are_blocks_to_txs_valid(['1', '2', '3'], self.connection,
+                                                                               cache))
+        # 2 is in the same valid block as 1, 3 is in no block yet
+        self.assertEqual(ret, {'1': True, '2': True, '3': False})
+        self.assertEqual(self.connection.blocks.get.mock.call_count, 2)
+        self.assertEqual(self.connection.blocks.status.mock.call_count, 1)
+
+    def test_is_block_to_tx_valid_concurrent(self):
+        cache = block_cache.BlockStatusCache()
+        status_mock = mock.Mock(return_value={'status': 'valid'})
+
+        async def status(block_id):
+            # the other coroutines miss while the block is looked up
+            await asyncio.sleep(0.01)
+            return status_mock(block_id)
+
+        async def check_all():
+            return await asyncio.gather(*[async_utils.is_block_to_tx_valid(tx_id, self.connection, cache)
+                                          for tx_id in ['1', '2', '3']])
+
+        self.connection.blocks.get = coroutine_mock(['b1'], ['b1'], ['b1'])
+        self.connection.blocks.status = status
+        self.connection.blocks.retrieve = coroutine_mock({'block': {'transactions': [{'id': '1'}, {'id': '2'}]}})
+        self.assertEqual(self.loop.run_until_complete(check_all()), [True, True, True])
+        self.assertEqual(status_mock.call_count, 1)
+        self.assertEqual(self.connection.blocks.retrieve.mock.call_count, 1)
+        # 3 was missing in the retrieved block, but is in the valid block
+        self.assertEqual(cache.get_block('3'), 'b1')
@@ -0,0 +1,68 @@
+import logging
+import unittest
+
+from prov2bigchaindb.core import block_cache
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class BlockStatusCacheTest(unittest.TestCase):
+    def test_valid_blocks(self):
+        cache = block_cache.BlockStatusCache()
+        cache.add_block('b1', 'valid', ['1', '2'])
+        cache.add_block('b2', 'undecided', ['3'])
+        cache.add_block('b3', 'invalid', ['4'])
+        self.assertEqual(cache.get_block('2'), 'b1')
+        self.assertEqual(cache.get_status('b1'), 'valid')
+        # transactions of other blocks may still go into a new block
+        self.assertIsNone(cache.get_block('3'))
+        self.assertIsNone(cache.get_status('b2'))
+        self.assertIsNone(cache.get_block('4'))
+        self.assertIsNone(cache.get_status('b3'))
+
+    def test_max_transactions(self):
+        cache = block_cache.BlockStatusCache(max_transactions=2)
+        cache.add_block('b1', 'valid', ['1', '2'])
+        # 1 is used recently, so 2 is dropped
+        cache.get_block('1')
+        cache.add_block('b2', 'valid', ['3'])
+        self.assertEqual(cache.get_block('1'), 'b1')
+        self.assertIsNone(cache.get_block('2'))
+        self.assertEqual(cache.get_block('3'), 'b2')
+
+    def test_max_blocks(self):
+        cache = block_cache.BlockStatusCache(max_blocks=2)
+        cache.add_block('b1', 'valid')
+        cache.add_block('b2', 'valid')
+        cache.get_status('b1')
+        cache.add_block('b3', 'valid')
+        self.assertEqual(cache.get_status('b1'), 'valid')
+        self.assertIsNone(cache.get_status('b2'))
+        self.assertEqual(cache.get_status('b3'), 'valid')
+
+    def test_lookup(self):
+        cache = block_cache.BlockStatusCache()
+        lookup, owner = cache.start_lookup('b1')
+        self.assertTrue(owner)
+        # a concurrent lookup waits for the first one
+        shared, owner = cache.start_lookup('b1')
+        self.assertFalse(owner)
+        self.assertIs(shared, lookup)
+        cache.finish_lookup('b1', 'valid', ['1'])
+        self.assertEqual(shared.result(), 'valid')
+        self.assertEqual(cache.get_block('1'), 'b1')
+        # a cached block needs no lookup
+        cached, owner = cache.start_lookup('b1')
+        self.assertFalse(owner)
+        self.assertEqual(cached.result(), 'valid')
+
+    def test_lookup_exception(self):
+        cache = block_cache.BlockStatusCache()
+        lookup, owner = cache.start_lookup('b1')
+        cache.finish_lookup('b1', exception=ValueError('b1'))
+        with self.assertRaises(ValueError):
+            lookup.result()
+        # a failed lookup is not cached
+        lookup, owner = cache.start_lookup('b1')
+        self.assertTrue(owner)
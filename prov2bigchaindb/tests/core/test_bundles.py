@@ -0,0 +1,42 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from prov2bigchaindb.core import bundles
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class BundleTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        self.creation_tx = {'id': '1', 'operation': 'CREATE', 'asset': {'data': {'prov': ''}}}
+        self.transfer_tx = {'id': '2', 'operation': 'TRANSFER', 'asset': {'id': '1'}}
+        self.single_tx = {'id': '3', 'operation': 'CREATE', 'asset': {'data': {'prov': ''}}}
+
+    def tearDown(self):
+        os.remove(self.path)
+        del self.path
+        del self.creation_tx
+        del self.transfer_tx
+        del self.single_tx
+
+    def test_write_and_read(self):
+        with bundles.BundleWriter(self.path) as writer:
+            writer.write([self.creation_tx, self.transfer_tx])
+            writer.write([self.single_tx])
+        self.assertEqual(writer.count, 3)
+        self.assertTrue(writer.file.closed)
+        txs = bundles.read_bundle(self.path)
+        self.assertEqual(txs, [self.creation_tx, self.transfer_tx, self.single_tx])
+
+    def test_split_bundle(self):
+        creations, transfers = bundles.split_bundle([self.creation_tx, self.transfer_tx, self.single_tx])
+        self.assertEqual(creations, [self.creation_tx, self.single_tx])
+        self.assertEqual(transfers, [self.transfer_tx])
+
+    def test_record_tx_ids(self):
+        self.assertEqual(bundles.record_tx_ids([self.creation_tx, self.transfer_tx, self.single_tx]), ['2', '3'])
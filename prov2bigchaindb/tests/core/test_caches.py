@@ -0,0 +1,57 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from prov2bigchaindb.core import caches, utils
+from prov2bigchaindb.tests.core import setup_test_files
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class TransactionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.test_prov_files = setup_test_files()
+        self.prov_document = utils.to_prov_document(content=self.test_prov_files["simple"])
+        self.tx = {'id': '1', 'asset': {'data': {'prov': self.prov_document.serialize(format='json')}}}
+        fd, self.db_name = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.db_name)
+        del self.test_prov_files
+        del self.prov_document
+        del self.tx
+        del self.db_name
+
+    def test_memory_tier(self):
+        cache = caches.TransactionCache(max_entries=2)
+        cache.put('1', self.tx)
+        cache.put('2', self.tx, verified=False)
+        # unverified entries are no documents to use
+        self.assertIsNone(cache.get_document('2'))
+        self.assertEqual(cache.get_document('1'), self.prov_document)
+        cache.put('3', self.tx)
+        # 2 is the least recently used entry
+        self.assertIsNone(cache.get('2'))
+        self.assertIsNotNone(cache.get('1'))
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_disk_tier(self):
+        cache = caches.TransactionCache(max_entries=1, db_name=self.db_name)
+        cache.put('1', self.tx)
+        cache.put('2', self.tx)
+        self.assertNotIn('1', cache.entries)
+        self.assertEqual(cache.get_document('1'), self.prov_document)
+        self.assertIn('1', cache.entries)
+        cache.close()
+        # entries survive a restart
+        cache = caches.TransactionCache(db_name=self.db_name)
+        tx, verified, document = cache.get('2')
+        self.assertEqual(tx, self.tx)
+        self.assertTrue(verified)
+        self.assertEqual(document, self.prov_document)
+        cache.clear()
+        self.assertIsNone(cache.get('2'))
+        cache.close()
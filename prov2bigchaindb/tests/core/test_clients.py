@@ -1,11 +1,13 @@
+import asyncio
 import logging
 import unittest
 from time import sleep
 from unittest import mock
 
 from bigchaindb_driver import pool as bdpool
+from prov.model import ProvDocument
 
-from prov2bigchaindb.core import utils, clients
+from prov2bigchaindb.core import utils, clients, async_clients, accounts, caches, exceptions, local_stores, node_pool
 from prov2bigchaindb.tests.core import setup_test_files
 
 log = logging.getLogger(__name__)
@@ -45,6 +47,35 @@ class BaseClientTest(unittest.TestCase):
     def test_test_transaction(self):
         raise NotImplementedError()
 
+    @mock.patch('prov2bigchaindb.core.clients.local_stores.SqliteStore')
+    @mock.patch('prov2bigchaindb.core.clients.bd.BigchainDB')
+    def test_test_transaction_block_cache(self, mock_bdb, mock_store):
+        mock_bdb.transactions.status.return_value = {'status': 'valid'}
+        mock_bdb.blocks.get.return_value = ['b1']
+        mock_bdb.transport.forward_request.return_value = {'status': 'valid'}
+        mock_bdb.blocks.retrieve.return_value = {'block': {'transactions': [{'id': '1'}, {'id': '2'}]}}
+        baseclient = clients.BaseClient(self.host, self.port)
+        baseclient.connection_pool = bdpool.Pool([mock_bdb])
+        self.assertTrue(baseclient.test_transaction({'id': '1'}))
+        mock_bdb.blocks.retrieve.assert_called_once_with('b1')
+        mock_bdb.reset_mock()
+        # the second transaction of the cached valid block needs no request
+        self.assertTrue(baseclient.test_transaction({'id': '2'}))
+        self.assertEqual(mock_bdb.mock_calls, [])
+        baseclient.close()
+
+    @mock.patch('prov2bigchaindb.core.clients.local_stores.SqliteStore')
+    def test_test_transaction_block_cache_async(self, mock_store):
+        mock_connection = mock.MagicMock()
+        client = async_clients.AsyncDocumentConceptClient(self.account_id, self.host, self.port)
+        client.connection_pool = bdpool.Pool([mock_connection])
+        client.block_cache.add_block('b1', 'valid', ['1', '2'])
+        loop = asyncio.new_event_loop()
+        self.assertTrue(loop.run_until_complete(client.test_transaction({'id': '2'})))
+        self.assertEqual(mock_connection.mock_calls, [])
+        loop.run_until_complete(client.close())
+        loop.close()
+
     @mock.patch('prov2bigchaindb.core.clients.local_stores.SqliteStore')
     @mock.patch('prov2bigchaindb.core.clients.bd.BigchainDB')
     def test_save_document(self, mock_bdb, mock_store):
@@ -108,6 +139,24 @@ class DocumentConceptClientTest(unittest.TestCase):
         doc_client._get_bigchain_connection().transactions.retrieve.assert_called_with('1')
         self.assertEqual(document, self.prov_document)
 
+    @mock.patch('prov2bigchaindb.core.clients.utils.is_valid_tx')
+    @mock.patch('prov2bigchaindb.core.clients.utils.is_block_to_tx_valid')
+    @mock.patch('prov2bigchaindb.core.clients.local_stores.SqliteStore')
+    @mock.patch('prov2bigchaindb.core.clients.bd.BigchainDB')
+    @mock.patch('prov2bigchaindb.core.clients.accounts.DocumentConceptAccount')
+    def test__get_asset_tx(self, mock_account, mock_bdb, mock_store, mock_test_block, mock_test_tx):
+        creation_tx = {'id': '1', 'operation': 'CREATE', 'asset': {'data': {'prov': ''}}}
+        transfer_tx = {'id': '2', 'operation': 'TRANSFER', 'asset': {'id': '1'}}
+        mock_bdb.transactions.retrieve.side_effect = lambda tx_id: {'1': creation_tx, '2': transfer_tx}[tx_id]
+        mock_test_block.return_value = True
+        mock_test_tx.return_value = True
+        doc_client = clients.DocumentConceptClient(self.account_id, self.host, self.port)
+        doc_client.connection_pool = bdpool.Pool([mock_bdb])
+        # Two transaction layout
+        self.assertEqual(doc_client._get_asset_tx('2'), creation_tx)
+        # Single transaction layout
+        self.assertEqual(doc_client._get_asset_tx('1'), creation_tx)
+
     @mock.patch('prov2bigchaindb.core.clients.local_stores.SqliteStore')
     @mock.patch('prov2bigchaindb.core.clients.bd.BigchainDB')
     @mock.patch('prov2bigchaindb.core.clients.accounts.DocumentConceptAccount')
@@ -123,6 +172,39 @@ class DocumentConceptClientTest(unittest.TestCase):
         self.assertIsInstance(tx_id, str)
         self.assertEqual(tx_id, '1')
 
+    @mock.patch('prov2bigchaindb.core.accounts.utils.is_known_tx')
+    @mock.patch('prov2bigchaindb.core.accounts.utils.send_until_accepted')
+    @mock.patch('prov2bigchaindb.core.accounts.BaseAccount._wait_until_valid')
+    @mock.patch('prov2bigchaindb.core.accounts.BaseAccount._compile_asset')
+    @mock.patch('prov2bigchaindb.core.clients.bd.BigchainDB')
+    def test_save_document_journal(self, mock_bdb, mock_compile, mock_wait, mock_send, mock_known):
+        txs = [{'id': 'create'}, {'id': 'transfer'}]
+        mock_compile.return_value = txs
+        mock_send.side_effect = lambda tx, connection: tx
+        mock_known.side_effect = lambda tx_id, connection: tx_id == 'create'
+        mock_wait.side_effect = [None, exceptions.TransactionIdNotFound('transfer'), None, None]
+        store = local_stores.SqliteStore()
+        doc_client = clients.DocumentConceptClient(self.account_id, self.host, self.port, local_store=store,
+                                                   journal=True)
+        doc_client.connection_pool = bdpool.Pool([mock_bdb])
+        journal_id = utils.document_hash(self.prov_document)
+
+        # failed save leaves the signed transactions in the journal
+        with self.assertRaises(exceptions.TransactionIdNotFound):
+            doc_client.save_document(self.prov_document)
+        progress = store.get_journal(journal_id)
+        self.assertEqual(list(progress.values()), ['sent'])
+        self.assertEqual(mock_send.call_count, 2)
+
+        # resumed save sends only the unknown transaction and deletes the journal
+        tx_id = doc_client.save_document(self.prov_document)
+        self.assertEqual(tx_id, 'transfer')
+        mock_compile.assert_called_once()
+        self.assertEqual(mock_send.call_count, 3)
+        mock_send.assert_called_with(txs[1], mock_bdb)
+        self.assertEqual(store.get_journal(journal_id), {})
+        self.assertIsNone(doc_client.account.journal_id)
+
 
 class GraphConceptClientTest(unittest.TestCase):
     """Test BigchainDB Base Client"""
@@ -157,6 +239,14 @@ class GraphConceptClientTest(unittest.TestCase):
         self.assertIsInstance(graph_client.node, str)
         self.assertEqual(graph_client.node, 'http://127.0.0.1:9984')
 
+    def test_positive_init_nodes(self):
+        nodes = ['http://127.0.0.1:9984', 'http://127.0.0.2:9984']
+        graph_client = clients.GraphConceptClient(num_connections=2, nodes=nodes)
+        self.assertEqual(graph_client.nodes, nodes)
+        self.assertEqual(len(graph_client.connections), 4)
+        self.assertEqual(len({id(connection) for connection in graph_client.connections}), 4)
+        self.assertIsInstance(graph_client.connection_pool.picker, node_pool.LatencyPicker)
+
     @unittest.skip("testing skipping")
     @mock.patch('prov2bigchaindb.core.clients.local_stores.SqliteStore')
     @mock.patch('prov2bigchaindb.core.clients.accounts.GraphConceptAccount')
@@ -172,6 +262,21 @@ class GraphConceptClientTest(unittest.TestCase):
             # print("\twithout: ",relations['without_id'])
             pass
 
+    @mock.patch('prov2bigchaindb.core.clients.bd.BigchainDB')
+    def test__schedule_document(self, mock_bdb):
+        graph_client = clients.GraphConceptClient(self.host, self.port, local_store=local_stores.SqliteStore(),
+                                                  max_workers=3)
+        document_accounts = [accounts.GraphConceptAccount(element, relations, {}, namespaces, graph_client.store)
+                             for element, relations, namespaces in
+                             clients.GraphConceptClient.calculate_account_data(self.prov_document)]
+        tasks, instance_keys, relation_keys = graph_client._schedule_document(document_accounts)
+        waves = tasks.waves()
+        self.assertEqual(tasks.max_workers, 3)
+        self.assertEqual(len(instance_keys), len(document_accounts))
+        self.assertEqual(set(waves[0]), set(instance_keys))
+        self.assertEqual(set(key for wave in waves[1:] for key in wave), set(relation_keys))
+        self.assertEqual(len(relation_keys), len(self.prov_document.get_records()) - len(document_accounts))
+
     @unittest.skip("testing skipping")
     @mock.patch('prov2bigchaindb.core.clients.utils.is_valid_tx')
     @mock.patch('prov2bigchaindb.core.clients.utils.is_block_to_tx_valid')
@@ -192,6 +297,208 @@ class GraphConceptClientTest(unittest.TestCase):
         graph_client.connection.transactions.retrieve.assert_called_with('1')
         self.assertEqual(document, self.prov_document)
 
+    @mock.patch('prov2bigchaindb.core.clients.utils.are_blocks_to_txs_valid')
+    @mock.patch('prov2bigchaindb.core.clients.local_stores.SqliteStore')
+    def test_get_document_order(self, mock_store, mock_check):
+        records = self.prov_document.get_records()
+        documents = {}
+        for i, record in enumerate(records):
+            documents[str(i)] = ProvDocument()
+            documents[str(i)].add_record(record)
+
+        def get_asset_document(tx_id):
+            # first ids finish last
+            sleep(0.01 * (len(records) - int(tx_id)))
+            return documents[tx_id]
+
+        graph_client = clients.GraphConceptClient(self.host, self.port, max_workers=4)
+        graph_client._get_asset_document = get_asset_document
+        document = graph_client.get_document([str(i) for i in range(len(records))])
+        self.assertEqual(document.get_records(), records)
+        graph_client.close()
+
+    @mock.patch('prov2bigchaindb.core.clients.local_stores.SqliteStore')
+    @mock.patch('prov2bigchaindb.core.clients.bd.BigchainDB')
+    def test_get_document_blocks(self, mock_bdb, mock_store):
+        records = self.prov_document.get_records()
+        txs = {}
+        for i, record in enumerate(records):
+            document = ProvDocument()
+            document.add_record(record)
+            txs[str(i)] = {'id': str(i), 'asset': {'data': {'prov': document.serialize(format='json')}}}
+        mock_bdb.transactions.retrieve.side_effect = lambda tx_id: txs[tx_id]
+        mock_bdb.blocks.get.return_value = ['b1']
+        mock_bdb.transport.forward_request.return_value = {'status': 'valid'}
+        mock_bdb.blocks.retrieve.return_value = {'block': {'transactions': [{'id': tx_id} for tx_id in txs]}}
+        graph_client = clients.GraphConceptClient(self.host, self.port, max_workers=2)
+        graph_client.connection_pool = bdpool.Pool([mock_bdb])
+        document = graph_client.get_document([str(i) for i in range(len(records))])
+        self.assertEqual(document.get_records(), records)
+        # all transactions are in one block, which is queried once
+        self.assertEqual(mock_bdb.blocks.get.call_count, 1)
+        self.assertEqual(mock_bdb.transport.forward_request.call_count, 1)
+        self.assertEqual(mock_bdb.blocks.retrieve.call_count, 1)
+        mock_bdb.transactions.status.assert_not_called()
+        graph_client.close()
+
+    @mock.patch('prov2bigchaindb.core.clients.utils.are_blocks_to_txs_valid')
+    @mock.patch('prov2bigchaindb.core.clients.local_stores.SqliteStore')
+    def test_get_document_cache(self, mock_store, mock_check):
+        tx = {'id': '1', 'asset': {'data': {'prov': self.prov_document.serialize(format='json')}}}
+        graph_client = clients.GraphConceptClient(self.host, self.port, tx_cache=caches.TransactionCache())
+        graph_client._get_asset_tx = mock.Mock(return_value=tx)
+        self.assertEqual(graph_client.get_document(['1']), self.prov_document)
+        # repeated reads need no requests
+        self.assertEqual(graph_client.get_document(['1']), self.prov_document)
+        graph_client._get_asset_tx.assert_called_once_with('1')
+        graph_client.close()
+
+    @mock.patch('prov2bigchaindb.core.clients.utils.are_blocks_to_txs_valid')
+    @mock.patch('prov2bigchaindb.core.clients.local_stores.SqliteStore')
+    def test_get_document_manifest(self, mock_store, mock_check):
+        records = self.prov_document.get_records()
+        manifests = {'root': {'manifests': ['m0', 'm1'], 'count': len(records)},
+                     'm0': {'tx_ids': ['0', '1']},
+                     'm1': {'tx_ids': [str(i) for i in range(2, len(records))]}}
+
+        def get_asset_document(tx_id):
+            document = ProvDocument()
+            document.add_record(records[int(tx_id)])
+            return document
+
+        graph_client = clients.GraphConceptClient(self.host, self.port)
+        graph_client._get_asset_tx = lambda tx_id: {'asset': {'data': {'manifest': manifests[tx_id]}}}
+        graph_client._get_asset_document = get_asset_document
+        document = graph_client.get_document('root')
+        self.assertEqual(document.get_records(), records)
+        # the manifests of a level are checked at once
+        self.assertEqual(mock_check.call_args_list[0][0][0], ['m0', 'm1'])
+        graph_client._get_asset_tx = lambda tx_id: {'asset': {'data': {'prov': ''}}}
+        with self.assertRaises(exceptions.NoManifestFoundException):
+            graph_client.get_document('root')
+        graph_client.close()
+
+    @mock.patch('prov2bigchaindb.core.clients.utils.are_blocks_to_txs_valid')
+    @mock.patch('prov2bigchaindb.core.clients.local_stores.SqliteStore')
+    def test_iter_document(self, mock_store, mock_check):
+        records = self.prov_document.get_records()
+        retrieved = []
+
+        def get_asset_document(tx_id):
+            retrieved.append(tx_id)
+            document = ProvDocument()
+            document.add_record(records[int(tx_id)])
+            return document
+
+        graph_client = clients.GraphConceptClient(self.host, self.port, max_workers=1)
+        graph_client._get_asset_document = get_asset_document
+        chunks = graph_client.iter_document([str(i) for i in range(len(records))])
+        namespaces, record = next(chunks)
+        self.assertEqual(record, records[0])
+        # only a window of transactions is retrieved ahead
+        self.assertLessEqual(len(retrieved), 3)
+        self.assertEqual([record for _, record in chunks], records[1:])
+        # the blocks are checked for each batch of 2 * max_workers ids
+        tx_ids = [str(i) for i in range(len(records))]
+        self.assertEqual([call[0][0] for call in mock_check.call_args_list],
+                         [tx_ids[i:i + 2] for i in range(0, len(tx_ids), 2)])
+        graph_client.close()
+
+    @mock.patch('prov2bigchaindb.core.clients.local_stores.SqliteStore')
+    def test_iter_document_async(self, mock_store):
+        records = self.prov_document.get_records()
+        retrieved = []
+
+        async def get_asset_document(tx_id):
+            retrieved.append(tx_id)
+            document = ProvDocument()
+            document.add_record(records[int(tx_id)])
+            return document
+
+        async def consume(graph_client):
+            chunks = graph_client.iter_document([str(i) for i in range(len(records))])
+            self.assertEqual(retrieved, [])
+            namespaces, record = await chunks.__anext__()
+            self.assertEqual(record, records[0])
+            # only a window of transactions is retrieved ahead
+            self.assertLessEqual(len(retrieved), 3)
+            rest = []
+            async for _, record in chunks:
+                rest.append(record)
+            self.assertEqual(rest, records[1:])
+            await graph_client.close()
+
+        async def check_blocks(tx_ids):
+            checked.append(tx_ids)
+            return {tx_id: True for tx_id in tx_ids}
+
+        checked = []
+        graph_client = async_clients.AsyncGraphConceptClient(self.host, self.port, max_workers=1)
+        graph_client._get_asset_document = get_asset_document
+        graph_client._check_blocks = check_blocks
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(consume(graph_client))
+        loop.close()
+        # the blocks are checked for each batch of 2 * max_workers ids
+        tx_ids = [str(i) for i in range(len(records))]
+        self.assertEqual(checked, [tx_ids[i:i + 2] for i in range(0, len(tx_ids), 2)])
+
+    @mock.patch('prov2bigchaindb.core.clients.utils.is_valid_tx')
+    @mock.patch('prov2bigchaindb.core.clients.utils.is_block_to_tx_valid')
+    @mock.patch('prov2bigchaindb.core.clients.local_stores.SqliteStore')
+    @mock.patch('prov2bigchaindb.core.clients.bd.BigchainDB')
+    def test_get_subgraph(self, mock_bdb, mock_store, mock_test_block, mock_test_tx):
+        mock_test_block.return_value = True
+        mock_test_tx.return_value = True
+        # every asset is a CREATE by its account and a TRANSFER to the account (instance) or the object (relation)
+        txs = {}
+        outputs = {}
+        for tx_id, identifiers, owner, recipient in [('e1', ['E1'], 'k1', 'k1'), ('e2', ['E2'], 'k2', 'k2'),
+                                                     ('e3', ['E3'], 'k3', 'k3'), ('r1', ['E2', 'E1'], 'k2', 'k1'),
+                                                     ('r2', ['E3', 'E2'], 'k3', 'k2')]:
+            document = ProvDocument()
+            ex = document.add_namespace('ex', 'http://example.org/')
+            data = {}
+            if len(identifiers) == 1:
+                document.entity(ex[identifiers[0]])
+            else:
+                document.wasDerivedFrom(ex[identifiers[0]], ex[identifiers[1]])
+                data['map'] = {'ex:' + identifier: identifier.lower() + 't' for identifier in identifiers}
+            data['prov'] = document.serialize(format='json')
+            txs[tx_id] = {'id': tx_id, 'operation': 'CREATE', 'inputs': [{'owners_before': [owner]}],
+                          'asset': {'data': data}}
+            txs[tx_id + 't'] = {'id': tx_id + 't', 'operation': 'TRANSFER', 'inputs': [{'owners_before': [owner]}],
+                                'asset': {'id': tx_id}}
+            outputs.setdefault((owner, True), []).append({'transaction_id': tx_id, 'output_index': 0})
+            outputs.setdefault((recipient, False), []).append({'transaction_id': tx_id + 't', 'output_index': 0})
+        mock_bdb.transactions.retrieve.side_effect = lambda tx_id: txs[tx_id]
+        mock_bdb.transactions.get.side_effect = lambda asset_id, operation: [txs[asset_id + 't']]
+        mock_bdb.outputs.get.side_effect = lambda public_key, spent: outputs.get((public_key, spent), [])
+
+        graph_client = clients.GraphConceptClient(self.host, self.port)
+        graph_client.connection_pool = bdpool.Pool([mock_bdb])
+        # outgoing relations are spent CREATEs, incoming ones unspent TRANSFERs, the instance itself is skipped
+        self.assertEqual(graph_client._instance_neighbours(txs['e2'], 'out'), ['r1'])
+        self.assertEqual(graph_client._instance_neighbours(txs['e2'], 'in'), ['r2t'])
+        self.assertEqual(graph_client._instance_neighbours(txs['e2'], 'both'), ['r1', 'r2t'])
+
+        def identifiers(document):
+            return sorted(str(record.identifier) for record in document.get_records() if record.identifier)
+
+        self.assertEqual(identifiers(graph_client.get_subgraph('e3t', depth=0)), ['ex:E3'])
+        self.assertEqual(identifiers(graph_client.get_subgraph('e3t', depth=1, direction='out')),
+                         ['ex:E2', 'ex:E3'])
+        self.assertEqual(identifiers(graph_client.get_subgraph('e3t', depth=2, direction='out')),
+                         ['ex:E1', 'ex:E2', 'ex:E3'])
+        self.assertEqual(identifiers(graph_client.get_subgraph('e3t', depth=2, direction='in')), ['ex:E3'])
+        self.assertEqual(identifiers(graph_client.get_subgraph('r1t', depth=1, direction='both')),
+                         ['ex:E1', 'ex:E2'])
+        mock_bdb.transactions.retrieve.reset_mock()
+        self.assertEqual(len(graph_client.get_subgraph('e2t', depth=1).get_records()), 5)
+        retrieved = [call[0][0] for call in mock_bdb.transactions.retrieve.call_args_list]
+        self.assertEqual(retrieved.count('e2t'), 1)
+        graph_client.close()
+
     @unittest.skip("testing skipping")
     @mock.patch('prov2bigchaindb.core.clients.local_stores.SqliteStore')
     @mock.patch('prov2bigchaindb.core.clients.clients.bd.BigchainDB')
@@ -259,6 +566,20 @@ class RoleConceptClientTest(unittest.TestCase):
             # print("\twithout: ",relations['without_id'])
             pass
 
+    @mock.patch('prov2bigchaindb.core.clients.bd.BigchainDB')
+    def test__schedule_document(self, mock_bdb):
+        role_client = clients.RoleConceptClient(self.host, self.port, local_store=local_stores.SqliteStore(),
+                                                max_workers=3)
+        prov_document = utils.to_prov_document(content=self.test_prov_files["simple2"])
+        document_accounts = [accounts.RoleConceptAccount(agent, relations, elements, {}, namespaces, role_client.store)
+                             for agent, relations, elements, namespaces in
+                             clients.RoleConceptClient.calculate_account_data(prov_document)]
+        tasks, instance_keys, element_keys = role_client._schedule_document(document_accounts)
+        self.assertEqual(tasks.waves(), [instance_keys, element_keys])
+        self.assertEqual(len(element_keys), sum(len(account.prov_elements) for account in document_accounts))
+        self.assertEqual([key[1] for key in element_keys],
+                         sorted([key[1] for key in element_keys], key=[key[1] for key in instance_keys].index))
+
     @unittest.skip("testing skipping")
     @mock.patch('prov2bigchaindb.core.clients.utils.is_valid_tx')
     @mock.patch('prov2bigchaindb.core.clients.utils.is_block_to_tx_valid')
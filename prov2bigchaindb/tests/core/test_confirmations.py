@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import threading
+import unittest
+from unittest import mock
+
+from aiohttp import web
+from bigchaindb_driver import exceptions as bdb_exceptions
+
+from prov2bigchaindb.core import confirmations, exceptions
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class ConfirmationTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.connection = mock.Mock()
+        self.tracker = confirmations.ConfirmationTracker(self.connection, initial_delay=0.001, max_delay=0.01,
+                                                         max_trials=3)
+
+    def tearDown(self):
+        self.tracker.stop()
+        del self.tracker
+        del self.connection
+
+    def test_register(self):
+        self.connection.transactions.status.side_effect = [{'status': 'backlog'}, {'status': 'undecided'},
+                                                           {'status': 'valid'}]
+        future = self.tracker.register('1')
+        self.assertIs(self.tracker.register('1'), future)
+        self.assertEqual(future.result(timeout=5), '1')
+        self.assertEqual(self.connection.transactions.status.call_count, 3)
+        self.assertEqual(self.tracker.pending, {})
+
+    def test_wait_many(self):
+        self.connection.transactions.status.return_value = {'status': 'valid'}
+        futures = [self.tracker.register(str(i)) for i in range(50)]
+        self.assertEqual([future.result(timeout=5) for future in futures], [str(i) for i in range(50)])
+        self.assertEqual(self.connection.transactions.status.call_count, 50)
+
+    def test_negative_not_found(self):
+        self.connection.transactions.status.side_effect = bdb_exceptions.NotFoundError()
+        with self.assertRaises(exceptions.TransactionIdNotFound):
+            self.tracker.wait('1', timeout=5)
+        self.assertEqual(self.connection.transactions.status.call_count, 3)
+
+    def test_negative_other_error(self):
+        self.connection.transactions.status.side_effect = ValueError('read timeout')
+        with self.assertRaises(exceptions.TransactionIdNotFound):
+            self.tracker.wait('1', timeout=5)
+        self.assertEqual(self.connection.transactions.status.call_count, 3)
+        self.assertTrue(self.tracker.thread.is_alive())
+
+    def test_negative_timeout(self):
+        self.connection.transactions.status.return_value = {'status': 'backlog'}
+        self.tracker.wait_timeout = 0.05
+        with self.assertRaises(exceptions.TransactionIdNotFound):
+            self.tracker.wait('1')
+
+    def test_restart(self):
+        with mock.patch.object(self.tracker, '_due', side_effect=RuntimeError('boom')):
+            future = self.tracker.register('1')
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+        self.tracker.thread.join(5)
+        self.assertEqual(self.tracker.pending, {})
+        self.connection.transactions.status.return_value = {'status': 'valid'}
+        self.assertEqual(self.tracker.register('2').result(timeout=5), '2')
+
+    def test_negative_invalid(self):
+        self.connection.transactions.status.return_value = {'status': 'invalid'}
+        with self.assertRaises(exceptions.CreateRecordException):
+            self.tracker.wait('1', timeout=5)
+
+    def test_stop(self):
+        self.connection.transactions.status.return_value = {'status': 'backlog'}
+        future = self.tracker.register('1')
+        self.tracker.stop()
+        self.assertTrue(future.cancelled())
+        with self.assertRaises(Exception):
+            self.tracker.register('2')
+
+
+class StandInEventStream(object):
+    """
+    Local WebSocket server emitting synthetic events of the valid transactions stream
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.sockets = []
+        self.connected = threading.Event()
+        self.port = None
+        self.runner = None
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    async def handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.append(ws)
+        self.connected.set()
+        async for _ in ws:
+            pass
+        return ws
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get('/api/v1/streams/valid_transactions', self.handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def _emit(self, event):
+        for ws in self.sockets:
+            await ws.send_json(event)
+
+    async def _disconnect(self):
+        self.connected.clear()
+        sockets, self.sockets = self.sockets, []
+        for ws in sockets:
+            await ws.close()
+
+    def call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout=5)
+
+    def start(self):
+        self.thread.start()
+        self.call(self._start())
+        return 'ws://127.0.0.1:{}/api/v1/streams/valid_transactions'.format(self.port)
+
+    def emit(self, tx_id):
+        self.call(self._emit({'transaction_id': tx_id, 'asset_id': tx_id, 'block_id': 'block'}))
+
+    def disconnect(self):
+        self.call(self._disconnect())
+
+    def stop(self):
+        self.call(self.runner.cleanup())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+class EventStreamTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInEventStream()
+        self.connection = mock.Mock()
+        self.connection.transactions.status.return_value = {'status': 'backlog'}
+        self.tracker = confirmations.EventStreamTracker(self.connection, self.server.start(), initial_delay=0.01,
+                                                        max_delay=0.05, stream_poll_delay=60)
+
+    def tearDown(self):
+        self.tracker.stop()
+        self.server.stop()
+        del self.tracker
+        del self.connection
+        del self.server
+
+    def connect(self):
+        self.tracker.register('warmup')
+        self.assertTrue(self.server.connected.wait(timeout=5))
+        self.server.emit('warmup')
+
+    def test_event(self):
+        self.connect()
+        future = self.tracker.register('1')
+        self.server.emit('1')
+        self.assertEqual(future.result(timeout=5), '1')
+        self.assertTrue(self.tracker.connected)
+
+    def test_event_before_register(self):
+        self.connect()
+        self.server.emit('2')
+        self.server.emit('3')
+        self.tracker.register('3').result(timeout=5)
+        self.assertTrue(self.tracker.register('2').done())
+        self.assertNotIn('2', self.tracker.pending)
+
+    def test_fallback_to_polling(self):
+        self.connect()
+        future = self.tracker.register('1')
+        calls = self.connection.transactions.status.call_count
+        self.connection.transactions.status.return_value = {'status': 'valid'}
+        self.server.disconnect()
+        self.assertEqual(future.result(timeout=5), '1')
+        self.assertGreater(self.connection.transactions.status.call_count, calls)
+        self.assertTrue(self.server.connected.wait(timeout=5))
@@ -0,0 +1,93 @@
+import logging
+import time
+import unittest
+
+from cryptoconditions import crypto
+
+from prov2bigchaindb.core import keypairs, local_stores
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class KeypairPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = keypairs.KeypairPool(size=3)
+
+    def tearDown(self):
+        self.pool.close()
+        del self.pool
+
+    def wait_until_full(self):
+        for _ in range(100):
+            if len(self.pool.keypairs) == self.pool.size:
+                return
+            time.sleep(0.05)
+        self.fail("Pool was not filled")
+
+    def test_get(self):
+        self.wait_until_full()
+        self.assertEqual(self.pool.generated, 3)
+        private_keys = {self.pool.get()[0] for _ in range(5)}
+        self.assertEqual(len(private_keys), 5)
+        # the pool is refilled after keypairs were taken
+        self.wait_until_full()
+        self.assertGreaterEqual(self.pool.generated, 6)
+
+    def test_close(self):
+        self.pool.close()
+        self.assertFalse(self.pool.thread.is_alive())
+        self.assertEqual(len(self.pool.keypairs), 0)
+        self.assertEqual(len(self.pool.get()), 2)
+
+
+class KeyDerivationTest(unittest.TestCase):
+    def setUp(self):
+        self.derivation = keypairs.KeyDerivation(b'master seed of test', cache_size=2)
+
+    def tearDown(self):
+        del self.derivation
+
+    def test_derive(self):
+        private_key, public_key = self.derivation.derive('ex:Agent')
+        signature = crypto.Ed25519SigningKey(private_key).sign(b'data')
+        self.assertTrue(crypto.Ed25519VerifyingKey(public_key).verify(b'data', signature))
+        self.assertEqual(keypairs.KeyDerivation(b'master seed of test').derive('ex:Agent'), (private_key, public_key))
+        self.assertNotEqual(self.derivation.derive('ex:Entity'), (private_key, public_key))
+        self.assertNotEqual(keypairs.KeyDerivation(b'other seed of test').derive('ex:Agent'),
+                            (private_key, public_key))
+
+    def test_path(self):
+        derivation = keypairs.KeyDerivation(b'master seed of test', path='tenant/project')
+        child = self.derivation.child('tenant').child('project')
+        self.assertEqual(child.path, 'tenant/project')
+        self.assertEqual(child.derive('ex:Agent'), derivation.derive('ex:Agent'))
+        self.assertNotEqual(child.derive('ex:Agent'), self.derivation.derive('ex:Agent'))
+
+
+class DerivedKeyStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.derivation = keypairs.KeyDerivation(b'master seed of test')
+        self.store = keypairs.DerivedKeyStore(local_stores.SqliteStore(), self.derivation)
+
+    def tearDown(self):
+        self.store.clean_tables()
+        del self.store
+        del self.derivation
+
+    def test_get_account(self):
+        private_key, public_key = self.derivation.derive('ex:Agent')
+        self.assertEqual(self.store.get_account('ex:Agent'), ('ex:Agent', public_key, private_key, None))
+        self.store.write_tx_id('ex:Agent', '1')
+        self.assertEqual(self.store.get_account('ex:Agent')[3], '1')
+        # only the tx_id is persisted
+        self.assertEqual(self.store.store.get_account('ex:Agent'), ('ex:Agent', '', '', '1'))
+
+    def test_get_accounts(self):
+        self.store.store.write_account('ex:Old', 'public', 'private', '0')
+        self.store.write_tx_ids([('ex:Agent', '1'), ('ex:Old', '2')])
+        accounts = self.store.get_accounts(['ex:Agent', 'ex:Old', 'ex:New'])
+        self.assertEqual(accounts['ex:Agent'][3], '1')
+        self.assertEqual(accounts['ex:Old'], ('ex:Old', 'public', 'private', '2'))
+        self.assertEqual(accounts['ex:New'][1], self.derivation.derive('ex:New').public_key)
+        self.assertIsNone(accounts['ex:New'][3])
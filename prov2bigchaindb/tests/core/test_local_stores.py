@@ -1,4 +1,7 @@
 import logging
+import os
+import tempfile
+import threading
 import unittest
 from unittest import mock
 import sqlite3
@@ -22,7 +25,7 @@ class SqliteStoreTest(unittest.TestCase):
     @mock.patch('prov2bigchaindb.core.local_stores.sqlite3')
     def test_init(self, mock_sqlite3):
         local_stores.SqliteStore()
-        mock_sqlite3.connect.assert_called_with(':memory:')
+        mock_sqlite3.connect.assert_called_with(':memory:', check_same_thread=False)
         mock_sqlite3.connect().execute.assert_called_with(
             '''CREATE TABLE IF NOT EXISTS accounts (account_id TEXT, public_key TEXT, private_key TEXT, tx_id TEXT, PRIMARY KEY (account_id, public_key))''')
 
@@ -61,3 +64,148 @@ class SqliteStoreTest(unittest.TestCase):
             ret = db.get_account('wrong_id')
             self.assertEqual(ret, None)
         db.clean_tables()
+
+    def test_live_index(self):
+        db = local_stores.SqliteStore()
+        db.write_index('t1', ['ex:E1'], [])
+        db.write_index('t2', ['ex:E2'], [])
+        db.write_index('t3', ['ex:E3'], [])
+        db.write_index('r1', [], [('prov:Derivation', 'ex:E2', 'ex:E1')])
+        db.write_index('r2', ['ex:d2'], [('prov:Derivation', 'ex:E3', 'ex:E2')])
+        db.write_index('r3', [], [('prov:Derivation', 'ex:E1', 'ex:E3')])
+        self.assertEqual(sorted(db.find_records('ex:E2')), ['r1', 'r2', 't2'])
+        self.assertEqual(db.find_records('ex:d2'), ['r2'])
+        self.assertEqual(db.find_relations('ex:E3', 'ex:E2'), [('r2', 'prov:Derivation', 'ex:E3', 'ex:E2')])
+        self.assertEqual(len(db.find_relations(obj='ex:E1')), 1)
+        self.assertEqual(db.ancestors('ex:E3', depth=1), ['ex:E2'])
+        self.assertEqual(db.ancestors('ex:E3', depth=2), ['ex:E2', 'ex:E1'])
+        # the cycle E1 -> E3 ends the recursion
+        self.assertEqual(sorted(db.ancestors('ex:E3')), ['ex:E1', 'ex:E2'])
+        self.assertEqual(db.descendants('ex:E1', depth=1), ['ex:E2'])
+        db.write_document('root', ['t1', 't2', 'r1'])
+        self.assertEqual(db.get_document_tx_ids('root'), ['t1', 't2', 'r1'])
+        db.clean_tables()
+        self.assertEqual(db.find_records('ex:E2'), [])
+
+    def test_live_bulk_accounts(self):
+        db = local_stores.SqliteStore()
+        db.MAX_VARIABLES = 2
+        db.write_accounts([('a{}'.format(i), 'public', 'private', None) for i in range(5)])
+        accounts = db.get_accounts(['a0', 'a3', 'a4', 'unknown', 'a0'])
+        self.assertEqual(sorted(accounts), ['a0', 'a3', 'a4'])
+        self.assertEqual(accounts['a3'], ('a3', 'public', 'private', None))
+        db.write_tx_ids([('a0', 't0'), ('a4', 't4')])
+        self.assertEqual(db.get_account('a0')[3], 't0')
+        self.assertEqual(db.get_account('a4')[3], 't4')
+        db.clean_tables()
+
+    def test_live_asset_hash(self):
+        db = local_stores.SqliteStore()
+        self.assertIsNone(db.get_asset_tx_id('h1'))
+        db.write_asset_hash('h1', 't1')
+        db.write_asset_hash('h2', 't2')
+        self.assertEqual(db.get_asset_tx_id('h1'), 't1')
+        db.write_asset_hash('h1', 't3')
+        self.assertEqual(db.get_asset_tx_id('h1'), 't3')
+        db.clean_tables()
+        self.assertIsNone(db.get_asset_tx_id('h2'))
+
+    def test_live_journal(self):
+        db = local_stores.SqliteStore()
+        db.write_journal_step('doc', 's1', [{'id': 't1'}, {'id': 't2'}])
+        db.write_journal_step('doc', 's2', [{'id': 't3'}])
+        # a recorded step keeps its transactions
+        db.write_journal_step('doc', 's1', [{'id': 'other'}])
+        db.write_journal_state('doc', 's1', 'valid')
+        self.assertEqual(db.get_journal_step('doc', 's1'), ([{'id': 't1'}, {'id': 't2'}], 'valid'))
+        self.assertEqual(db.get_journal_step('doc', 's3'), None)
+        self.assertEqual(db.get_journal('doc'), {'s1': 'valid', 's2': 'planned'})
+        db.delete_journal('doc')
+        self.assertEqual(db.get_journal('doc'), {})
+        db.clean_tables()
+
+    def test_live_batch(self):
+        db = local_stores.SqliteStore()
+        with db.batch():
+            db.write_account('a0', 'public', 'private')
+            with db.batch():
+                db.write_tx_id('a0', 't0')
+        self.assertEqual(db.get_account('a0')[3], 't0')
+        with self.assertRaises(sqlite3.IntegrityError):
+            with db.batch():
+                db.write_account('a1', 'public', 'private')
+                db.write_account('a0', 'public', 'private')
+        with self.assertRaises(exceptions.NoAccountFoundException):
+            db.get_account('a1')
+        db.clean_tables()
+
+    def test_live_file_threads(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = local_stores.SqliteStore(os.path.join(tmp_dir, 'accounts.db'), pool_size=2)
+            with db._read() as conn:
+                self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+            def write(worker):
+                for i in range(50):
+                    with db.batch():
+                        db.write_account('w{}_{}'.format(worker, i), 'public', 'private')
+                        db.write_tx_id('w{}_{}'.format(worker, i), 't{}'.format(i))
+
+            threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            accounts = db.get_accounts(['w{}_{}'.format(worker, i) for worker in range(8) for i in range(50)])
+            self.assertEqual(len(accounts), 400)
+            self.assertEqual(accounts['w7_49'][3], 't49')
+            self.assertLessEqual(len(db.pool), 2)
+            db.close()
+            # a second store shares the file
+            other = local_stores.SqliteStore(os.path.join(tmp_dir, 'accounts.db'))
+            self.assertEqual(other.get_account('w0_0')[3], 't0')
+            other.close()
+
+
+class CachingStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.store = mock.Mock(wraps=local_stores.SqliteStore())
+        self.store.db_name = ':memory:'
+        self.cache = local_stores.CachingStore(self.store, max_entries=2)
+
+    def tearDown(self):
+        self.cache.clean_tables()
+        del self.cache
+        del self.store
+
+    def test_get_account(self):
+        self.cache.write_account('a0', 'public', 'private')
+        self.assertEqual(self.cache.get_account('a0'), ('a0', 'public', 'private', None))
+        self.assertEqual(self.cache.get_account('a0'), ('a0', 'public', 'private', None))
+        self.assertEqual(self.store.get_account.call_count, 1)
+        self.cache.write_tx_id('a0', 't0')
+        self.assertEqual(self.cache.get_account('a0')[3], 't0')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_negative_and_eviction(self):
+        for _ in range(2):
+            with self.assertRaises(exceptions.NoAccountFoundException):
+                self.cache.get_account('unknown')
+        self.assertEqual(self.store.get_account.call_count, 1)
+        self.cache.write_account('unknown', 'public', 'private')
+        self.assertEqual(self.cache.get_account('unknown')[0], 'unknown')
+        self.cache.write_accounts([('a1', 'public', 'private', None), ('a2', 'public', 'private', None)])
+        self.assertEqual(sorted(self.cache.get_accounts(['a1', 'a2', 'a3'])), ['a1', 'a2'])
+        self.assertEqual(list(self.cache.entries), ['a2', 'a3'])
+        self.assertEqual(sorted(self.cache.get_accounts(['a2', 'a3'])), ['a2'])
+        self.assertEqual(self.store.get_accounts.call_count, 1)
+
+    def test_batch(self):
+        self.cache.write_account('a0', 'public', 'private')
+        with self.assertRaises(sqlite3.IntegrityError):
+            with self.cache.batch():
+                self.cache.write_tx_id('a0', 't0')
+                self.cache.write_account('a0', 'public', 'private')
+        self.assertIsNone(self.cache.get_account('a0')[3])
+        self.cache.write_index('t1', ['ex:E1'], [])
+        self.assertEqual(self.cache.find_records('ex:E1'), ['t1'])
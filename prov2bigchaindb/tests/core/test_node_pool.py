@@ -0,0 +1,95 @@
+import logging
+import unittest
+from unittest import mock
+
+import requests
+from bigchaindb_driver import exceptions as bdb_exceptions
+
+from prov2bigchaindb.core import node_pool
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class NodeStatsTest(unittest.TestCase):
+    def test_latency(self):
+        stats = node_pool.NodeStats('http://a:9984', alpha=0.5)
+        stats.start()
+        self.assertEqual(stats.in_flight, 1)
+        self.assertEqual(stats.score(), 0.0)
+        stats.finish(1.0)
+        stats.start()
+        stats.finish(3.0)
+        self.assertEqual(stats.latency, 2.0)
+        self.assertEqual(stats.in_flight, 0)
+        stats.start()
+        self.assertEqual(stats.score(), 4.0)
+
+    def test_eject(self):
+        stats = node_pool.NodeStats('http://a:9984', max_failures=2, eject_seconds=60)
+        for _ in range(2):
+            self.assertTrue(stats.is_available())
+            stats.start()
+            stats.finish(0.1, failed=True)
+        self.assertFalse(stats.is_available())
+        self.assertTrue(stats.is_available(stats.ejected_until))
+
+
+class LatencyPickerTest(unittest.TestCase):
+    def setUp(self):
+        self.connections = [mock.Mock(stats=node_pool.NodeStats(node)) for node in ('a', 'b', 'c')]
+        for connection, latency in zip(self.connections, (0.3, 0.1, 0.1)):
+            connection.stats.latency = latency
+        self.picker = node_pool.LatencyPicker()
+
+    def tearDown(self):
+        del self.connections
+        del self.picker
+
+    def test_pick(self):
+        a, b, c = self.connections
+        self.assertEqual({self.picker.pick(self.connections) for _ in range(4)}, {b, c})
+        b.stats.in_flight = 5
+        self.assertIs(self.picker.pick(self.connections), c)
+        c.stats.ejected_until = float('inf')
+        self.assertIs(self.picker.pick(self.connections), a)
+
+    def test_pick_all_ejected(self):
+        for connection, ejected_until in zip(self.connections, (3e9, 1e9, 2e9)):
+            connection.stats.ejected_until = ejected_until
+        self.assertIs(self.picker.pick(self.connections), self.connections[1])
+
+
+class TrackedTransportTest(unittest.TestCase):
+    def test_forward_request(self):
+        stats = node_pool.NodeStats('http://a:9984', max_failures=1)
+        transport = node_pool.TrackedTransport('http://a:9984', stats=stats, timeout=5)
+        mock_request = mock.Mock(side_effect=[mock.Mock(data={'status': 'valid'}),
+                                              bdb_exceptions.NotFoundError(404, '', None),
+                                              requests.exceptions.ConnectionError()])
+        transport.get_connection().request = mock_request
+        self.assertEqual(transport.forward_request('GET', path='/statuses'), {'status': 'valid'})
+        self.assertEqual(mock_request.call_args[1]['timeout'], 5)
+        self.assertIsNotNone(stats.latency)
+        with self.assertRaises(bdb_exceptions.NotFoundError):
+            transport.forward_request('GET', path='/statuses')
+        self.assertTrue(stats.is_available())
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            transport.forward_request('GET', path='/statuses')
+        self.assertFalse(stats.is_available())
+        self.assertEqual(stats.in_flight, 0)
+
+    def test_connect(self):
+        connections = node_pool.connect(['http://a:9984', 'http://b:9984'], 2)
+        self.assertEqual(len(connections), 4)
+        self.assertEqual(len({id(connection) for connection in connections}), 4)
+        self.assertIs(connections[0].stats, connections[1].stats)
+        self.assertIsNot(connections[0].stats, connections[2].stats)
+        self.assertEqual(connections[2].stats.node, 'http://b:9984')
+        # connections of a node share one session
+        self.assertIs(connections[0].session, connections[1].session)
+        self.assertIsNot(connections[0].session, connections[2].session)
+        transport = node_pool.TrackedTransport('http://a:9984', stats=connections[0].stats,
+                                               session=connections[0].session)
+        self.assertIs(transport.get_connection().session, connections[0].session)
+        node_pool.close(connections)
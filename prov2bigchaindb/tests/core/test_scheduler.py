@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import threading
+import unittest
+
+from prov2bigchaindb.core import scheduler
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class DependencySchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.finished = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        del self.finished
+        del self.lock
+
+    def task(self, name):
+        with self.lock:
+            self.finished.append(name)
+        return name.upper()
+
+    def test_waves(self):
+        tasks = scheduler.DependencyScheduler()
+        tasks.add_task('a', self.task, ('a',))
+        tasks.add_task('b', self.task, ('b',))
+        tasks.add_task('c', self.task, ('c',), depends_on=['a'])
+        tasks.add_task('d', self.task, ('d',), depends_on=['c', 'b'])
+        self.assertEqual(tasks.waves(), [['a', 'b'], ['c'], ['d']])
+
+    def test_run(self):
+        tasks = scheduler.DependencyScheduler(max_workers=4)
+        tasks.add_task('d', self.task, ('d',), depends_on=['c'])
+        tasks.add_task('c', self.task, ('c',), depends_on=['a', 'b'])
+        tasks.add_task('a', self.task, ('a',))
+        tasks.add_task('b', self.task, ('b',))
+        results = tasks.run()
+        self.assertEqual(results, {'a': 'A', 'b': 'B', 'c': 'C', 'd': 'D'})
+        self.assertEqual(set(self.finished[:2]), {'a', 'b'})
+        self.assertEqual(self.finished[2:], ['c', 'd'])
+
+    def test_run_async(self):
+        async def task(name):
+            return self.task(name)
+
+        tasks = scheduler.DependencyScheduler(max_workers=2)
+        tasks.add_task('a', task, ('a',))
+        tasks.add_task('b', task, ('b',), depends_on=['a'])
+        tasks.add_task('c', task, ('c',))
+        loop = asyncio.new_event_loop()
+        results = loop.run_until_complete(tasks.run_async())
+        loop.close()
+        self.assertEqual(results, {'a': 'A', 'b': 'B', 'c': 'C'})
+        self.assertEqual(self.finished[-1], 'b')
+
+    def test_negative_missing_dependency(self):
+        tasks = scheduler.DependencyScheduler()
+        tasks.add_task('a', self.task, ('a',), depends_on=['missing'])
+        with self.assertRaises(Exception):
+            tasks.run()
+
+    def test_negative_cycle(self):
+        tasks = scheduler.DependencyScheduler()
+        tasks.add_task('a', self.task, ('a',), depends_on=['b'])
+        tasks.add_task('b', self.task, ('b',), depends_on=['a'])
+        with self.assertRaises(Exception):
+            tasks.run()
@@ -0,0 +1,56 @@
+import logging
+import unittest
+from unittest import mock
+
+from prov2bigchaindb.core import signing
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class SigningTest(unittest.TestCase):
+    def setUp(self):
+        self.public_key = 'public'
+        self.private_key = 'private'
+        self.creation_tx = {'id': '1',
+                            'outputs': [{'condition': {'details': {'public_key': 'public'}},
+                                         'public_keys': ['public']}]}
+        self.transactions = mock.Mock(**{'prepare.return_value': {},
+                                         'fulfill.return_value': self.creation_tx})
+
+    def tearDown(self):
+        del self.public_key
+        del self.private_key
+        del self.creation_tx
+        del self.transactions
+
+    def test_prepare_creation(self):
+        tx = signing.prepare_creation(self.transactions, self.public_key, self.private_key, {'data': {}},
+                                      {'account_id': 'a'}, 'recipient')
+        self.assertEqual(tx, self.creation_tx)
+        _, kwargs = self.transactions.prepare.call_args
+        self.assertEqual(kwargs['operation'], 'CREATE')
+        self.assertEqual(kwargs['signers'], self.public_key)
+        self.assertEqual(kwargs['recipients'], 'recipient')
+        self.assertIn('timestamp', kwargs['metadata'])
+        self.transactions.fulfill.assert_called_once_with({}, private_keys=self.private_key)
+
+    def test_prepare_transfer(self):
+        signing.prepare_transfer(self.transactions, self.private_key, 'recipient', self.creation_tx)
+        _, kwargs = self.transactions.prepare.call_args
+        self.assertEqual(kwargs['operation'], 'TRANSFER')
+        self.assertEqual(kwargs['asset'], {'id': '1'})
+        self.assertEqual(kwargs['inputs'], {'fulfillment': {'public_key': 'public'},
+                                            'fulfills': {'output_index': 0, 'transaction_id': '1'},
+                                            'owners_before': ['public']})
+        self.assertEqual(kwargs['recipients'], 'recipient')
+
+    @mock.patch('prov2bigchaindb.core.signing.TransactionsEndpoint')
+    def test_sign_record(self, mock_endpoint):
+        mock_endpoint.prepare.return_value = {}
+        mock_endpoint.fulfill.return_value = self.creation_tx
+        txs = signing.sign_record(self.public_key, self.private_key, {'data': {}}, {}, 'recipient')
+        self.assertEqual(len(txs), 2)
+        self.assertEqual(mock_endpoint.fulfill.call_count, 2)
+        txs = signing.sign_record(self.public_key, self.private_key, {'data': {}}, {}, 'recipient', single_tx=True)
+        self.assertEqual(len(txs), 1)
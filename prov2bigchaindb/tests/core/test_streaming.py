@@ -0,0 +1,44 @@
+import io
+import json
+import logging
+import unittest
+
+from prov2bigchaindb.core import streaming, utils
+from prov2bigchaindb.tests.core import setup_test_files
+
+log = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+class ProvJSONWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.test_prov_files = setup_test_files()
+        self.prov_document = utils.to_prov_document(content=self.test_prov_files["thesis"])
+
+    def tearDown(self):
+        del self.test_prov_files
+        del self.prov_document
+
+    def chunks(self, document):
+        namespaces = document.get_registered_namespaces()
+        return [(namespaces, record) for record in document.get_records()]
+
+    def test_write_prov_json(self):
+        stream = io.StringIO()
+        count = streaming.write_prov_json(self.chunks(self.prov_document), stream)
+        self.assertEqual(count, len(self.prov_document.get_records()))
+        document = utils.to_prov_document(stream.getvalue())
+        self.assertEqual(document, self.prov_document)
+
+    def test_write_repeated_identifier(self):
+        stream = io.StringIO()
+        # small spool size moves the sections to disk
+        with streaming.ProvJSONWriter(stream, spool_size=16) as writer:
+            for namespaces, record in self.chunks(self.prov_document) * 2:
+                writer.write(namespaces, record)
+        content = json.loads(stream.getvalue())
+        for identifier, attributes in content['entity'].items():
+            self.assertIsInstance(attributes, list)
+            self.assertEqual(len(attributes), 2)
+        document = utils.to_prov_document(stream.getvalue())
+        self.assertEqual(len(document.get_records()), 2 * len(self.prov_document.get_records()))
@@ -1,11 +1,13 @@
 import logging
+import threading
+import time
 import unittest
 from unittest import mock
 
 import prov
 from bigchaindb_driver import exceptions as bdb_exceptions
 
-from prov2bigchaindb.core import utils, exceptions
+from prov2bigchaindb.core import block_cache, utils, exceptions
 from prov2bigchaindb.tests.core import setup_test_files
 
 log = logging.getLogger(__name__)
@@ -60,6 +62,22 @@ class UtilityTest(unittest.TestCase):
         with self.assertRaises(exceptions.TransactionIdNotFound):
             utils.wait_until_valid('1', mock_bdb)
 
+    @mock.patch('prov2bigchaindb.core.utils.time')
+    @mock.patch('prov2bigchaindb.core.utils.BigchainDB')
+    def test_send_until_accepted(self, mock_bdb, mock_time):
+        tx = {'id': '1'}
+        not_valid = bdb_exceptions.BadRequest(400, 'Bad Request',
+                                              {'message': 'Invalid transaction (TransactionNotInValidBlock)'})
+        mock_bdb.transactions.send.side_effect = [not_valid, not_valid, tx]
+        ret = utils.send_until_accepted(tx, mock_bdb)
+        self.assertEqual(ret, tx)
+        self.assertEqual(mock_bdb.transactions.send.call_count, 3)
+        self.assertEqual(mock_time.sleep.call_count, 2)
+        mock_bdb.transactions.send.side_effect = bdb_exceptions.BadRequest(400, 'Bad Request',
+                                                                           {'message': 'Invalid signature'})
+        with self.assertRaises(exceptions.CreateRecordException):
+            utils.send_until_accepted(tx, mock_bdb)
+
     @mock.patch('prov2bigchaindb.core.utils.BigchainDB')
     def test_is_valid_tx(self, mock_bdb):
         mock_bdb.transactions.status.return_value = {'status': 'valid'}
@@ -77,26 +95,93 @@ class UtilityTest(unittest.TestCase):
             utils.is_valid_tx('1', mock_bdb)
 
     @mock.patch('prov2bigchaindb.core.utils.BigchainDB')
-    @mock.patch('prov2bigchaindb.core.utils.requests.models.Response')
-    @mock.patch('prov2bigchaindb.core.utils.requests')
-    @mock.patch('prov2bigchaindb.core.utils.random')
-    def test_is_block_to_tx_valid(self, mock_random, mock_requests, mock_response, mock_bdb):
-        mock_random.choice.return_value = 'http://127.0.0.1:9984'
-        mock_response.json.side_effect = [['1'], {'status': 'valid'},
-                                          ['1'], {'status': 'undecided'},
-                                          ['1'], {'status': 'invalid'},
-                                          [],
-                                          ['1']]
-        mock_response.status_code = 200
-        mock_requests.get.return_value = mock_response
+    def test_is_block_to_tx_valid(self, mock_bdb):
+        mock_bdb.api_prefix = '/api/v1'
+        mock_bdb.blocks.get.side_effect = [['1'], ['1'], ['1'], [], ['1']]
+        mock_bdb.transport.forward_request.side_effect = [{'status': 'valid'},
+                                                          {'status': 'undecided'},
+                                                          {'status': 'invalid'},
+                                                          bdb_exceptions.NotFoundError()]
         ret = utils.is_block_to_tx_valid('1', mock_bdb)
         self.assertEqual(ret, True)
+        mock_bdb.blocks.get.assert_called_with(txid='1')
+        mock_bdb.transport.forward_request.assert_called_with(method='GET', path='/api/v1/statuses',
+                                                              params={'block_id': '1'})
         ret = utils.is_block_to_tx_valid('1', mock_bdb)
         self.assertEqual(ret, False)
         ret = utils.is_block_to_tx_valid('1', mock_bdb)
         self.assertEqual(ret, False)
         with self.assertRaises(exceptions.TransactionIdNotFound):
             utils.is_block_to_tx_valid('1', mock_bdb)
-        mock_response.status_code = 400
         with self.assertRaises(exceptions.BlockIdNotFound):
             utils.is_block_to_tx_valid('1', mock_bdb)
+
+    @mock.patch('prov2bigchaindb.core.utils.BigchainDB')
+    def test_is_block_to_tx_valid_cache(self, mock_bdb):
+        mock_bdb.api_prefix = '/api/v1'
+        mock_bdb.blocks.get.side_effect = [['b1'], ['b2'], ['b2'], ['b3']]
+        mock_bdb.blocks.retrieve.return_value = {'block': {'transactions': [{'id': '1'}, {'id': '2'}]}}
+        mock_bdb.transport.forward_request.side_effect = [{'status': 'valid'}, {'status': 'invalid'},
+                                                          {'status': 'invalid'}, {'status': 'valid'}]
+        cache = block_cache.BlockStatusCache()
+        self.assertTrue(utils.is_block_to_tx_valid('1', mock_bdb, cache))
+        # 2 is in the same valid block as 1
+        self.assertTrue(utils.is_block_to_tx_valid('2', mock_bdb, cache))
+        self.assertEqual(mock_bdb.blocks.get.call_count, 1)
+        self.assertEqual(mock_bdb.blocks.retrieve.call_count, 1)
+        # 3 is not pinned to its invalid block and is found in a new valid block
+        self.assertFalse(utils.is_block_to_tx_valid('3', mock_bdb, cache))
+        self.assertFalse(utils.is_block_to_tx_valid('3', mock_bdb, cache))
+        self.assertTrue(utils.is_block_to_tx_valid('3', mock_bdb, cache))
+        self.assertEqual(mock_bdb.blocks.get.call_count, 4)
+        self.assertEqual(mock_bdb.transport.forward_request.call_count, 4)
+        self.assertIsNone(cache.get_status('b2'))
+
+    @mock.patch('prov2bigchaindb.core.utils.BigchainDB')
+    def test_are_blocks_to_txs_valid(self, mock_bdb):
+        mock_bdb.api_prefix = '/api/v1'
+        mock_bdb.blocks.get.side_effect = [['b1'], [], ['b2']]
+        mock_bdb.blocks.retrieve.return_value = {'block': {'transactions': [{'id': '1'}, {'id': '2'}]}}
+        mock_bdb.transport.forward_request.side_effect = [{'status': 'valid'}, {'status': 'invalid'}]
+        cache = block_cache.BlockStatusCache()
+        # 2 is in the same valid block as 1, 3 is in no block yet
+        ret = utils.are_blocks_to_txs_valid(['1', '2', '3', '1', '4'], mock_bdb, cache)
+        self.assertEqual(ret, {'1': True, '2': True, '3': False, '4': False})
+        self.assertEqual(mock_bdb.blocks.get.call_count, 3)
+        self.assertEqual(mock_bdb.transport.forward_request.call_count, 2)
+        self.assertEqual(mock_bdb.blocks.retrieve.call_count, 1)
+
+    @mock.patch('prov2bigchaindb.core.utils.BigchainDB')
+    def test_is_block_to_tx_valid_concurrent(self, mock_bdb):
+        mock_bdb.api_prefix = '/api/v1'
+        mock_bdb.blocks.get.return_value = ['b1']
+        mock_bdb.blocks.retrieve.return_value = {'block': {'transactions': [{'id': '1'}, {'id': '2'}]}}
+        started = threading.Event()
+        release = threading.Event()
+
+        def forward_request(**kwargs):
+            started.set()
+            release.wait(5)
+            return {'status': 'valid'}
+
+        mock_bdb.transport.forward_request.side_effect = forward_request
+        cache = block_cache.BlockStatusCache()
+        results = {}
+
+        def check(tx_id):
+            results[tx_id] = utils.is_block_to_tx_valid(tx_id, mock_bdb, cache)
+
+        first = threading.Thread(target=check, args=('1',))
+        first.start()
+        started.wait(5)
+        # 2 misses while the block of 1 is looked up and waits for that lookup
+        second = threading.Thread(target=check, args=('2',))
+        second.start()
+        time.sleep(0.2)
+        release.set()
+        first.join(5)
+        second.join(5)
+        self.assertEqual(results, {'1': True, '2': True})
+        self.assertEqual(mock_bdb.blocks.get.call_count, 2)
+        self.assertEqual(mock_bdb.transport.forward_request.call_count, 1)
+        self.assertEqual(mock_bdb.blocks.retrieve.call_count, 1)
@@ -6,6 +6,7 @@ except ImportError:
 
 install_requires=[
     "bigchaindb_driver~=0.4.1",
+    "cryptoconditions~=0.6.0.dev",
     "networkx~=2.1",
     "prov~=1.5.2"
 ]
@@ -16,6 +17,10 @@ tests_require = [
     'coveralls'
 ]
 
+async_require = [
+    'aiohttp>=3.3',
+]
+
 docs_require = [
     'Sphinx>=1.3.5',
     'recommonmark>=0.4.0',
@@ -65,9 +70,10 @@ setup(
     install_requires=install_requires,
     tests_require=tests_require,
     extras_require={
-        'test': tests_require + docs_require,
-        'dev': tests_require + docs_require,
+        'test': tests_require + docs_require + async_require,
+        'dev': tests_require + docs_require + async_require,
         'docs': docs_require,
+        'async': async_require,
     },
 
     license="Apache License 2.0",